@@ -0,0 +1,183 @@
+"""
+Synthetic-deck benchmark of every pipeline stage.
+
+Usage:
+    python benchmarks/run_benchmarks.py --case small medium --output benchmarks/results.json
+    python benchmarks/run_benchmarks.py --case medium --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.grid import Grid
+from pptx_snapper.kmeans_grid import KMeansGrid
+from pptx_snapper.snapping import SnappingSearch, SnappingManager, SnappingLimits
+from pptx_snapper.object_recognizer import ObjectRecognizer
+from pptx_snapper.templates import ObjectTemplates
+from pptx_snapper.utils import AnchorPoint
+
+from synthetic_deck import create_synthetic_deck
+
+CASES = OrderedDict(
+    tiny=dict(num_of_slides=2, shapes_per_slide=10, group_depth=0, media_size=0),
+    small=dict(num_of_slides=10, shapes_per_slide=20, group_depth=0, media_size=0),
+    medium=dict(num_of_slides=50, shapes_per_slide=50, group_depth=1, media_size=100_000),
+    large=dict(num_of_slides=200, shapes_per_slide=100, group_depth=2, media_size=1_000_000),
+)
+
+STAGES = ["reader", "grid", "kmeans_grid", "candidates", "templates", "apply_snaps", "save",
+          "save_parallel", "save_level1", "save_store"]
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = OrderedDict((stage, []) for stage in STAGES)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        yield
+        self.timings[name].append(time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        return OrderedDict((stage, dict(min=min(times), median=statistics.median(times)))
+                           for stage, times in self.timings.items() if times)
+
+
+def run_pipeline(deck_path: str, out_path: str, timer: StageTimer) -> None:
+    """Run the snapping pipeline once, timing every stage separately."""
+    ObjectTemplates.templates.clear()
+
+    with timer.stage("reader"):
+        reader = PPTXReader(deck_path)
+
+    limits = SnappingLimits(x_relative_limit=.1, y_relative_limit=.1)
+
+    with timer.stage("grid"):
+        basic_grid = Grid(reader.slide_width, reader.slide_height, 3, 3)
+        basic_snapping = SnappingSearch(limits=limits)
+        basic_snapping.set_joint_grid(basic_grid)
+
+    with timer.stage("kmeans_grid"):
+        kmeans_snappings = []
+        for slide in reader.slides:
+            kmeans_grid = KMeansGrid(slide)
+            kmeans_grid.calculate_kmeans_grid(anchor_point=AnchorPoint.TOP_LEFT, axis='y')
+            kmeans_snapping = SnappingSearch(limits=limits)
+            kmeans_snapping.set_joint_grid(kmeans_grid)
+            kmeans_snappings.append(kmeans_snapping)
+
+    with timer.stage("candidates"):
+        for slide, kmeans_snapping in zip(reader.slides, kmeans_snappings):
+            basic_snapping.calculate_candidates_for_all_obj(slide, "joint", grid_type="basic")
+            kmeans_snapping.calculate_candidates_for_all_obj(slide, "joint", grid_type="kmeans")
+
+    with timer.stage("templates"):
+        objects = [so for slide in reader.slides for so in slide.snappable_objects]
+        recognizer = ObjectRecognizer.get_size_recognizer(0.9)
+        ObjectTemplates.recognize_templates(objects, recognizer)
+
+    with timer.stage("apply_snaps"):
+        manager = SnappingManager(reader, x_relative_limit=.1, y_relative_limit=.1)
+        manager.apply_snaps()
+
+    with timer.stage("save"):
+        manager.save_at(out_path)
+
+    # variants of the opt-in parallel writer: default level, fast compression and store only
+    with timer.stage("save_parallel"):
+        manager.save_at(out_path, parallel=True)
+
+    with timer.stage("save_level1"):
+        manager.save_at(out_path, compression_level=1, parallel=True)
+
+    with timer.stage("save_store"):
+        manager.save_at(out_path, store_only=True, parallel=True)
+
+
+def run_case(params: dict, repeat: int, work_dir: str) -> dict:
+    deck_path = create_synthetic_deck(os.path.join(work_dir, "deck.pptx"), **params)
+    out_path = os.path.join(work_dir, "deck_snapped.pptx")
+
+    timer = StageTimer()
+    for _ in range(repeat):
+        run_pipeline(deck_path, out_path, timer)
+
+    return OrderedDict(params=params, deck_size=os.path.getsize(deck_path), stages=timer.summary())
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list[str]:
+    """List the stages whose best time got slower than the baseline by more than the tolerance."""
+    regressions = []
+    for case_name, case in results["cases"].items():
+        base_case = baseline.get("cases", {}).get(case_name)
+        if base_case is None or base_case.get("params") != case["params"]:
+            continue
+        for stage, timing in case["stages"].items():
+            base_timing = base_case["stages"].get(stage)
+            if base_timing is None:
+                continue
+            if timing["min"] > base_timing["min"] * (1 + tolerance) and timing["min"] - base_timing["min"] > min_delta:
+                regressions.append(f"{case_name}/{stage}: {base_timing['min']:.4f}s -> {timing['min']:.4f}s")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", nargs="+", default=["small"], choices=list(CASES.keys()) + ["custom"])
+    parser.add_argument("--slides", type=int, default=10, help="slide count of the 'custom' case")
+    parser.add_argument("--shapes", type=int, default=20, help="shapes per slide of the 'custom' case")
+    parser.add_argument("--group-depth", type=int, default=0, help="grouping depth of the 'custom' case")
+    parser.add_argument("--media-size", type=int, default=0, help="media size (bytes) of the 'custom' case")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results.json"))
+    parser.add_argument("--baseline", default=None, help="results json to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    cases = OrderedDict((name, CASES[name]) for name in args.case if name != "custom")
+    if "custom" in args.case:
+        cases["custom"] = dict(num_of_slides=args.slides, shapes_per_slide=args.shapes,
+                               group_depth=args.group_depth, media_size=args.media_size)
+
+    results = OrderedDict(meta=OrderedDict(timestamp=datetime.now(timezone.utc).isoformat(),
+                                           python=platform.python_version(),
+                                           platform=platform.platform(),
+                                           repeat=args.repeat),
+                          cases=OrderedDict())
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, params in cases.items():
+            results["cases"][name] = run_case(params, args.repeat, work_dir)
+            for stage, timing in results["cases"][name]["stages"].items():
+                print(f"{name:>8} {stage:>12}: {timing['min']:.4f}s (median {timing['median']:.4f}s)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import io
+import random
+from typing import Optional
+
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Emu, Cm
+
+
+def _noise_image(num_of_bytes: int, rng: random.Random) -> io.BytesIO:
+    """Create an incompressible PNG image of approximately the given size."""
+    side = max(int((num_of_bytes / 3) ** 0.5), 1)
+    image = Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3))
+    stream = io.BytesIO()
+    image.save(stream, format="PNG", compress_level=0)
+    stream.seek(0)
+    return stream
+
+
+def _add_shape(shapes, rng: random.Random, sizes: list[tuple[int, ...]], positions: list[tuple[int, ...]], jitter: int):
+    width, height = rng.choice(sizes)
+    left, top = rng.choice(positions)
+    return shapes.add_shape(MSO_SHAPE.RECTANGLE,
+                            Emu(left + rng.randint(-jitter, jitter)),
+                            Emu(top + rng.randint(-jitter, jitter)),
+                            Emu(width), Emu(height))
+
+
+def create_synthetic_deck(out_path: str,
+                          num_of_slides: int = 10,
+                          shapes_per_slide: int = 20,
+                          group_depth: int = 0,
+                          media_size: int = 0,
+                          seed: Optional[int] = 0) -> str:
+    """
+    Generate a deck with python-pptx that looks like a layout-heavy corporate deck:
+    shapes are drawn from a few repeated sizes placed on a jittered column/row layout.
+
+    :param out_path: path of the generated pptx
+    :param num_of_slides: number of slides
+    :param shapes_per_slide: number of (top level and grouped) shapes per slide
+    :param group_depth: if > 0, every fifth shape is wrapped into this many nested group shapes
+    :param media_size: if > 0, every slide gets a picture of approximately this many bytes
+    :param seed: random seed
+    :return: the out_path
+    """
+    rng = random.Random(seed)
+
+    presentation = Presentation()
+    slide_width = presentation.slide_width
+    slide_height = presentation.slide_height
+
+    sizes = [(int(Cm(w)), int(Cm(h))) for w, h in [(4, 2), (6, 3), (3, 3), (8, 1)]]
+    positions = [(int(slide_width * (c + 0.5) / 6 - Cm(2)), int(slide_height * (r + 0.5) / 5 - Cm(1)))
+                 for c in range(6) for r in range(5)]
+    jitter = int(Cm(0.3))
+
+    blank_layout = presentation.slide_layouts[6]
+
+    for _ in range(num_of_slides):
+        slide = presentation.slides.add_slide(blank_layout)
+
+        for shape_index in range(shapes_per_slide):
+            shapes = slide.shapes
+            if group_depth > 0 and shape_index % 5 == 0:
+                for _ in range(group_depth):
+                    shapes = shapes.add_group_shape().shapes
+            _add_shape(shapes, rng, sizes, positions, jitter)
+
+        if media_size > 0:
+            slide.shapes.add_picture(_noise_image(media_size, rng), Cm(1), Cm(1), Cm(5), Cm(5))
+
+    presentation.save(out_path)
+    return out_path
@@ -0,0 +1,132 @@
+import json
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+from pptx.presentation import Presentation
+
+
+class Change:
+    """
+    A single snap of a shape: displacement (and optional resize) of the shape identified by slide index and shape id
+    """
+
+    def __init__(self, slide_index: int, shape_id: int, dx: int, dy: int, anchor_point: str, grid_type: str,
+                 snap_type: str = "", dw: int = 0, dh: int = 0):
+        self.slide_index = int(slide_index)
+        self.shape_id = int(shape_id)
+        self.dx = int(dx)
+        self.dy = int(dy)
+        self.dw = int(dw)
+        self.dh = int(dh)
+        self.anchor_point = anchor_point
+        self.grid_type = grid_type
+        self.snap_type = snap_type
+
+    def to_dict(self) -> dict:
+        return dict(slide_index=self.slide_index, shape_id=self.shape_id, dx=self.dx, dy=self.dy, dw=self.dw,
+                    dh=self.dh, anchor_point=self.anchor_point, grid_type=self.grid_type, snap_type=self.snap_type)
+
+    def __str__(self) -> str:
+        text = (f"Shape {self.shape_id} on [Slide {self.slide_index}] moved by [{self.dx};{self.dy}] "
+                f"({self.anchor_point} anchor, {self.snap_type} snap on '{self.grid_type}' grid)")
+        if self.dw or self.dh:
+            text += f" resized by [{self.dw} x {self.dh}]"
+        return text
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class ChangeSet:
+    """
+    Compact, serializable list of Changes computed by a dry run of the SnappingManager.
+    Can be stored as JSON or as a NumPy record file (.npy) and applied to a deck without rerunning the snapping search.
+    """
+
+    record_dtype = np.dtype([("slide_index", "<i4"), ("shape_id", "<i4"),
+                             ("dx", "<i8"), ("dy", "<i8"), ("dw", "<i8"), ("dh", "<i8"),
+                             ("anchor_point", "<U16"), ("grid_type", "<U32"), ("snap_type", "<U16")])
+
+    def __init__(self, changes: Optional[Iterable[Change]] = None):
+        self.changes: list[Change] = list(changes) if changes else []
+
+    def append(self, change: Change) -> None:
+        assert isinstance(change, Change)
+        self.changes.append(change)
+
+    def extend(self, changes: Iterable[Change]) -> None:
+        for change in changes:
+            self.append(change)
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def to_records(self) -> np.ndarray:
+        return np.array([(c.slide_index, c.shape_id, c.dx, c.dy, c.dw, c.dh, c.anchor_point, c.grid_type, c.snap_type)
+                         for c in self.changes], dtype=self.record_dtype)
+
+    @staticmethod
+    def from_records(records: np.ndarray) -> 'ChangeSet':
+        return ChangeSet(Change(slide_index=r["slide_index"], shape_id=r["shape_id"], dx=r["dx"], dy=r["dy"],
+                                dw=r["dw"], dh=r["dh"], anchor_point=str(r["anchor_point"]),
+                                grid_type=str(r["grid_type"]), snap_type=str(r["snap_type"])) for r in records)
+
+    def to_json(self) -> str:
+        return json.dumps([c.to_dict() for c in self.changes])
+
+    @staticmethod
+    def from_json(text: str) -> 'ChangeSet':
+        return ChangeSet(Change(**c) for c in json.loads(text))
+
+    def save(self, path: str) -> None:
+        """Save the ChangeSet as NumPy records if the path ends with '.npy', as JSON otherwise."""
+        if os.path.splitext(path)[1].lower() == ".npy":
+            np.save(path, self.to_records(), allow_pickle=False)
+        else:
+            with open(path, "w") as f:
+                f.write(self.to_json())
+
+    @staticmethod
+    def load(path: str) -> 'ChangeSet':
+        if os.path.splitext(path)[1].lower() == ".npy":
+            return ChangeSet.from_records(np.load(path, allow_pickle=False))
+        with open(path) as f:
+            return ChangeSet.from_json(f.read())
+
+    def apply_to(self, presentation: Presentation) -> int:
+        """
+        Patch the shapes of a presentation with the Changes.
+        Shapes are looked up by their id (one pass over each touched slide), changes of missing shapes are skipped.
+        :return: number of applied changes
+        """
+        slides = presentation.slides
+        shapes_by_id = {}
+        applied = 0
+
+        for change in self.changes:
+            if change.slide_index not in shapes_by_id:
+                shapes_by_id[change.slide_index] = {shape.shape_id: shape for shape in slides[change.slide_index].shapes}
+
+            shape = shapes_by_id[change.slide_index].get(change.shape_id)
+            if shape is None:
+                continue
+
+            if change.dx:
+                shape.left = shape.left + change.dx
+            if change.dy:
+                shape.top = shape.top + change.dy
+            if change.dw:
+                shape.width = shape.width + change.dw
+            if change.dh:
+                shape.height = shape.height + change.dh
+            applied += 1
+
+        return applied
+
+    def __str__(self) -> str:
+        return f"ChangeSet with {len(self.changes)} changes"
@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+try:
+    import yaml
+except ImportError:  # YAML configs are optional
+    yaml = None
+
+from .change_set import ChangeSet
+from .deck_grid import DeckGrid
+from .density_grid import DensityGrid
+from .grid import Grid
+from .implicit_grid import ImplicitGrid
+from .instrumentation import Instrumentation
+from .kmeans_grid import KMeansGrid
+from .object_recognizer import ObjectRecognizer
+from .pipeline import SlidePipeline
+from .pptx_reader import PPTXReader
+from .slide import Slide
+from .snapping import AnchorPositions, SnappingSearch, SnappingManager, SnappingLimits, collect_anchor_positions
+from .templates import ObjectTemplates
+from .utils import AnchorPoint
+
+
+class PipelineConfig:
+    """
+    Declarative configuration of a snapping pipeline, e.g. in YAML:
+
+        grids:
+          layout: {type: layout, columns: 12, rows: 6, margins: [457200, 457200, 457200, 457200]}
+          clusters: {type: kmeans, anchor: center}
+        anchors: [top-left, center]
+        strategies:
+          - {type: joint, grid: clusters, essential: true}
+          - {type: joint, grid: layout}
+          - {type: edge, axis: both}
+        limits: {x_relative_limit: 0.1, y_relative_limit: 0.1}
+        recognizers:
+          templates: {type: size, size_threshold: 0.9, min_num_of_re_occurrences: 2}
+
+    Grid types and their scope: 'implicit' and 'layout' only depend on the slide size (static),
+    'deck' is learned from all slides of a deck, 'kmeans' and 'density' are learned per slide.
+    """
+
+    grid_scopes = OrderedDict(implicit="static", layout="static", deck="deck", kmeans="slide", density="slide")
+    grid_strategies = ("x", "y", "joint")
+    strategy_types = grid_strategies + ("edge", "spacing", "template")
+    limit_names = ("x_limit", "y_limit", "x_relative_limit", "y_relative_limit")
+
+    recognizer_factories: dict[str, Callable[..., ObjectRecognizer]] = OrderedDict(
+        size=ObjectRecognizer.get_size_recognizer,
+        relative_size=ObjectRecognizer.get_relative_size_recognizer,
+        dice=ObjectRecognizer.get_dice_recognizer,
+        size_with_dice=ObjectRecognizer.get_size_with_dice_recognizer,
+        exact=ObjectRecognizer.get_exact_recognizer,
+    )
+
+    def __init__(self,
+                 grids: Optional[dict] = None,
+                 anchors: Optional[list[str]] = None,
+                 strategies: Optional[list[dict]] = None,
+                 limits: Optional[dict] = None,
+                 recognizers: Optional[dict] = None):
+        self.grids = OrderedDict((name, dict(grid)) for name, grid in (grids or {}).items())
+        self.anchors = list(anchors) if anchors else []
+        self.strategies = [dict(strategy) for strategy in (strategies or [])]
+        self.limits = dict(limits or {})
+        self.recognizers = OrderedDict((name, dict(r)) for name, r in (recognizers or {}).items())
+        self.validate()
+
+    def validate(self) -> None:
+        for name, grid in self.grids.items():
+            if grid.get("type") not in self.grid_scopes:
+                raise ValueError(f"Grid '{name}' has an unknown type '{grid.get('type')}'")
+
+        for anchor in self.anchors:
+            AnchorPoint(anchor)
+
+        for strategy in self.strategies:
+            strategy_type = strategy.get("type")
+            if strategy_type not in self.strategy_types:
+                raise ValueError(f"Unknown strategy type '{strategy_type}'")
+            if strategy_type in self.grid_strategies and strategy.get("grid") not in self.grids:
+                raise ValueError(f"Strategy '{strategy_type}' refers to an unknown grid '{strategy.get('grid')}'")
+            if strategy_type == "template" and "templates" not in self.recognizers:
+                raise ValueError("The 'template' strategy requires a 'templates' recognizer")
+
+        for name in self.limits:
+            if name not in self.limit_names:
+                raise ValueError(f"Unknown limit '{name}'")
+
+        for name, recognizer in self.recognizers.items():
+            if recognizer.get("type") not in self.recognizer_factories:
+                raise ValueError(f"Recognizer '{name}' has an unknown type '{recognizer.get('type')}'")
+
+    def to_dict(self) -> dict:
+        return OrderedDict(grids=self.grids, anchors=self.anchors, strategies=self.strategies,
+                           limits=self.limits, recognizers=self.recognizers)
+
+    @staticmethod
+    def from_dict(data: dict) -> 'PipelineConfig':
+        return PipelineConfig(grids=data.get("grids"),
+                              anchors=data.get("anchors"),
+                              strategies=data.get("strategies"),
+                              limits=data.get("limits"),
+                              recognizers=data.get("recognizers"))
+
+    @staticmethod
+    def load(path: str) -> 'PipelineConfig':
+        """Load a JSON or (if PyYAML is installed) a YAML configuration file."""
+        with open(path) as f:
+            if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+                if yaml is None:
+                    raise ImportError("PyYAML is required to load YAML pipeline configurations")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return PipelineConfig.from_dict(data or {})
+
+    @property
+    def hash(self) -> str:
+        """Hash of the canonical JSON form, identical configurations compile into the same (cached) plan."""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    def create_recognizer(self, name: str) -> ObjectRecognizer:
+        params = dict(self.recognizers[name])
+        params.pop("min_num_of_re_occurrences", None)
+        return self.recognizer_factories[params.pop("type")](**params)
+
+    def __str__(self) -> str:
+        return (f"PipelineConfig with {len(self.grids)} grids and {len(self.strategies)} strategies "
+                f"({self.hash[:8]})")
+
+
+class ExecutionPlan:
+    """
+    Compiled PipelineConfig.
+
+    Every grid is built once per scope and shared by all strategies using it: static grids (and their
+    SnappingSearch) once per slide size and kept across decks, deck grids and recognized templates once per deck,
+    slide grids and the anchor positions once per slide. The per-slide work is attached to a SlidePipeline as stages.
+    The templates of a deck are only held by its pipeline, so a cached plan does not accumulate them.
+    """
+
+    def __init__(self, config: PipelineConfig):
+        self.config = config
+        self.anchor_points = [AnchorPoint(a) for a in config.anchors]
+        self.limits = SnappingLimits(**config.limits)
+
+        self.grid_names = list(OrderedDict.fromkeys(s["grid"] for s in config.strategies
+                                                    if s["type"] in PipelineConfig.grid_strategies))
+        self._static_searches: dict[tuple, SnappingSearch] = {}
+
+    def scope(self, grid_name: str) -> str:
+        return PipelineConfig.grid_scopes[self.config.grids[grid_name]["type"]]
+
+    def _anchor(self, params: dict) -> AnchorPoint:
+        anchor = params.pop("anchor", None)
+        if anchor is not None:
+            return AnchorPoint(anchor)
+        return self.anchor_points[0] if self.anchor_points else AnchorPoint.CENTER
+
+    def build_grid(self, grid_name: str, slide_width: int, slide_height: int,
+                   slide: Optional[Slide] = None, slides: Optional[list[Slide]] = None) -> Grid:
+        params = dict(self.config.grids[grid_name])
+        grid_type = params.pop("type")
+
+        if grid_type == "implicit":
+            return ImplicitGrid.from_depth(slide_width, slide_height, **params)
+        if grid_type == "layout":
+            if "margins" in params:
+                params["margins"] = tuple(params["margins"])
+            return ImplicitGrid.from_layout(slide_width, slide_height, **params)
+        if grid_type == "deck":
+            anchors = params.pop("anchors", None)
+            n_clusters = params.pop("n_clusters", None)
+            anchor_points = [AnchorPoint(a) for a in anchors] if anchors else (self.anchor_points or None)
+            # an empty deck gives a grid without lines
+            grid = DeckGrid.from_slides(slides, anchor_points=anchor_points, slide_width=slide_width,
+                                        slide_height=slide_height, **params)
+            grid.calculate_deck_grid(n_clusters=n_clusters)
+            return grid.to_grid()
+        if grid_type == "kmeans":
+            anchor_point = self._anchor(params)
+            axis = params.pop("axis", "both")
+            grid = KMeansGrid(slide)
+            if len(slide.snappable_objects) > 0:
+                # as in the StrategyPlanner, 'both' clusters the two axes independently
+                for a in (["x", "y"] if axis == "both" else [axis]):
+                    grid.calculate_kmeans_grid(anchor_point=anchor_point, axis=a, **params)
+            return grid.to_grid()
+
+        anchor_point = self._anchor(params)
+        grid = DensityGrid(slide)
+        grid.calculate_density_grid(anchor_point=anchor_point, **params)
+        return grid.to_grid()
+
+    def _new_search(self, instrumentation: Optional[Instrumentation] = None) -> SnappingSearch:
+        return SnappingSearch(limits=self.limits, instrumentation=instrumentation)
+
+    def static_search(self, grid_name: str, slide_width: int, slide_height: int) -> SnappingSearch:
+        """
+        SnappingSearch of a static grid, built once per slide size and reused across decks.
+        The run using it sets its limits and instrumentation (see pipeline).
+        """
+        key = (grid_name, slide_width, slide_height)
+        search = self._static_searches.get(key)
+        if search is None:
+            search = self._new_search()
+            search.set_joint_grid(self.build_grid(grid_name, slide_width, slide_height))
+            self._static_searches[key] = search
+        return search
+
+    def pipeline(self, reader: PPTXReader, manager: Optional[SnappingManager] = None,
+                 slide_budget: Optional[float] = None, over_budget: str = "degrade",
+                 instrumentation: Optional[Instrumentation] = None) -> SlidePipeline:
+        """Do the deck-level setup (deck grids, templates) and return a SlidePipeline with the per-slide stages."""
+        if manager is None:
+            manager = SnappingManager(reader, instrumentation=instrumentation, **self.config.limits)
+        pipeline = SlidePipeline(reader, manager, slide_budget, over_budget, instrumentation)
+
+        searches = OrderedDict()
+        for grid_name in self.grid_names:
+            if self.scope(grid_name) == "deck":
+                search = self._new_search(pipeline.instrumentation)
+                search.set_joint_grid(self.build_grid(grid_name, reader.slide_width, reader.slide_height,
+                                                      slides=reader.slides))
+                searches[grid_name] = search
+            elif self.scope(grid_name) == "slide":
+                searches[grid_name] = self._new_search(pipeline.instrumentation)
+
+        # the templates of the deck are kept in the registry of this run, not in the global ObjectTemplates
+        templates = None
+        if "templates" in self.config.recognizers:
+            params = self.config.recognizers["templates"]
+            templates = OrderedDict()
+            objects = [o for slide in reader.slides for o in slide.snappable_objects]
+            if objects:  # recognize_templates falls back to all objects of the catalog on an empty list
+                ObjectTemplates.recognize_templates(objects, self.config.create_recognizer("templates"),
+                                                    params.get("min_num_of_re_occurrences", 2),
+                                                    instrumentation=pipeline.instrumentation, registry=templates)
+
+        if self.anchor_points:
+            def set_anchor_points(slide: Slide) -> None:
+                for obj in slide.snappable_objects:
+                    obj.active_anchor_points = self.anchor_points
+            pipeline.add_stage("anchors", set_anchor_points, essential=True)
+
+        # the anchor positions of the current slide, collected once and shared by the anchor based strategies
+        slide_anchors: dict[int, AnchorPositions] = {}
+
+        def collect_anchors(slide: Slide) -> None:
+            slide_anchors.clear()
+            slide_anchors[slide.slide_index] = collect_anchor_positions(slide.snappable_objects)
+
+        def get_anchors(slide: Slide) -> Optional[AnchorPositions]:
+            return slide_anchors.get(slide.slide_index)
+        pipeline.add_stage("anchor_positions", collect_anchors, essential=True)
+
+        for grid_name in self.grid_names:
+            if self.scope(grid_name) != "slide":
+                continue
+            essential = any(s.get("essential", False) for s in self.config.strategies if s.get("grid") == grid_name)
+
+            def build_slide_grid(slide: Slide, grid_name=grid_name) -> None:
+                grid = self.build_grid(grid_name, slide.slide_width, slide.slide_height, slide=slide)
+                searches[grid_name].set_joint_grid(grid)
+
+            def estimate_slide_grid(slide: Slide, grid_name=grid_name) -> float:
+                params = self.config.grids[grid_name]
+                num_of_objects = len(slide.snappable_objects)
+                num_of_axes = 2 if params.get("axis", "both") == "both" else 1
+                return num_of_axes * pipeline.cost_model.grid_cost(params["type"], num_of_objects, num_of_objects,
+                                                                   n_clusters=params.get("n_clusters") or 10)
+            pipeline.add_stage(f"grid:{grid_name}", build_slide_grid, essential, estimate_slide_grid)
+
+        for strategy in self.config.strategies:
+            strategy_type = strategy["type"]
+            essential = strategy.get("essential", False)
+            grid_name = strategy.get("grid")
+
+            if grid_name is None:
+                # every object strategy has its own search, so e.g. two edge strategies keep their own axis
+                object_search = self._new_search(pipeline.instrumentation)
+                if strategy_type == "edge":
+                    object_search.set_edge_snapping(strategy.get("axis", "both"))
+                elif strategy_type == "spacing":
+                    object_search.set_spacing_snapping(axis=strategy.get("axis", "both"))
+                elif strategy_type == "template" and templates is not None:
+                    object_search.set_templates(templates.values())
+                pipeline.add_search(object_search, strategy_type, grid_type="objects", essential=essential,
+                                    anchors=get_anchors)
+            elif grid_name in searches:
+                pipeline.add_search(searches[grid_name], strategy_type, grid_type=grid_name, essential=essential,
+                                    anchors=get_anchors)
+            else:
+                def calculate_candidates(slide: Slide, grid_name=grid_name, strategy_type=strategy_type) -> None:
+                    search = self.static_search(grid_name, slide.slide_width, slide.slide_height)
+                    # the cached search reports to the instrumentation of the run using it, not of the first one
+                    search.set_instrumentation(pipeline.instrumentation)
+                    manager.push_limits(search)
+                    search.calculate_candidates_for_all_obj(slide, strategy_type, grid_type=grid_name,
+                                                            anchors=get_anchors(slide))
+
+                def estimate(slide: Slide, grid_name=grid_name, strategy_type=strategy_type) -> float:
+                    search = self.static_search(grid_name, slide.slide_width, slide.slide_height)
+                    return pipeline.estimate_search(search, strategy_type, slide)
+                pipeline.add_stage(f"{grid_name}:{strategy_type}", calculate_candidates, essential, estimate)
+
+        return pipeline
+
+    def run(self, reader: PPTXReader, apply: bool = True, **kwargs) -> ChangeSet:
+        """Snap a deck with the plan and return the collected ChangeSet (kwargs are passed to pipeline)."""
+        return self.pipeline(reader, **kwargs).run(apply=apply)
+
+    def __str__(self) -> str:
+        return f"ExecutionPlan of {self.config} with {len(self._static_searches)} cached static searches"
+
+
+_plan_cache: OrderedDict[str, ExecutionPlan] = OrderedDict()
+
+
+def load_config(path: str) -> PipelineConfig:
+    return PipelineConfig.load(path)
+
+
+def compile_config(config: Union[PipelineConfig, dict, str], max_cached_plans: int = 16) -> ExecutionPlan:
+    """
+    Compile a PipelineConfig (or its dict form or a file path) into an ExecutionPlan.
+    Plans are cached by the hash of the configuration, so recompiling the same configuration for many decks
+    reuses the already built static grids and searches.
+    """
+    if isinstance(config, str):
+        config = PipelineConfig.load(config)
+    elif isinstance(config, dict):
+        config = PipelineConfig.from_dict(config)
+
+    key = config.hash
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = ExecutionPlan(config)
+        _plan_cache[key] = plan
+        while len(_plan_cache) > max_cached_plans:
+            _plan_cache.popitem(last=False)
+    else:
+        _plan_cache.move_to_end(key)
+    return plan
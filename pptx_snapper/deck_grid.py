@@ -0,0 +1,134 @@
+from typing import Iterable, Optional
+
+from sklearn.cluster import KMeans
+import numpy as np
+
+from pptx.util import Mm
+
+from .grid import Grid
+from .slide import Slide
+from .utils import AnchorPoint
+
+
+class DeckGrid(Grid):
+    """
+    Master grid learned from the anchor points of every slide of a deck.
+
+    Anchor positions are accumulated per axis into fixed-size histograms (count and coordinate sum per bin),
+    so memory is bounded by the number of bins regardless of the number of slides or objects.
+    The grid lines are fitted once, on the weighted bin means, instead of refitting a KMeans for every slide.
+    """
+
+    def __init__(self, slide_width, slide_height, x_depth = -1, y_depth = -1, bin_size: int = Mm(1)):
+        super().__init__(slide_width=slide_width, slide_height=slide_height, x_depth=x_depth, y_depth=y_depth)
+        self.bin_size = max(int(bin_size), 1)
+
+        self.x_counts = np.zeros(self._num_of_bins(slide_width), dtype=np.int64)
+        self.x_sums = np.zeros(self._num_of_bins(slide_width), dtype=np.float64)
+        self.y_counts = np.zeros(self._num_of_bins(slide_height), dtype=np.int64)
+        self.y_sums = np.zeros(self._num_of_bins(slide_height), dtype=np.float64)
+
+    @staticmethod
+    def from_slides(slides: Iterable[Slide], anchor_points: Optional[list[AnchorPoint]] = None,
+                    slide_width: Optional[int] = None, slide_height: Optional[int] = None, **kwargs) -> 'DeckGrid':
+        """
+        Create a DeckGrid and accumulate the anchor points of all given slides in a single pass.
+        The slide size is taken from the first slide unless it is given explicitly (required for an empty deck).
+        """
+        deck_grid = None
+        if slide_width is not None and slide_height is not None:
+            deck_grid = DeckGrid(slide_width, slide_height, **kwargs)
+
+        for slide in slides:
+            if deck_grid is None:
+                deck_grid = DeckGrid(slide.slide_width, slide.slide_height, **kwargs)
+            deck_grid.add_slide(slide, anchor_points)
+
+        if deck_grid is None:
+            raise ValueError("Cannot create a DeckGrid from no slides without an explicit slide size")
+        return deck_grid
+
+    def _num_of_bins(self, axis_length) -> int:
+        return int(axis_length) // self.bin_size + 1
+
+    def _accumulate(self, counts: np.ndarray, sums: np.ndarray, values: np.ndarray, axis_length) -> None:
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        # anchors outside the slide are dropped: clipped, they would pile up in the border bins
+        values = values[(values >= 0) & (values <= axis_length)]
+        if values.size == 0:
+            return
+        bins = (values // self.bin_size).astype(np.int64)
+        counts += np.bincount(bins, minlength=counts.size)
+        sums += np.bincount(bins, weights=values, minlength=sums.size)
+
+    def add_anchor_positions(self, x_positions: Optional[np.ndarray] = None, y_positions: Optional[np.ndarray] = None) -> None:
+        """Accumulate raw anchor coordinates (EMU) on the x and/or y axis."""
+        if x_positions is not None:
+            self._accumulate(self.x_counts, self.x_sums, x_positions, self.slide_width)
+        if y_positions is not None:
+            self._accumulate(self.y_counts, self.y_sums, y_positions, self.slide_height)
+
+    def add_slide(self, slide: Slide, anchor_points: Optional[list[AnchorPoint]] = None) -> None:
+        """Accumulate the anchor points of every SnappableObject on the slide."""
+        assert isinstance(slide, Slide)
+
+        if slide.slide_width != self.slide_width or slide.slide_height != self.slide_height:
+            raise ValueError(f"Cannot add slide: Slide size differs (this: [{self.slide_width} x {self.slide_height}], "
+                             f"other: [{slide.slide_width} x {slide.slide_height}]).")
+
+        if anchor_points is None:
+            anchor_points = [AnchorPoint.CENTER]
+
+        positions = np.array([obj.get_anchor_point(anchor_point)
+                              for obj in slide.snappable_objects
+                              for anchor_point in anchor_points], dtype=np.float64).reshape(-1, 2)
+
+        self.add_anchor_positions(positions[:, 0], positions[:, 1])
+
+    @property
+    def num_of_positions(self) -> tuple[int, ...]:
+        return int(self.x_counts.sum()), int(self.y_counts.sum())
+
+    def _fit_axis(self, counts: np.ndarray, sums: np.ndarray, n_clusters: Optional[int]) -> np.ndarray:
+        occupied = counts > 0
+        if not occupied.any():
+            return np.array([], dtype=int)
+
+        bin_means = (sums[occupied] / counts[occupied]).reshape(-1, 1)
+        weights = counts[occupied].astype(np.float64)
+
+        # If n_clusters is not provided, set it to a reasonable value based on the number of occupied bins
+        if n_clusters is None:
+            n_clusters = min(len(bin_means) // 3, 10)
+        n_clusters = min(n_clusters, len(bin_means))
+        if n_clusters == 0:
+            return np.array([], dtype=int)
+
+        kmeans = KMeans(n_clusters=n_clusters)
+        kmeans.fit(bin_means, sample_weight=weights)
+        return np.sort(kmeans.cluster_centers_.flatten()).astype("int")
+
+    def calculate_deck_grid(self, axis: str = 'both', n_clusters: Optional[int] = None) -> None:
+        """
+        Fit the grid lines on the accumulated anchor positions.
+
+        Args:
+            axis: 'x', 'y', or 'both'. Determines the axis along which grid lines are fitted.
+            n_clusters: Number of grid lines per axis.
+                        If None, the number of lines is optimized based on the number of occupied bins.
+        """
+        if axis in ('x', 'both'):
+            x_centers = self._fit_axis(self.x_counts, self.x_sums, n_clusters)
+            self.x_grid_lines = sorted(set(self.x_grid_lines).union(x_centers))
+
+        if axis in ('y', 'both'):
+            y_centers = self._fit_axis(self.y_counts, self.y_sums, n_clusters)
+            self.y_grid_lines = sorted(set(self.y_grid_lines).union(y_centers))
+
+    def to_grid(self):
+        return self.copy()
+
+    def __str__(self) -> str:
+        x_count, y_count = self.num_of_positions
+        return (f"DeckGrid learned from {x_count} x and {y_count} y anchor positions\n"
+                + super().__str__())
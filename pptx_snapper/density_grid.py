@@ -0,0 +1,135 @@
+from typing import Optional
+
+import numpy as np
+
+from pptx.util import Mm
+
+from .grid import Grid
+from .slide import Slide
+from .utils import AnchorPoint
+
+
+class DensityGrid(Grid):
+    """
+    Grid with lines at the density peaks of the anchor coordinates.
+
+    The anchor coordinates are binned along each axis, the histogram is smoothed with a gaussian kernel (FFT convolution),
+    and a grid line is placed on every local maximum whose prominence exceeds the threshold.
+    Runtime is O(n + bins), independent of how the objects would be clustered.
+    """
+
+    def __init__(self, slide: Slide, x_depth = -1, y_depth = -1):
+        super().__init__(slide_width=slide.slide_width, slide_height=slide.slide_height, x_depth=x_depth, y_depth=y_depth)
+        self.slide = slide
+
+    @staticmethod
+    def smooth(histogram: np.ndarray, bandwidth: float) -> np.ndarray:
+        """Convolve the histogram with a gaussian kernel (sigma given in bins) using FFT."""
+        if bandwidth <= 0:
+            return histogram.astype(np.float64)
+
+        radius = int(np.ceil(3 * bandwidth))
+        kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / bandwidth) ** 2)
+        kernel /= kernel.sum()
+
+        size = histogram.size + kernel.size - 1
+        smoothed = np.fft.irfft(np.fft.rfft(histogram, size) * np.fft.rfft(kernel, size), size)
+        return smoothed[radius:radius + histogram.size]
+
+    @staticmethod
+    def _base_levels(signal: np.ndarray) -> np.ndarray:
+        """
+        For every index the minimum of the signal between it and the nearest strictly higher sample on its left
+        (monotonic stack, O(bins)). Infinite if there is nothing on the left.
+        """
+        base = np.full(signal.size, np.inf)
+        stack = []
+        gap_minimum = []
+        for i, value in enumerate(signal):
+            minimum = np.inf
+            while stack and signal[stack[-1]] <= value:
+                minimum = min(minimum, gap_minimum[-1], signal[stack[-1]])
+                stack.pop()
+                gap_minimum.pop()
+            base[i] = minimum
+            stack.append(i)
+            gap_minimum.append(minimum)
+        return base
+
+    @staticmethod
+    def find_peaks(signal: np.ndarray, min_prominence: float) -> np.ndarray:
+        """
+        Return the indices of the local maxima with a prominence of at least 'min_prominence'.
+        A plateau (run of equal samples) is a single peak at its middle (the left one of two middle samples),
+        and runs touching the ends of the signal are not peaks, as in scipy.signal.find_peaks.
+        """
+        if signal.size < 3:
+            return np.array([], dtype=int)
+
+        run_starts = np.concatenate([[0], np.flatnonzero(np.diff(signal) != 0) + 1])
+        run_ends = np.concatenate([run_starts[1:], [signal.size]]) - 1
+        run_values = signal[run_starts]
+        is_peak = (run_values[1:-1] > run_values[:-2]) & (run_values[1:-1] > run_values[2:])
+        peak_runs = np.flatnonzero(is_peak) + 1
+        peaks = (run_starts[peak_runs] + run_ends[peak_runs]) // 2
+        if peaks.size == 0:
+            return peaks
+
+        left_base = DensityGrid._base_levels(signal)[peaks]
+        right_base = DensityGrid._base_levels(signal[::-1])[::-1][peaks]
+
+        # the higher of the two bases defines the prominence, a missing base (edge) is ignored
+        base = np.where(np.isinf(left_base), right_base,
+                        np.where(np.isinf(right_base), left_base, np.maximum(left_base, right_base)))
+        base = np.where(np.isinf(base), 0, base)
+
+        prominence = signal[peaks] - base
+        return peaks[prominence >= min_prominence]
+
+    def _density_lines(self, values: np.ndarray, axis_length, bin_size: int, bandwidth: float,
+                       min_prominence: float) -> np.ndarray:
+        bin_size = max(int(bin_size), 1)
+        values = np.clip(values, 0, axis_length)
+        histogram = np.bincount((values // bin_size).astype(np.int64), minlength=int(axis_length) // bin_size + 1)
+
+        smoothed = self.smooth(histogram, bandwidth / bin_size)
+        if smoothed.max() <= 0:
+            return np.array([], dtype=int)
+
+        peaks = self.find_peaks(smoothed, min_prominence * smoothed.max())
+        return ((peaks + 0.5) * bin_size).astype("int")
+
+    def calculate_density_grid(self, anchor_point: AnchorPoint = AnchorPoint.CENTER,
+                               axis: str = 'both',
+                               bin_size: int = Mm(1),
+                               bandwidth: Optional[int] = Mm(2),
+                               min_prominence: float = 0.2) -> None:
+        """
+        Place grid lines on the density peaks of the anchor coordinates.
+
+        Args:
+            anchor_point: AnchorPoint
+            axis: 'x', 'y', or 'both'. Determines the axis along which the density is analysed.
+            bin_size: Width of a histogram bin (EMU).
+            bandwidth: Standard deviation of the gaussian smoothing kernel (EMU). None or 0 disables smoothing.
+            min_prominence: Minimal prominence of a peak, relative to the highest density on the axis.
+        """
+        positions = np.array([obj.get_anchor_point(anchor_point) for obj in self.slide.snappable_objects],
+                             dtype=np.float64).reshape(-1, 2)
+
+        # skip if there are no objects...
+        if positions.shape[0] == 0:
+            return
+
+        bandwidth = bandwidth or 0
+
+        if axis in ('x', 'both'):
+            x_lines = self._density_lines(positions[:, 0], self.slide_width, bin_size, bandwidth, min_prominence)
+            self.x_grid_lines = sorted(set(self.x_grid_lines).union(x_lines))
+
+        if axis in ('y', 'both'):
+            y_lines = self._density_lines(positions[:, 1], self.slide_height, bin_size, bandwidth, min_prominence)
+            self.y_grid_lines = sorted(set(self.y_grid_lines).union(y_lines))
+
+    def to_grid(self):
+        return self.copy()
@@ -0,0 +1,93 @@
+from typing import Iterable
+
+import numpy as np
+
+from .snappable_object import SnappableObject
+
+
+class EdgeIndex:
+    """
+    Sorted index of the left, right and center (x axis) and top, bottom and middle (y axis) coordinates
+    of a set of SnappableObjects (typically the objects of one slide).
+    The nearest edge belonging to a different object is found by binary search in O(log n) per query.
+    The objects are ranked (larger bounding box first, then earlier object) to pick the canonical one of a pair
+    of objects whose edges are each other's nearest.
+    """
+
+    # every object has 3 edges per axis, so the nearest edge of another object is among the 4 nearest on each side
+    _scan_width = 4
+
+    def __init__(self, objects: Iterable[SnappableObject]):
+        self.objects = list(objects)
+
+        geometry = np.array([[o.bbox_left, o.bbox_top, o.bbox_right, o.bbox_bottom] for o in self.objects], dtype=np.int64).reshape(-1, 4)
+        left, top, right, bottom = geometry.T
+        center = left + (right - left) // 2
+        middle = top + (bottom - top) // 2
+
+        area = (right - left) * (bottom - top)
+        self.ranks = np.empty(len(self.objects), dtype=np.int64)
+        self.ranks[np.lexsort((np.arange(len(self.objects)), -area))] = np.arange(len(self.objects))
+        self.sizes = np.maximum(np.stack([right - left, bottom - top], axis=1), 1).astype(np.float64)
+
+        owners = np.tile(np.arange(len(self.objects)), 3)
+        self.x_edges, self.x_owners = self._sort(np.concatenate([left, right, center]), owners)
+        self.y_edges, self.y_owners = self._sort(np.concatenate([top, bottom, middle]), owners)
+
+    @staticmethod
+    def _sort(edges: np.ndarray, owners: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(edges, kind="stable")
+        return edges[order], owners[order]
+
+    def owner_index(self, objects: Iterable[SnappableObject]) -> np.ndarray:
+        """Position of the objects in the index (-1 for objects that are not indexed)."""
+        positions = {id(o): i for i, o in enumerate(self.objects)}
+        return np.array([positions.get(id(o), -1) for o in objects], dtype=np.int64)
+
+    @classmethod
+    def _nearest(cls, edges: np.ndarray, edge_owners: np.ndarray, values: np.ndarray,
+                 owners: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        nearest = np.zeros(len(values), dtype=np.int64)
+        distance = np.full(len(values), np.inf)
+        nearest_owners = np.full(len(values), -1, dtype=np.int64)
+        if len(edges) == 0 or len(values) == 0:
+            return nearest, distance, nearest_owners
+
+        insert_index = np.searchsorted(edges, values)
+        for offset in range(-cls._scan_width, cls._scan_width):
+            index = insert_index + offset
+            valid = (index >= 0) & (index < len(edges))
+            index = np.clip(index, 0, len(edges) - 1)
+
+            candidate_distance = np.abs(edges[index] - values).astype(np.float64)
+            better = valid & (edge_owners[index] != owners) & (candidate_distance < distance)
+
+            nearest = np.where(better, edges[index], nearest)
+            distance = np.where(better, candidate_distance, distance)
+            nearest_owners = np.where(better, edge_owners[index], nearest_owners)
+
+        return nearest, distance, nearest_owners
+
+    def nearest_x(self, values: np.ndarray, owners: np.ndarray,
+                  return_owners: bool = False) -> tuple[np.ndarray, ...]:
+        """
+        Nearest x edge of another object for every value.
+        :param values: x coordinates
+        :param owners: index of the object the coordinate belongs to (see owner_index)
+        :param return_owners: return the index of the objects the nearest edges belong to as well (-1 if none)
+        :return: nearest edges and their distances (inf if there is no other object)
+        """
+        result = self._nearest(self.x_edges, self.x_owners, np.asarray(values), np.asarray(owners))
+        return result if return_owners else result[:2]
+
+    def nearest_y(self, values: np.ndarray, owners: np.ndarray,
+                  return_owners: bool = False) -> tuple[np.ndarray, ...]:
+        """Nearest y edge of another object for every value. See nearest_x."""
+        result = self._nearest(self.y_edges, self.y_owners, np.asarray(values), np.asarray(owners))
+        return result if return_owners else result[:2]
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __str__(self) -> str:
+        return f"EdgeIndex of {len(self.objects)} objects"
@@ -0,0 +1,213 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .pptx_reader import PPTXReader
+from .snappable_object import SnappableObject, bounding_box_margins
+from .utils import AnchorPoint
+
+
+class GeometryStore:
+    """
+    Columnar on-disk store of the geometry of shapes across many decks, appended deck by deck.
+
+    Every column is a raw little-endian binary file in the store directory, and 'meta.json' holds the committed
+    number of rows, the deck ids and their versions. Columns are read as read-only NumPy memory-mapped arrays, so
+    analyses and grid learners can run over millions of shapes without parsing the pptx XML again.
+
+    The rows are keyed by deck: appending a deck again replaces its rows (or is skipped if its version, e.g. the
+    modification time of the file, did not change). Replacing writes a new generation of the column files and
+    switches to it on commit, so an interrupted replace leaves the committed store intact.
+    """
+
+    column_dtypes = OrderedDict(deck_index="<i4",
+                                slide_index="<i4",
+                                shape_id="<i4",
+                                shape_type="<u1",
+                                left="<i8",
+                                top="<i8",
+                                width="<i8",
+                                height="<i8",
+                                rotation="<f4")
+
+    shape_types = ["Shape", "Picture", "Table", "Chart", "Text", "Group"]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self.num_of_rows = 0
+        self.deck_ids: list[str] = []
+        self.deck_versions: dict[str, str] = {}
+        self.generation = 0
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.num_of_rows = meta["num_of_rows"]
+            self.deck_ids = meta["deck_ids"]
+            self.deck_versions = meta.get("deck_versions", {})
+            self.generation = meta.get("generation", 0)
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _column_path(self, name: str, generation: Optional[int] = None) -> str:
+        generation = self.generation if generation is None else generation
+        suffix = f".{generation}" if generation > 0 else ""
+        return os.path.join(self.directory, f"{name}{suffix}.bin")
+
+    def _commit(self) -> None:
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(num_of_rows=self.num_of_rows, deck_ids=self.deck_ids, deck_versions=self.deck_versions,
+                           generation=self.generation, columns=dict(self.column_dtypes),
+                           shape_types=self.shape_types), f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _truncate_uncommitted(self) -> None:
+        """Drop rows written after the last commit (e.g. by an interrupted append)."""
+        for name, dtype in self.column_dtypes.items():
+            path = self._column_path(name)
+            committed_size = self.num_of_rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > committed_size:
+                with open(path, "r+b") as f:
+                    f.truncate(committed_size)
+
+    def _drop_deck_rows(self, deck_index: int) -> None:
+        """Copy the committed rows of the other decks to the next generation of the column files (not committed)."""
+        keep = self.column("deck_index") != deck_index
+        for name in self.column_dtypes:
+            with open(self._column_path(name, self.generation + 1), "wb") as f:
+                f.write(np.ascontiguousarray(self.column(name)[keep]).tobytes())
+        self.num_of_rows = int(np.count_nonzero(keep))
+        self.generation += 1
+
+    def _remove_generation(self, generation: int) -> None:
+        for name in self.column_dtypes:
+            path = self._column_path(name, generation)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def deck_index(self, deck_id: str) -> int:
+        """Index of the deck id in the deck_index column (the deck is registered if it is new)."""
+        if deck_id not in self.deck_ids:
+            self.deck_ids.append(deck_id)
+        return self.deck_ids.index(deck_id)
+
+    def append_objects(self, objects: Iterable[SnappableObject], deck_id: str, version: Optional[str] = None) -> int:
+        """
+        Append the geometry of the objects of a deck, replacing the rows of the deck if it was already appended.
+        :param version: version of the deck (e.g. modification time or hash), if it is the stored one,
+                        the deck is not appended again
+        :return: number of appended rows
+        """
+        if version is not None and self.deck_versions.get(deck_id) == version:
+            return 0
+
+        objects = list(objects)
+        replaced = deck_id in self.deck_ids
+        if len(objects) == 0 and not replaced:
+            return 0
+
+        deck_index = self.deck_index(deck_id)
+        type_codes = {shape_type: i for i, shape_type in enumerate(self.shape_types)}
+
+        data = OrderedDict(
+            deck_index=[deck_index] * len(objects),
+            slide_index=[o.slide_index for o in objects],
+            shape_id=[o.shape_id for o in objects],
+            shape_type=[type_codes[o.shape_type] for o in objects],
+            left=[o.left for o in objects],
+            top=[o.top for o in objects],
+            width=[o.width for o in objects],
+            height=[o.height for o in objects],
+            rotation=[o.rotation for o in objects],
+        )
+
+        previous_generation = self.generation
+        if replaced:
+            self._drop_deck_rows(deck_index)
+        else:
+            self._truncate_uncommitted()
+        for name, dtype in self.column_dtypes.items():
+            with open(self._column_path(name), "ab") as f:
+                f.write(np.asarray(data[name], dtype=dtype).tobytes())
+
+        self.num_of_rows += len(objects)
+        if version is not None:
+            self.deck_versions[deck_id] = version
+        else:
+            self.deck_versions.pop(deck_id, None)
+        self._commit()
+        if self.generation != previous_generation:
+            self._remove_generation(previous_generation)
+        return len(objects)
+
+    @staticmethod
+    def file_version(file_path: str) -> Optional[str]:
+        """Version of a deck file from its modification time and size (None if it does not exist)."""
+        if not os.path.exists(file_path):
+            return None
+        stat = os.stat(file_path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def append_reader(self, reader: PPTXReader, deck_id: Optional[str] = None) -> int:
+        """
+        Append all SnappableObjects of an already read deck (deck id defaults to the file path).
+        The deck is versioned by its file, so an unchanged deck is not appended again.
+        """
+        deck_id = deck_id if deck_id is not None else str(reader.file_path)
+        return self.append_objects([o for slide in reader.slides for o in slide.snappable_objects], deck_id,
+                                   self.file_version(str(reader.file_path)))
+
+    def append_deck(self, file_path: str, deck_id: Optional[str] = None) -> int:
+        """Read a pptx file and append the geometry of all of its shapes."""
+        return self.append_reader(PPTXReader(file_path), deck_id)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory-mapped view of a column."""
+        dtype = self.column_dtypes[name]
+        if self.num_of_rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(self.num_of_rows,))
+
+    def columns(self, names: Optional[Iterable[str]] = None) -> OrderedDict:
+        names = self.column_dtypes.keys() if names is None else names
+        return OrderedDict((name, self.column(name)) for name in names)
+
+    def anchor_positions(self, anchor_point: AnchorPoint = AnchorPoint.CENTER,
+                         mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized anchor coordinates (of the visual bounding boxes) of the stored shapes
+        (e.g. to feed DeckGrid.add_anchor_positions).
+        :param mask: optional boolean row selection
+        """
+        left, top, width, height, rotation = (self.column(name)
+                                              for name in ["left", "top", "width", "height", "rotation"])
+        if mask is not None:
+            left, top, width, height, rotation = left[mask], top[mask], width[mask], height[mask], rotation[mask]
+
+        if anchor_point == AnchorPoint.CENTER:
+            return left + width // 2, top + height // 2
+
+        x_margin, y_margin = bounding_box_margins(width, height, rotation)
+        if anchor_point in (AnchorPoint.TOP_RIGHT, AnchorPoint.BOTTOM_RIGHT):
+            x = left + width + x_margin
+        else:
+            x = left - x_margin
+        if anchor_point in (AnchorPoint.BOTTOM_LEFT, AnchorPoint.BOTTOM_RIGHT):
+            y = top + height + y_margin
+        else:
+            y = top - y_margin
+        return x, y
+
+    def __len__(self) -> int:
+        return self.num_of_rows
+
+    def __str__(self) -> str:
+        return f"GeometryStore at '{self.directory}' with {self.num_of_rows} shapes from {len(self.deck_ids)} decks"
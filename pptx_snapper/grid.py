@@ -1,7 +1,20 @@
 
 import numpy as np
 
+from .kernels import nearest_lines
+
+
+def nearest_grid_lines(grid_lines, values) -> np.ndarray:
+    """
+    Find the nearest grid line for every value with a range query on the sorted grid lines (O(log n) per value).
+    On a tie the lower grid line wins. The grid lines must not be empty.
+    """
+    return nearest_lines(grid_lines, values)
+
+
 class Grid:
+    is_implicit = False
+
     def __init__(self, slide_width, slide_height, x_depth=0, y_depth=0):
         self.slide_width = slide_width
         self.slide_height = slide_height
@@ -43,6 +56,20 @@ class Grid:
         idx = (np.abs(array - value)).argmin()
         return array[idx]
 
+    def has_x_lines(self) -> bool:
+        return len(self.x_grid_lines) > 0
+
+    def has_y_lines(self) -> bool:
+        return len(self.y_grid_lines) > 0
+
+    def nearest_x(self, values) -> np.ndarray:
+        """Vectorized nearest X grid line of the given x coordinates."""
+        return nearest_grid_lines(self.x_grid_lines, values)
+
+    def nearest_y(self, values) -> np.ndarray:
+        """Vectorized nearest Y grid line of the given y coordinates."""
+        return nearest_grid_lines(self.y_grid_lines, values)
+
     def add_custom_x_grid_line(self, custom_x) -> None:
         """Add a custom X grid line and keep the list sorted."""
         self.x_grid_lines = sorted(set(self.x_grid_lines).union({custom_x}))
@@ -52,8 +79,16 @@ class Grid:
         self.y_grid_lines = sorted(set(self.y_grid_lines).union({custom_y}))
 
     def extend(self, other_grid):
-        """Extend the current grid with another grid's lines."""
+        """
+        Extend the current grid with another grid's lines.
+        The lattices of an ImplicitGrid can only be kept by an ImplicitGrid: use Grid.merge_grids to extend
+        an explicit grid with one.
+        """
         assert isinstance(other_grid,Grid)
+
+        if other_grid.is_implicit and not self.is_implicit:
+            raise ValueError("Cannot extend an explicit grid with an implicit one, its lattices would be lost: "
+                             "use Grid.merge_grids instead.")
         
         if self.slide_width != other_grid.slide_width:
             raise ValueError(f"Cannot add grids: Slide widths differ (this: {self.slide_width}, other: {other_grid.slide_width}).")
@@ -88,6 +123,10 @@ class Grid:
     def merge_grids(grid_1, grid_2):
         assert isinstance(grid_1,Grid)
         assert isinstance(grid_2,Grid)
+
+        # implicit lines can only be kept by an implicit grid, the union is symmetric anyway
+        if grid_2.is_implicit and not grid_1.is_implicit:
+            grid_1, grid_2 = grid_2, grid_1
         
         merged_grid = grid_1.copy()
         merged_grid.extend(grid_2)
@@ -0,0 +1,207 @@
+from typing import Optional, Iterable
+
+import numpy as np
+
+from .grid import Grid, nearest_grid_lines
+
+
+class ImplicitAxis:
+    """
+    Grid lines of one axis defined arithmetically as one or more uniform lattices: origin + k * step for k in [0, count].
+    The nearest line is computed by rounding in O(1) per value, the lines are never materialized.
+    """
+
+    def __init__(self, lattices: Iterable[tuple[float, float, int]]):
+        self.lattices = np.array([(origin, step, count) for origin, step, count in lattices],
+                                 dtype=np.float64).reshape(-1, 3)
+        if np.any(self.lattices[:, 1] <= 0) or np.any(self.lattices[:, 2] < 0):
+            raise ValueError("Lattice steps must be positive and counts non-negative.")
+
+    @staticmethod
+    def from_depth(axis_length: int, depth: int) -> Optional['ImplicitAxis']:
+        """Uniform subdivision of the axis into 2^depth segments (no grid at all if depth is -1)."""
+        if depth == -1:
+            return None
+        count = 2 ** depth
+        return ImplicitAxis([(0, axis_length / count, count)])
+
+    @staticmethod
+    def from_columns(axis_length: int, count: int, margin: int = 0, end_margin: Optional[int] = None,
+                     gutter: int = 0) -> 'ImplicitAxis':
+        """
+        Lines on the start and end of 'count' equal columns (or rows) between the margins, separated by gutters.
+        """
+        end_margin = margin if end_margin is None else end_margin
+        column_length = (axis_length - margin - end_margin - (count - 1) * gutter) / count
+        if column_length <= 0:
+            raise ValueError(f"Cannot fit {count} columns with gutter {gutter} into {axis_length} "
+                             f"with margins {margin} and {end_margin}.")
+
+        if gutter == 0:
+            return ImplicitAxis([(margin, column_length, count)])
+
+        step = column_length + gutter
+        return ImplicitAxis([(margin, step, count - 1),
+                             (margin + column_length, step, count - 1)])
+
+    def merge(self, other: 'ImplicitAxis') -> 'ImplicitAxis':
+        return ImplicitAxis(np.concatenate([self.lattices, other.lattices]).tolist())
+
+    @property
+    def num_of_lines(self) -> int:
+        return int((self.lattices[:, 2] + 1).sum())
+
+    def nearest(self, values) -> np.ndarray:
+        """Vectorized nearest line of the given coordinates. On a tie the lower line wins."""
+        values = np.asarray(values, dtype=np.float64)
+        nearest = np.zeros(values.shape, dtype=np.int64)
+        distance = np.full(values.shape, np.inf)
+
+        for origin, step, count in self.lattices:
+            k = np.clip(np.ceil((values - origin) / step - 0.5), 0, count)
+            lines = np.rint(origin + k * step).astype(np.int64)
+            line_distance = np.abs(lines - values)
+            better = (line_distance < distance) | ((line_distance == distance) & (lines < nearest))
+            nearest = np.where(better, lines, nearest)
+            distance = np.where(better, line_distance, distance)
+
+        return nearest
+
+    def lines(self) -> list[int]:
+        """Materialize the lines (for inspection only, the size grows with the resolution)."""
+        lines = set()
+        for origin, step, count in self.lattices:
+            lines.update(np.rint(origin + np.arange(int(count) + 1) * step).astype(np.int64).tolist())
+        return sorted(lines)
+
+    def __str__(self) -> str:
+        return f"ImplicitAxis with {self.num_of_lines} lines in {len(self.lattices)} lattices"
+
+
+class ImplicitGrid(Grid):
+    """
+    Grid whose uniform lines are defined arithmetically (see ImplicitAxis), snapping in O(1) per anchor and
+    handling arbitrarily fine subdivisions without memory growth.
+    The x_grid_lines / y_grid_lines lists only hold explicit (e.g. data-derived) lines merged into the grid.
+    """
+
+    is_implicit = True
+
+    def __init__(self, slide_width, slide_height, x_axis: Optional[ImplicitAxis] = None,
+                 y_axis: Optional[ImplicitAxis] = None, x_depth=-1, y_depth=-1):
+        super().__init__(slide_width=slide_width, slide_height=slide_height, x_depth=-1, y_depth=-1)
+        self.x_grid_lines = []
+        self.y_grid_lines = []
+        self.x_depth = x_depth
+        self.y_depth = y_depth
+        self.x_axis = x_axis
+        self.y_axis = y_axis
+
+    @staticmethod
+    def from_depth(slide_width, slide_height, x_depth=0, y_depth=0) -> 'ImplicitGrid':
+        """Implicit version of Grid(slide_width, slide_height, x_depth, y_depth), without the integer halving drift."""
+        return ImplicitGrid(slide_width, slide_height,
+                            x_axis=ImplicitAxis.from_depth(slide_width, x_depth),
+                            y_axis=ImplicitAxis.from_depth(slide_height, y_depth),
+                            x_depth=x_depth, y_depth=y_depth)
+
+    @staticmethod
+    def from_layout(slide_width, slide_height, columns: int = 1, rows: int = 1,
+                    margins: tuple[int, ...] = (0, 0, 0, 0),
+                    column_gutter: int = 0, row_gutter: int = 0,
+                    include_borders: bool = True) -> 'ImplicitGrid':
+        """
+        Column / row layout grid.
+        :param margins: (left, top, right, bottom) margins
+        :param include_borders: add the slide borders as explicit lines
+        """
+        left, top, right, bottom = margins
+        grid = ImplicitGrid(slide_width, slide_height,
+                            x_axis=ImplicitAxis.from_columns(slide_width, columns, left, right, column_gutter),
+                            y_axis=ImplicitAxis.from_columns(slide_height, rows, top, bottom, row_gutter))
+        if include_borders:
+            grid.x_grid_lines = [0, slide_width]
+            grid.y_grid_lines = [0, slide_height]
+        return grid
+
+    def has_x_lines(self) -> bool:
+        return self.x_axis is not None or len(self.x_grid_lines) > 0
+
+    def has_y_lines(self) -> bool:
+        return self.y_axis is not None or len(self.y_grid_lines) > 0
+
+    @staticmethod
+    def _nearest(axis: Optional[ImplicitAxis], explicit_lines, values) -> np.ndarray:
+        if axis is None:
+            return nearest_grid_lines(explicit_lines, values)
+
+        nearest = axis.nearest(values)
+        if len(explicit_lines) == 0:
+            return nearest
+
+        values = np.asarray(values)
+        explicit = nearest_grid_lines(explicit_lines, values)
+        explicit_distance = np.abs(explicit - values)
+        implicit_distance = np.abs(nearest - values)
+        use_explicit = (explicit_distance < implicit_distance) | \
+                       ((explicit_distance == implicit_distance) & (explicit < nearest))
+        return np.where(use_explicit, explicit, nearest)
+
+    def nearest_x(self, values) -> np.ndarray:
+        return self._nearest(self.x_axis, self.x_grid_lines, values)
+
+    def nearest_y(self, values) -> np.ndarray:
+        return self._nearest(self.y_axis, self.y_grid_lines, values)
+
+    def snap_to_grid(self, x, y) -> tuple[int,...]:
+        """Snap the given x, y coordinates to the nearest grid points."""
+        return int(self.nearest_x([x])[0]), int(self.nearest_y([y])[0])
+
+    def all_x_grid_lines(self) -> list[int]:
+        """Materialized implicit and explicit X grid lines."""
+        implicit_lines = self.x_axis.lines() if self.x_axis is not None else []
+        return sorted(set(implicit_lines).union(self.x_grid_lines))
+
+    def all_y_grid_lines(self) -> list[int]:
+        """Materialized implicit and explicit Y grid lines."""
+        implicit_lines = self.y_axis.lines() if self.y_axis is not None else []
+        return sorted(set(implicit_lines).union(self.y_grid_lines))
+
+    @staticmethod
+    def _merge_axes(axis: Optional[ImplicitAxis], other_axis: Optional[ImplicitAxis]) -> Optional[ImplicitAxis]:
+        if axis is None:
+            return other_axis
+        if other_axis is None:
+            return axis
+        return axis.merge(other_axis)
+
+    def extend(self, other_grid):
+        """Extend the current grid with another grid's lines (explicit lines are merged, lattices are combined)."""
+        super().extend(other_grid)
+        if isinstance(other_grid, ImplicitGrid):
+            self.x_axis = self._merge_axes(self.x_axis, other_grid.x_axis)
+            self.y_axis = self._merge_axes(self.y_axis, other_grid.y_axis)
+
+    def get_x_grid(self):
+        x_grid = self.copy()
+        x_grid.y_axis = None
+        x_grid.y_grid_lines = []
+        return x_grid
+
+    def get_y_grid(self):
+        y_grid = self.copy()
+        y_grid.x_axis = None
+        y_grid.x_grid_lines = []
+        return y_grid
+
+    def copy(self):
+        new_grid = ImplicitGrid(self.slide_width, self.slide_height, self.x_axis, self.y_axis,
+                                self.x_depth, self.y_depth)
+        new_grid.x_grid_lines = [gl for gl in self.x_grid_lines]
+        new_grid.y_grid_lines = [gl for gl in self.y_grid_lines]
+        return new_grid
+
+    def __str__(self) -> str:
+        return (f"ImplicitGrid with x depth {self.x_depth}, y depth {self.y_depth}:\n"
+                f"X axis: {self.x_axis}, explicit X grid lines: {self.x_grid_lines}\n"
+                f"Y axis: {self.y_axis}, explicit Y grid lines: {self.y_grid_lines}")
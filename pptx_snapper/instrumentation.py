@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Optional, Iterable
+
+
+class MetricsSink:
+    """
+    Base class of the destinations of instrumentation events.
+    An event is a dict with 'kind' ('counter' or 'timer'), 'name', 'value', 'labels' and 'timestamp' keys.
+    """
+
+    def emit(self, event: dict) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class LoggingSink(MetricsSink):
+    """Sink writing every event to a logger."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger if logger is not None else logging.getLogger("pptx_snapper.metrics")
+        self.level = level
+
+    def emit(self, event: dict) -> None:
+        labels = " ".join(f"{k}={v}" for k, v in event["labels"].items())
+        self.logger.log(self.level, "%s %s=%s %s", event["kind"], event["name"], event["value"], labels)
+
+
+class JSONLinesSink(MetricsSink):
+    """Sink appending every event as a JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def emit(self, event: dict) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(event) + "\n")
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Sink aggregating the events and writing them in the Prometheus text exposition format
+    (e.g. for the node exporter textfile collector) on flush.
+    Counters are summed, timers are exported as '<name>_seconds_sum' and '<name>_seconds_count'.
+    """
+
+    def __init__(self, path: str, prefix: str = "pptx_snapper", exclude_labels: Iterable[str] = ("slide",)):
+        self.path = path
+        self.prefix = prefix
+        self.exclude_labels = set(exclude_labels)
+        self.counters = OrderedDict()
+        self.timers = OrderedDict()
+
+    def emit(self, event: dict) -> None:
+        labels = tuple((k, str(v)) for k, v in sorted(event["labels"].items()) if k not in self.exclude_labels)
+        key = (event["name"], labels)
+        if event["kind"] == "counter":
+            self.counters[key] = self.counters.get(key, 0) + event["value"]
+        else:
+            total, count = self.timers.get(key, (0.0, 0))
+            self.timers[key] = (total + event["value"], count + 1)
+
+    @staticmethod
+    def _format_labels(labels: tuple) -> str:
+        if len(labels) == 0:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            for (_name, labels), value in self.counters.items():
+                if _name == name:
+                    lines.append(f"{self.prefix}_{name}_total{self._format_labels(labels)} {value}")
+        for name in sorted({name for name, _ in self.timers}):
+            lines.append(f"# TYPE {self.prefix}_{name}_seconds summary")
+            for (_name, labels), (total, count) in self.timers.items():
+                if _name == name:
+                    lines.append(f"{self.prefix}_{name}_seconds_sum{self._format_labels(labels)} {total}")
+                    lines.append(f"{self.prefix}_{name}_seconds_count{self._format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+
+class _Timer:
+    def __init__(self, instrumentation: 'Instrumentation', name: str, labels: dict):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.instrumentation._emit("timer", self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+_NULL_TIMER = nullcontext()
+
+
+class Instrumentation:
+    """
+    Collects per-stage / per-slide timings and counters and forwards them to pluggable sinks.
+    When disabled (no sinks), every call returns immediately.
+    """
+
+    def __init__(self, sinks: Optional[Iterable[MetricsSink]] = None):
+        self.sinks = list(sinks) if sinks else []
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.sinks) > 0
+
+    def add_sink(self, sink: MetricsSink) -> None:
+        assert isinstance(sink, MetricsSink)
+        self.sinks.append(sink)
+
+    def _emit(self, kind: str, name: str, value, labels: dict) -> None:
+        event = dict(kind=kind, name=name, value=value, labels=labels, timestamp=time.time())
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def count(self, name: str, value: int = 1, **labels) -> None:
+        """Increase the counter 'name' by value."""
+        if not self.sinks:
+            return
+        self._emit("counter", name, value, labels)
+
+    def timer(self, name: str, **labels):
+        """Context manager measuring the wall time of a stage."""
+        if not self.sinks:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+_default_instrumentation = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    """Return the process-wide default Instrumentation (disabled unless sinks were added)."""
+    return _default_instrumentation
+
+
+def set_instrumentation(instrumentation: Instrumentation) -> None:
+    """Replace the process-wide default Instrumentation."""
+    global _default_instrumentation
+    assert isinstance(instrumentation, Instrumentation)
+    _default_instrumentation = instrumentation
@@ -0,0 +1,143 @@
+"""
+Numeric kernels of the hot loops (nearest grid line search, pairwise overlap of bounding boxes).
+
+Every kernel has a NumPy reference implementation and, if numba is installed, a fused, allocation-free
+JIT-compiled version. The public functions dispatch to the numba version when it is available
+(or to the backend given explicitly), so both can be compared by differential tests.
+"""
+from typing import Optional
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional
+    numba = None
+
+HAS_NUMBA = numba is not None
+BACKENDS = ("numba", "numpy") if HAS_NUMBA else ("numpy",)
+
+
+def _resolve_backend(backend: Optional[str]) -> str:
+    if backend is None:
+        return BACKENDS[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend '{backend}' is not available (available: {BACKENDS})")
+    return backend
+
+
+def _nearest_lines_numpy(lines: np.ndarray, values: np.ndarray) -> np.ndarray:
+    right_index = np.clip(np.searchsorted(lines, values), 1, len(lines) - 1) if len(lines) > 1 \
+        else np.zeros(values.shape, dtype=int)
+    left_index = np.maximum(right_index - 1, 0)
+
+    left = lines[left_index]
+    right = lines[right_index]
+    return np.where(np.abs(values - left) <= np.abs(right - values), left, right)
+
+
+def _intersection_areas_numpy(boxes: np.ndarray, other_boxes: np.ndarray) -> np.ndarray:
+    overlap_width = np.minimum(boxes[:, None, 2], other_boxes[None, :, 2]) - \
+        np.maximum(boxes[:, None, 0], other_boxes[None, :, 0])
+    overlap_height = np.minimum(boxes[:, None, 3], other_boxes[None, :, 3]) - \
+        np.maximum(boxes[:, None, 1], other_boxes[None, :, 1])
+    return np.maximum(overlap_width, 0) * np.maximum(overlap_height, 0)
+
+
+def _dice_coefficients_numpy(boxes: np.ndarray, other_boxes: np.ndarray) -> np.ndarray:
+    intersection = _intersection_areas_numpy(boxes, other_boxes)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    other_areas = (other_boxes[:, 2] - other_boxes[:, 0]) * (other_boxes[:, 3] - other_boxes[:, 1])
+    area_sums = areas[:, None] + other_areas[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(area_sums == 0, 0.0, (2 * intersection) / area_sums)
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True, nogil=True)
+    def _nearest_lines_numba(lines, values):
+        result = np.empty(values.shape[0], dtype=lines.dtype)
+        n = lines.shape[0]
+        for i in range(values.shape[0]):
+            value = values[i]
+            if n == 1:
+                result[i] = lines[0]
+                continue
+            right = min(max(np.searchsorted(lines, value), 1), n - 1)
+            left = right - 1
+            if abs(value - lines[left]) <= abs(lines[right] - value):
+                result[i] = lines[left]
+            else:
+                result[i] = lines[right]
+        return result
+
+    @numba.njit(cache=True, nogil=True)
+    def _intersection_areas_numba(boxes, other_boxes):
+        result = np.empty((boxes.shape[0], other_boxes.shape[0]), dtype=np.int64)
+        for i in range(boxes.shape[0]):
+            for j in range(other_boxes.shape[0]):
+                overlap_width = min(boxes[i, 2], other_boxes[j, 2]) - max(boxes[i, 0], other_boxes[j, 0])
+                overlap_height = min(boxes[i, 3], other_boxes[j, 3]) - max(boxes[i, 1], other_boxes[j, 1])
+                result[i, j] = max(overlap_width, 0) * max(overlap_height, 0)
+        return result
+
+    @numba.njit(cache=True, nogil=True)
+    def _dice_coefficients_numba(boxes, other_boxes):
+        result = np.empty((boxes.shape[0], other_boxes.shape[0]), dtype=np.float64)
+        for i in range(boxes.shape[0]):
+            area = (boxes[i, 2] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 1])
+            for j in range(other_boxes.shape[0]):
+                other_area = (other_boxes[j, 2] - other_boxes[j, 0]) * (other_boxes[j, 3] - other_boxes[j, 1])
+                overlap_width = min(boxes[i, 2], other_boxes[j, 2]) - max(boxes[i, 0], other_boxes[j, 0])
+                overlap_height = min(boxes[i, 3], other_boxes[j, 3]) - max(boxes[i, 1], other_boxes[j, 1])
+                intersection = max(overlap_width, 0) * max(overlap_height, 0)
+                area_sum = area + other_area
+                result[i, j] = 0.0 if area_sum == 0 else (2 * intersection) / area_sum
+        return result
+
+
+def nearest_lines(lines, values, backend: Optional[str] = None) -> np.ndarray:
+    """
+    Nearest line of the sorted, non-empty lines for every value (on a tie the lower line wins).
+    The result has the shape of the values and the dtype of the lines.
+    """
+    lines = np.asarray(lines)
+    values = np.asarray(values)
+    if _resolve_backend(backend) == "numpy" or values.ndim == 0:
+        return _nearest_lines_numpy(lines, values)
+
+    dtype = lines.dtype
+    if np.issubdtype(lines.dtype, np.integer) and np.issubdtype(values.dtype, np.integer):
+        lines, flat_values = lines.astype(np.int64, copy=False), values.astype(np.int64, copy=False).reshape(-1)
+    else:
+        lines, flat_values = lines.astype(np.float64, copy=False), values.astype(np.float64, copy=False).reshape(-1)
+    nearest = _nearest_lines_numba(np.ascontiguousarray(lines), np.ascontiguousarray(flat_values))
+    # the kernel works in int64 or float64, the result has the dtype of the lines as with numpy
+    return nearest.astype(dtype, copy=False).reshape(values.shape)
+
+
+def _as_boxes(boxes) -> np.ndarray:
+    return np.ascontiguousarray(np.asarray(boxes, dtype=np.int64).reshape(-1, 4))
+
+
+def intersection_areas(boxes, other_boxes, backend: Optional[str] = None) -> np.ndarray:
+    """
+    Pairwise intersection areas of (n x 4) and (m x 4) [left, top, right, bottom] boxes.
+    :return: (n x m) int64 array
+    """
+    boxes, other_boxes = _as_boxes(boxes), _as_boxes(other_boxes)
+    if _resolve_backend(backend) == "numpy":
+        return _intersection_areas_numpy(boxes, other_boxes)
+    return _intersection_areas_numba(boxes, other_boxes)
+
+
+def dice_coefficients(boxes, other_boxes, backend: Optional[str] = None) -> np.ndarray:
+    """
+    Pairwise Dice coefficients (2 * intersection / sum of areas, 0 for two empty boxes) of (n x 4) and (m x 4)
+    [left, top, right, bottom] boxes, equal to SnappableObject.dice_coefficient.
+    :return: (n x m) float64 array
+    """
+    boxes, other_boxes = _as_boxes(boxes), _as_boxes(other_boxes)
+    if _resolve_backend(backend) == "numpy":
+        return _dice_coefficients_numpy(boxes, other_boxes)
+    return _dice_coefficients_numba(boxes, other_boxes)
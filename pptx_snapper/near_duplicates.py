@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+
+from pptx.util import Cm
+
+from .snappable_object import SnappableObject
+from .object_recognizer import ObjectRecognizer
+from .templates import ObjectTemplate, ObjectTemplates
+
+
+class NearDuplicateFinder:
+    """
+    Locality-sensitive hashing of SnappableObjects to find groups of near-duplicate shapes (almost the same size)
+    across a corpus in near-linear time.
+
+    Every object is hashed into several tables: log width, log height and log aspect ratio (optionally the position)
+    are quantized at multiple resolutions, each with randomly shifted bin borders. Objects sharing a bucket are
+    candidates; the group of each one is verified against the representative (first member) of the group of the first
+    member of the bucket with the exact ObjectRecognizer, and verified groups are merged with union-find.
+    So every member of a group is similar to its representative: A ~ B and B ~ C do not chain a dissimilar A and C.
+    """
+
+    def __init__(self,
+                 object_recognizer: Optional[ObjectRecognizer] = None,
+                 resolutions: Iterable[float] = (0.05, 0.1, 0.2),
+                 num_of_shifts: int = 2,
+                 use_position: bool = False,
+                 position_scale: int = Cm(10),
+                 seed: Optional[int] = 0):
+        """
+        :param object_recognizer: ObjectRecognizer verifying the candidates.
+                                  If None, a relative size recognizer (5% tolerance) is used.
+        :param resolutions: bin widths of the log-size features (0.1 ~ 10% size difference)
+        :param num_of_shifts: number of randomly shifted tables per resolution
+        :param use_position: add the left / top position to the hashed features
+        :param position_scale: position (EMU) corresponding to 1.0 in feature space (bin width = resolution * scale)
+        :param seed: random seed of the bin shifts
+        """
+        self.object_recognizer = object_recognizer if object_recognizer is not None \
+            else ObjectRecognizer.get_relative_size_recognizer(0.05)
+        self.resolutions = list(resolutions)
+        self.num_of_shifts = max(num_of_shifts, 1)
+        self.use_position = use_position
+        self.position_scale = position_scale
+        self.rng = np.random.default_rng(seed)
+
+    def features(self, objs: list[SnappableObject]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: (n x d) feature matrix and the integer code of the shape type of every object
+        """
+        geometry = np.array([[o.width, o.height, o.left, o.top] for o in objs], dtype=np.float64).reshape(-1, 4)
+        log_width = np.log(np.maximum(geometry[:, 0], 1))
+        log_height = np.log(np.maximum(geometry[:, 1], 1))
+        columns = [log_width, log_height, log_width - log_height]
+
+        if self.use_position:
+            columns.extend([geometry[:, 2] / self.position_scale, geometry[:, 3] / self.position_scale])
+
+        _, type_codes = np.unique(np.array([o.shape_type for o in objs], dtype=str), return_inverse=True)
+        return np.stack(columns, axis=1), type_codes.astype(np.int64)
+
+    def _buckets(self, features: np.ndarray, type_codes: np.ndarray, resolution: float) -> np.ndarray:
+        """Bucket id of every object in one randomly shifted table."""
+        shift = self.rng.uniform(0, resolution, size=features.shape[1])
+        keys = np.floor((features + shift) / resolution).astype(np.int64)
+        keys = np.concatenate([type_codes.reshape(-1, 1), keys], axis=1)
+        _, bucket_ids = np.unique(keys, axis=0, return_inverse=True)
+        return bucket_ids.reshape(-1)
+
+    @staticmethod
+    def _find(parents: np.ndarray, i: int) -> int:
+        root = i
+        while parents[root] != root:
+            root = parents[root]
+        while parents[i] != root:
+            parents[i], i = root, parents[i]
+        return root
+
+    def find_groups(self, objs: Iterable[SnappableObject], min_group_size: int = 2) -> list[list[SnappableObject]]:
+        """
+        Find the groups of near-duplicate objects.
+        :param objs: SnappableObjects, e.g. the objects of many decks
+        :param min_group_size: minimal number of objects in a returned group
+        :return: groups of verified near-duplicates, each similar to its first member
+        """
+        objs = list(objs)
+        if len(objs) < 2:
+            return []
+
+        features, type_codes = self.features(objs)
+        parents = np.arange(len(objs))
+        members = [[i] for i in range(len(objs))]  # members of every root, the first one is the representative
+
+        for resolution in self.resolutions:
+            for _ in range(self.num_of_shifts):
+                bucket_ids = self._buckets(features, type_codes, resolution)
+
+                order = np.argsort(bucket_ids, kind="stable")
+                sorted_ids = bucket_ids[order]
+                is_leader = np.concatenate([[True], sorted_ids[1:] != sorted_ids[:-1]])
+                leaders = order[np.maximum.accumulate(np.where(is_leader, np.arange(len(order)), 0))]
+
+                for leader, member in zip(leaders[~is_leader].tolist(), order[~is_leader].tolist()):
+                    leader_root = self._find(parents, leader)
+                    member_root = self._find(parents, member)
+                    if leader_root == member_root:
+                        continue
+                    representative = objs[members[leader_root][0]]
+                    incoming = [objs[i] for i in members[member_root]]
+                    if len(self.object_recognizer.search_similar_objects(representative, incoming)) == len(incoming):
+                        parents[member_root] = leader_root
+                        members[leader_root].extend(members[member_root])
+                        members[member_root] = []
+
+        return [[objs[i] for i in group] for group in members if len(group) >= min_group_size]
+
+    @staticmethod
+    def register_templates(groups: Iterable[list[SnappableObject]],
+                           registry: Optional[OrderedDict] = None) -> list[ObjectTemplate]:
+        """Register an ObjectTemplate (with geometry) for every group (in ObjectTemplates.templates if registry is None)."""
+        templates = []
+        for group in groups:
+            template = ObjectTemplates.add_new_template(group[0].shape_type, registry)
+            for instance in group:
+                template.add_instance(instance)
+            template.create_mean_object()
+            templates.append(template)
+        return templates
@@ -1,8 +1,11 @@
 from collections.abc import Iterable
-from typing import Callable, List
+from typing import Callable, List, Optional
 import inspect
 
+import numpy as np
+
 from .snappable_object import SnappableObject
+from .kernels import dice_coefficients
 
 
 class ObjectRecognizer:
@@ -12,11 +15,15 @@ class ObjectRecognizer:
 
     def __init__(self):
         self.match_validate_functions: List[Callable[[SnappableObject,SnappableObject], bool]] = []
+        # optional vectorized versions (reference vs. list of targets -> boolean array) of the validators
+        self.batch_validate_functions: dict[Callable, Callable[[SnappableObject, list[SnappableObject]], np.ndarray]] = {}
 
-    def add_validator(self, validator: Callable[[SnappableObject, SnappableObject], bool]):
+    def add_validator(self, validator: Callable[[SnappableObject, SnappableObject], bool],
+                      batch_validator: Optional[Callable[[SnappableObject, list[SnappableObject]], np.ndarray]] = None):
         """
         Add a validation function to the list if it matches the required signature.
         Raises a TypeError if the validator does not match the expected signature.
+        The optional batch_validator validates a reference against many targets at once in search_similar_objects.
         """
         if not callable(validator):
             raise TypeError("Validator must be callable")
@@ -35,6 +42,8 @@ class ObjectRecognizer:
 
         # Add the validator to the list if it passes all checks
         self.match_validate_functions.append(validator)
+        if batch_validator is not None:
+            self.batch_validate_functions[validator] = batch_validator
 
     def validate(self, ref_obj: SnappableObject, target_obj: SnappableObject) -> List[bool]:
         """
@@ -44,7 +53,26 @@ class ObjectRecognizer:
 
 
     def search_similar_objects(self, ref_object: SnappableObject, target_objects: Iterable[SnappableObject]) -> List[SnappableObject]:
-        return [o for o in target_objects if all(self.validate(ref_object,o))]
+        """Targets passing all validators. Validators with a batch version check all remaining targets at once."""
+        target_objects = list(target_objects)
+        is_valid = np.ones(len(target_objects), dtype=bool)
+        for validator in self.match_validate_functions:
+            remaining = np.flatnonzero(is_valid)
+            if len(remaining) == 0:
+                break
+            targets = [target_objects[i] for i in remaining.tolist()]
+            batch_validator = self.batch_validate_functions.get(validator)
+            if batch_validator is not None:
+                is_valid[remaining] = batch_validator(ref_object, targets)
+            else:
+                is_valid[remaining] = [validator(ref_object, target) for target in targets]
+        return [o for o, valid in zip(target_objects, is_valid.tolist()) if valid]
+
+    @staticmethod
+    def batch_dice_coefficients(ref: SnappableObject, targets: list[SnappableObject]) -> np.ndarray:
+        """Dice coefficients of a reference and many targets (see kernels.dice_coefficients)."""
+        return dice_coefficients(SnappableObject.bounding_box_array([ref]),
+                                 SnappableObject.bounding_box_array(targets))[0]
 
 
     @staticmethod
@@ -62,6 +90,22 @@ class ObjectRecognizer:
 
         return recognizer
 
+    @staticmethod
+    def get_relative_size_recognizer(tolerance: float = 0.05) -> 'ObjectRecognizer':
+        recognizer = ObjectRecognizer()
+
+        def relative_size_match(ref: SnappableObject, target: SnappableObject) -> bool:
+            return (abs(ref.width - target.width) <= tolerance * max(ref.width, target.width) and
+                    abs(ref.height - target.height) <= tolerance * max(ref.height, target.height))
+
+        def type_match(ref: SnappableObject, target: SnappableObject) -> bool:
+            return ref.shape_type == target.shape_type
+
+        recognizer.add_validator(type_match)
+        recognizer.add_validator(relative_size_match)
+
+        return recognizer
+
     @staticmethod
     def get_dice_recognizer(dice_threshold: float = 1.0) -> 'ObjectRecognizer':
         recognizer = ObjectRecognizer()
@@ -69,11 +113,14 @@ class ObjectRecognizer:
         def exact_size_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.dice_coefficient(target) >= dice_threshold
 
+        def batch_dice_match(ref: SnappableObject, targets: list[SnappableObject]) -> np.ndarray:
+            return ObjectRecognizer.batch_dice_coefficients(ref, targets) >= dice_threshold
+
         def type_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.shape_type == target.shape_type
 
         recognizer.add_validator(type_match)
-        recognizer.add_validator(exact_size_match)
+        recognizer.add_validator(exact_size_match, batch_dice_match)
 
         return recognizer
 
@@ -87,12 +134,15 @@ class ObjectRecognizer:
         def dice_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.dice_coefficient(target) >= dice_threshold
 
+        def batch_dice_match(ref: SnappableObject, targets: list[SnappableObject]) -> np.ndarray:
+            return ObjectRecognizer.batch_dice_coefficients(ref, targets) >= dice_threshold
+
         def type_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.shape_type == target.shape_type
 
         recognizer.add_validator(type_match)
         recognizer.add_validator(exact_size_match)
-        recognizer.add_validator(dice_match)
+        recognizer.add_validator(dice_match, batch_dice_match)
 
         return recognizer
 
@@ -106,11 +156,14 @@ class ObjectRecognizer:
         def dice_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.dice_coefficient(target) == 1.0
 
+        def batch_dice_match(ref: SnappableObject, targets: list[SnappableObject]) -> np.ndarray:
+            return ObjectRecognizer.batch_dice_coefficients(ref, targets) == 1.0
+
         def type_match(ref: SnappableObject, target: SnappableObject) -> bool:
             return ref.shape_type == target.shape_type
 
         recognizer.add_validator(type_match)
         recognizer.add_validator(exact_size_match)
-        recognizer.add_validator(dice_match)
+        recognizer.add_validator(dice_match, batch_dice_match)
 
         return recognizer
\ No newline at end of file
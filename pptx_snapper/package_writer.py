@@ -0,0 +1,217 @@
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Optional, Union
+
+import pptx
+from pptx.opc.package import OpcPackage
+from pptx.opc.packuri import PackURI
+from pptx.presentation import Presentation
+
+try:
+    from pptx.opc.serialized import PackageWriter
+except ImportError:  # moved in an untested python-pptx version, saved with python-pptx then
+    PackageWriter = None
+
+logger = logging.getLogger(__name__)
+
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+
+_STORED = 0
+_DEFLATED = 8
+_UTF8_FLAG = 0x800
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_MEMBER_LIMIT = 0xFFFF
+
+# python-pptx internals used to serialize the members (tested with python-pptx 1.0)
+_SUPPORTED_PPTX_VERSIONS = ("1.0.",)
+_PACKAGE_WRITER_METHODS = ("_write_content_types_stream", "_write_pkg_rels", "_write_parts")
+
+
+def _supports_package_internals() -> bool:
+    """Whether the installed python-pptx has the PackageWriter internals the ParallelPackageWriter relies on."""
+    return (PackageWriter is not None and pptx.__version__.startswith(_SUPPORTED_PPTX_VERSIONS)
+            and all(hasattr(PackageWriter, name) for name in _PACKAGE_WRITER_METHODS)
+            and hasattr(OpcPackage, "_rels"))
+
+
+def _compress(blob: bytes, level: int, store_only: bool) -> tuple[int, int, bytes]:
+    """CRC-32, zip method and data of a member (zlib releases the GIL, so this runs in parallel threads)."""
+    crc = zlib.crc32(blob)
+    if store_only:
+        return crc, _STORED, blob
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)  # raw deflate stream, as stored in zip members
+    data = compressor.compress(blob) + compressor.flush()
+    if len(data) >= len(blob):  # e.g. already compressed media
+        return crc, _STORED, blob
+    return crc, _DEFLATED, data
+
+
+class _Zip64Required(Exception):
+    """The package does not fit in a zip file without ZIP64 extensions."""
+
+
+class _ZipMember:
+    def __init__(self, name: str, size: int, compressed: Future):
+        self.name = name
+        self.size = size
+        self.compressed: Optional[Future] = compressed  # released once the member is written
+        self.offset = 0
+        self.crc = 0
+        self.method = _STORED
+        self.compressed_size = 0
+
+
+class ParallelPackageWriter:
+    """
+    Minimal zip writer of python-pptx packages compressing the members in parallel worker threads.
+
+    The members are produced by python-pptx's PackageWriter, so their content and order are the same as with
+    Presentation.save: '[Content_Types].xml', '_rels/.rels', then every part followed by its rels item.
+    Every member is submitted for compression as soon as it is serialized and written in order when done, with at most
+    a few members per worker in flight, so only those are held in memory.
+    ZIP64 is not supported: once the running offsets show that a package would need it, the package is saved
+    with python-pptx instead. So is every package if the installed python-pptx version is not supported.
+    """
+
+    def __init__(self, compression_level: Optional[int] = None, store_only: bool = False,
+                 workers: Optional[int] = None):
+        """
+        :param compression_level: zlib level (0-9), the zlib default (6, as python-pptx) if None
+        :param store_only: store the members without compression (fast, e.g. for intermediate artifacts)
+        :param workers: number of compression threads, the ThreadPoolExecutor default if None
+        """
+        self.compression_level = zlib.Z_DEFAULT_COMPRESSION if compression_level is None else compression_level
+        self.store_only = store_only
+        self.workers = workers
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._file: Optional[IO[bytes]] = None
+        self._pending: deque[_ZipMember] = deque()
+        self._members: list[_ZipMember] = []
+        self._offset = 0
+        self._date_time = (0, 0)
+
+    @property
+    def _max_pending(self) -> int:
+        workers = self.workers if self.workers is not None else min(32, (os.cpu_count() or 1) + 4)
+        return 2 * workers
+
+    def write(self, pack_uri: PackURI, blob: bytes) -> None:
+        """Physical package writer interface used by python-pptx's PackageWriter."""
+        compressed = self._executor.submit(_compress, blob, self.compression_level, self.store_only)
+        self._pending.append(_ZipMember(pack_uri.membername, len(blob), compressed))
+        while len(self._pending) > self._max_pending:
+            self._write_member(self._pending.popleft())
+
+    @staticmethod
+    def _dos_date_time() -> tuple[int, int]:
+        year, month, day, hour, minute, second = time.localtime()[:6]
+        return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+    def _write_member(self, member: _ZipMember) -> None:
+        member.crc, member.method, data = member.compressed.result()
+        member.compressed = None
+        member.compressed_size = len(data)
+        member.offset = self._offset
+
+        # the limits themselves are the ZIP64 markers of the plain zip fields
+        if len(self._members) + 1 >= _ZIP64_MEMBER_LIMIT or member.offset >= _ZIP64_LIMIT or \
+                member.size >= _ZIP64_LIMIT or member.compressed_size >= _ZIP64_LIMIT:
+            raise _Zip64Required()
+
+        date, dos_time = self._date_time
+        name = member.name.encode("utf-8")
+        flags = 0 if member.name.isascii() else _UTF8_FLAG
+        header = _LOCAL_HEADER.pack(b"PK\x03\x04", 20, 0, flags, member.method, dos_time, date,
+                                    member.crc, member.compressed_size, member.size, len(name), 0)
+        self._file.write(header)
+        self._file.write(name)
+        self._file.write(data)
+        self._offset += len(header) + len(name) + len(data)
+        self._members.append(member)
+
+    def _write_central_directory(self) -> None:
+        date, dos_time = self._date_time
+        central_directory_offset = self._offset
+        if central_directory_offset >= _ZIP64_LIMIT:
+            raise _Zip64Required()
+
+        for member in self._members:
+            name = member.name.encode("utf-8")
+            flags = 0 if member.name.isascii() else _UTF8_FLAG
+            header = _CENTRAL_HEADER.pack(b"PK\x01\x02", 20, 3, 20, 0, flags, member.method, dos_time, date,
+                                          member.crc, member.compressed_size, member.size, len(name), 0, 0, 0, 0,
+                                          0o600 << 16, member.offset)
+            self._file.write(header)
+            self._file.write(name)
+            self._offset += len(header) + len(name)
+
+        self._file.write(_END_OF_CENTRAL_DIRECTORY.pack(b"PK\x05\x06", 0, 0, len(self._members), len(self._members),
+                                                        self._offset - central_directory_offset,
+                                                        central_directory_offset, 0))
+
+    def _write_zip(self, package: OpcPackage, f: IO[bytes]) -> None:
+        self._file = f
+        self._pending.clear()
+        self._members = []
+        self._offset = 0
+        self._date_time = self._dos_date_time()
+        try:
+            package_writer = PackageWriter(self, package._rels, tuple(package.iter_parts()))
+            package_writer._write_content_types_stream(self)
+            package_writer._write_pkg_rels(self)
+            package_writer._write_parts(self)
+            while self._pending:
+                self._write_member(self._pending.popleft())
+            self._write_central_directory()
+        finally:
+            for member in self._pending:
+                member.compressed.cancel()
+            self._file = None
+            self._pending.clear()
+            self._members = []
+
+    def save(self, presentation: Presentation, file: Union[str, IO[bytes]]) -> None:
+        """Save a presentation to a path or a writable binary file object."""
+        if not _supports_package_internals():
+            logger.warning("python-pptx %s is not supported by the parallel zip writer, saving with python-pptx",
+                           pptx.__version__)
+            presentation.save(file)
+            return
+
+        package = presentation.part.package
+        is_path = isinstance(file, (str, os.PathLike))
+        start = None if is_path or not file.seekable() else file.tell()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as self._executor:
+                if is_path:
+                    with open(file, "wb") as f:
+                        self._write_zip(package, f)
+                else:
+                    self._write_zip(package, file)
+        except _Zip64Required:
+            if not is_path and start is None:
+                raise ValueError("The package needs ZIP64, which the parallel zip writer does not support, "
+                                 "and the file can not be rewound to save it with python-pptx") from None
+            logger.warning("Package too large for the parallel zip writer, saving with python-pptx")
+            if not is_path:
+                file.seek(start)
+                file.truncate()
+            presentation.save(file)
+        finally:
+            self._executor = None
+
+
+def save_presentation(presentation: Presentation, file: Union[str, IO[bytes]], compression_level: Optional[int] = None,
+                      store_only: bool = False, workers: Optional[int] = None) -> None:
+    """Save a presentation with the ParallelPackageWriter."""
+    ParallelPackageWriter(compression_level, store_only, workers).save(presentation, file)
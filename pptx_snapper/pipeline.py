@@ -0,0 +1,207 @@
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from .change_set import Change, ChangeSet
+from .instrumentation import Instrumentation, get_instrumentation
+from .planner import CostModel
+from .pptx_reader import PPTXReader
+from .slide import Slide
+from .snapping import AnchorPositions, SnappingSearch, SnappingManager
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared between the caller (e.g. another thread) and the SlidePipeline."""
+
+    def __init__(self):
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+
+class PipelineStage:
+    """
+    A named unit of per-slide work (e.g. building a grid or calculating candidates).
+    Essential stages also run on a degraded (over budget) slide.
+    The optional estimate returns the expected duration (seconds) of the stage on a slide.
+    """
+
+    def __init__(self, name: str, function: Callable[[Slide], None], essential: bool = False,
+                 estimate: Optional[Callable[[Slide], float]] = None):
+        self.name = name
+        self.function = function
+        self.essential = essential
+        self.estimate = estimate
+
+    def __call__(self, slide: Slide) -> None:
+        self.function(slide)
+
+    def estimated_cost(self, slide: Slide) -> float:
+        return float(self.estimate(slide)) if self.estimate is not None else 0.0
+
+    def __str__(self) -> str:
+        return f"PipelineStage '{self.name}'" + (" (essential)" if self.essential else "")
+
+
+class SlideResult:
+    """
+    Result of one slide: the selected Changes and how the slide was processed
+    ('done', 'degraded', 'skipped' or 'cancelled')
+    """
+
+    def __init__(self, slide_index: int, status: str, changes: list[Change], elapsed: float,
+                 completed_stages: list[str], skipped_stages: list[str]):
+        self.slide_index = slide_index
+        self.status = status
+        self.changes = changes
+        self.elapsed = elapsed
+        self.completed_stages = completed_stages
+        self.skipped_stages = skipped_stages
+
+    def __str__(self) -> str:
+        return (f"[Slide {self.slide_index}] {self.status} in {self.elapsed:.3f}s with {len(self.changes)} changes "
+                f"(skipped stages: {self.skipped_stages})")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class SlidePipeline:
+    """
+    Generator based snapping pipeline yielding a SlideResult as soon as each slide is finished.
+
+    The stages of a slide run in order. Before each stage the pipeline checks the CancellationToken and the per-slide
+    time budget: a cancelled pipeline stops after the current stage, a slide is over budget if the elapsed time plus
+    the estimated cost of the next stage exceeds it. An over-budget slide is either degraded (only essential stages
+    run from then on) or skipped (no changes are selected for it and its candidates are dropped).
+    A started stage is never interrupted, so stages without an estimate are only checked once they are finished.
+    """
+
+    def __init__(self,
+                 reader: PPTXReader,
+                 manager: Optional[SnappingManager] = None,
+                 slide_budget: Optional[float] = None,
+                 over_budget: str = "degrade",
+                 instrumentation: Optional[Instrumentation] = None,
+                 cost_model: Optional[CostModel] = None):
+        """
+        :param reader: PPTXReader of the deck
+        :param manager: SnappingManager selecting the best candidates. If None, an unlimited manager is used.
+        :param slide_budget: time budget of a slide in seconds, None for no budget
+        :param over_budget: 'degrade' or 'skip'
+        :param instrumentation: Instrumentation. If None, the default Instrumentation will be used.
+        :param cost_model: CostModel estimating the search stages, the default one if None
+        """
+        assert over_budget in ("degrade", "skip")
+
+        self.reader = reader
+        self.manager = manager if manager is not None else SnappingManager(reader)
+        self.slide_budget = slide_budget
+        self.over_budget = over_budget
+        self.instrumentation = instrumentation if instrumentation is not None else get_instrumentation()
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+
+        self.stages: list[PipelineStage] = []
+
+    def add_stage(self, name: str, function: Callable[[Slide], None], essential: bool = False,
+                  estimate: Optional[Callable[[Slide], float]] = None) -> PipelineStage:
+        stage = PipelineStage(name, function, essential, estimate)
+        self.stages.append(stage)
+        return stage
+
+    def add_search(self, search: SnappingSearch, strategy_type: str, grid_type: str = "unknown",
+                   essential: bool = False,
+                   anchors: Optional[Callable[[Slide], AnchorPositions]] = None) -> PipelineStage:
+        """
+        Add a stage calculating the candidates of a snapping strategy for all objects of the slide,
+        estimated by the CostModel of the pipeline.
+        :param anchors: function returning the already collected anchor positions of the slide
+                        (see collect_anchor_positions), collected by the strategy if None
+        The limits of the manager are pushed down into the search.
+        """
+        self.manager.push_limits(search)
+
+        def calculate_candidates(slide: Slide) -> None:
+            search.calculate_candidates_for_all_obj(slide, strategy_type, grid_type=grid_type,
+                                                    anchors=anchors(slide) if anchors is not None else None)
+
+        def estimate(slide: Slide) -> float:
+            return self.estimate_search(search, strategy_type, slide)
+
+        return self.add_stage(f"{grid_type}:{strategy_type}", calculate_candidates, essential, estimate)
+
+    def estimate_search(self, search: SnappingSearch, strategy_type: str, slide: Slide) -> float:
+        """Estimated duration (seconds) of calculating the candidates of a snapping strategy on a slide."""
+        num_of_objects = len(slide.snappable_objects)
+        num_of_anchors = sum(len(o.active_anchor_points) for o in slide.snappable_objects)
+        x_lines = len(search.x_grid.x_grid_lines) if search.x_grid is not None else 0
+        y_lines = len(search.y_grid.y_grid_lines) if search.y_grid is not None else 0
+        return self.cost_model.strategy_cost(strategy_type, num_of_objects, num_of_anchors, max(x_lines, y_lines))
+
+    def process_slide(self, slide: Slide, cancel_token: Optional[CancellationToken] = None) -> SlideResult:
+        """Run the stages on a slide and select its changes (without applying them)."""
+        start = time.perf_counter()
+        deadline = start + self.slide_budget if self.slide_budget is not None else None
+
+        status = "done"
+        completed_stages = []
+        skipped_stages = []
+
+        for stage in self.stages:
+            if cancel_token is not None and cancel_token.cancelled:
+                status = "cancelled"
+            elif deadline is not None and status != "degraded" and \
+                    time.perf_counter() + stage.estimated_cost(slide) > deadline:
+                status = "skipped" if self.over_budget == "skip" else "degraded"
+
+            if status in ("cancelled", "skipped") or (status == "degraded" and not stage.essential):
+                skipped_stages.append(stage.name)
+                continue
+
+            with self.instrumentation.timer("pipeline_stage", slide=slide.slide_index, stage=stage.name):
+                stage(slide)
+            completed_stages.append(stage.name)
+
+        if status in ("cancelled", "skipped"):
+            # drop the partial candidates, so they cannot be selected later (e.g. by SnappingManager.compute_snaps)
+            for obj in slide.snappable_objects:
+                obj.snapping_candidates.clear()
+            changes = []
+        else:
+            changes = self.manager.select_slide_snaps(slide)
+
+        self.instrumentation.count(f"slides_{status}", slide=slide.slide_index)
+        return SlideResult(slide.slide_index, status, changes, time.perf_counter() - start,
+                           completed_stages, skipped_stages)
+
+    def iter_results(self, cancel_token: Optional[CancellationToken] = None, apply: bool = True,
+                     slides: Optional[Iterable[Slide]] = None) -> Iterator[SlideResult]:
+        """
+        Process the slides one by one and yield their SlideResult as soon as they are finished.
+        :param cancel_token: CancellationToken, the generator stops after the result of the slide in progress
+        :param apply: apply the changes of each slide on the presentation right away
+        :param slides: slides to process, all slides of the deck if None
+        """
+        slides = self.reader.slides if slides is None else slides
+        for slide in slides:
+            if cancel_token is not None and cancel_token.cancelled:
+                return
+
+            result = self.process_slide(slide, cancel_token)
+            if apply and result.changes:
+                ChangeSet(result.changes).apply_to(self.reader.presentation)
+            yield result
+
+            if result.status == "cancelled":
+                return
+
+    def run(self, cancel_token: Optional[CancellationToken] = None, apply: bool = True) -> ChangeSet:
+        """Process the whole deck and return the collected ChangeSet."""
+        change_set = ChangeSet()
+        for result in self.iter_results(cancel_token, apply):
+            change_set.extend(result.changes)
+        return change_set
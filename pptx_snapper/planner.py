@@ -0,0 +1,295 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Iterable
+
+import numpy as np
+
+from .slide import Slide
+from .snappable_object import SnappableObject
+from .grid import Grid
+from .kmeans_grid import KMeansGrid
+from .density_grid import DensityGrid
+from .implicit_grid import ImplicitGrid
+from .object_recognizer import ObjectRecognizer
+from .templates import ObjectTemplate, ObjectTemplates
+from .snapping import SnappingSearch, SnappingLimits
+from .utils import AnchorPoint
+
+
+class CostModel:
+    """
+    Linear cost model (seconds) of the snapping stages as a function of the slide complexity.
+    The coefficients are rough defaults and can be calibrated from measured timings.
+    """
+
+    default_coefficients = OrderedDict(
+        kmeans=2e-3,         # per fit (dominated by the KMeans setup) ...
+        kmeans_object=2e-5,  # ... plus per object and cluster
+        density=5e-7,        # per object and histogram bin
+        implicit=1e-6,       # per anchor
+        candidates=4e-6,     # per anchor, strategy and log2(grid lines)
+        edge=6e-6,           # per anchor and log2(objects)
+        spacing=5e-6,        # per object and log2(objects)
+        templates=2e-6,      # per object pair (pairwise recognition)
+    )
+
+    def __init__(self, coefficients: Optional[dict] = None):
+        self.coefficients = OrderedDict(self.default_coefficients)
+        if coefficients:
+            self.coefficients.update(coefficients)
+
+    @staticmethod
+    def grid_units(grid: str, num_of_objects: int, num_of_anchors: int, n_clusters: int = 10,
+                   num_of_bins: int = 500) -> tuple[Optional[str], float]:
+        """Coefficient and number of units of building a grid (the fixed KMeans setup cost excluded)."""
+        if grid == "kmeans":
+            return "kmeans_object", num_of_objects * n_clusters
+        if grid == "density":
+            return "density", num_of_objects + num_of_bins
+        if grid == "implicit":
+            return "implicit", num_of_anchors
+        return None, 0
+
+    def grid_fixed_cost(self, grid: str) -> float:
+        return self.coefficients["kmeans"] if grid == "kmeans" else 0.0
+
+    def grid_cost(self, grid: str, num_of_objects: int, num_of_anchors: int, n_clusters: int = 10,
+                  num_of_bins: int = 500) -> float:
+        name, units = self.grid_units(grid, num_of_objects, num_of_anchors, n_clusters, num_of_bins)
+        if name is None:
+            return 0.0
+        return self.grid_fixed_cost(grid) + self.coefficients[name] * units
+
+    @staticmethod
+    def strategy_units(strategy: str, num_of_objects: int, num_of_anchors: int,
+                       num_of_lines: int) -> tuple[str, float]:
+        """Coefficient and number of units of calculating the candidates of a strategy."""
+        log_objects = np.log2(num_of_objects + 2)
+        if strategy == "edge":
+            return "edge", num_of_anchors * log_objects
+        if strategy == "spacing":
+            return "spacing", num_of_objects * log_objects
+        return "candidates", num_of_anchors * np.log2(num_of_lines + 2)
+
+    def strategy_cost(self, strategy: str, num_of_objects: int, num_of_anchors: int, num_of_lines: int) -> float:
+        name, units = self.strategy_units(strategy, num_of_objects, num_of_anchors, num_of_lines)
+        return self.coefficients[name] * units
+
+    def template_cost(self, num_of_objects: int) -> float:
+        return self.coefficients["templates"] * num_of_objects ** 2
+
+    def calibrate(self, name: str, units: float, seconds: float, smoothing: float = 0.3) -> None:
+        """Update a coefficient from a measured timing (exponential moving average of seconds per unit)."""
+        if units <= 0:
+            return
+        observed = seconds / units
+        self.coefficients[name] = (1 - smoothing) * self.coefficients[name] + smoothing * observed
+
+
+class SlidePlan:
+    """
+    Work chosen for a slide: anchor points, grid type, snapping strategies and template recognition,
+    with the estimated cost and the reasons of the degradations
+    """
+
+    def __init__(self, slide_index: int, num_of_objects: int, anchor_points: list[AnchorPoint], grid: str,
+                 strategies: list[str], recognize_templates: bool):
+        self.slide_index = slide_index
+        self.num_of_objects = num_of_objects
+        self.anchor_points = anchor_points
+        self.grid = grid
+        self.strategies = strategies
+        self.recognize_templates = recognize_templates
+        self.estimated_cost = 0.0
+        self.notes: list[str] = []
+
+    def to_dict(self) -> dict:
+        return OrderedDict(slide_index=self.slide_index,
+                           num_of_objects=self.num_of_objects,
+                           anchor_points=[a.value for a in self.anchor_points],
+                           grid=self.grid,
+                           strategies=list(self.strategies),
+                           recognize_templates=self.recognize_templates,
+                           estimated_cost=self.estimated_cost,
+                           notes=list(self.notes))
+
+    def __str__(self) -> str:
+        return (f"SlidePlan for [Slide {self.slide_index}] with {self.num_of_objects} objects: "
+                f"{self.grid} grid, strategies {self.strategies}, anchors {[a.value for a in self.anchor_points]}, "
+                f"templates {self.recognize_templates}, estimated {self.estimated_cost * 1000:.1f} ms")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class StrategyPlanner:
+    """
+    Chooses the snapping work of every slide from its complexity to meet a latency target.
+
+    The full plan (all anchors, the configured grid and strategies, template recognition) is degraded step by step
+    until its estimated cost fits the target: KMeans is replaced by the density grid, template recognition is skipped,
+    the anchors are reduced, the data-derived grid is replaced by the implicit grid and optional strategies are dropped.
+    The chosen plans are recorded in 'plans' for inspection.
+
+    Executing a plan calibrates the CostModel with the measured timings and records the number of lines of the built
+    grid, which the later estimates use. Recognized templates are kept in the registry of the planner ('templates'),
+    not in the global ObjectTemplates.
+    """
+
+    degradations = ["density_grid", "skip_templates", "fewer_anchors", "center_anchor", "implicit_grid",
+                    "drop_optional_strategies"]
+
+    def __init__(self,
+                 latency_target: float = 0.05,
+                 cost_model: Optional[CostModel] = None,
+                 anchor_points: Optional[list[AnchorPoint]] = None,
+                 grid: str = "kmeans",
+                 strategies: Iterable[str] = ("joint",),
+                 essential_strategies: Iterable[str] = ("joint",),
+                 recognize_templates: bool = False,
+                 implicit_depth: int = 3,
+                 limits: Optional[SnappingLimits] = None):
+        """
+        :param latency_target: target time of a slide in seconds
+        :param cost_model: CostModel, the default one if None
+        :param anchor_points: anchor points of the full plan. If None, the default active anchor points are used.
+        :param grid: grid of the full plan: 'kmeans', 'density' or 'implicit'
+        :param strategies: strategies of the full plan ('x', 'y', 'joint', 'edge', 'spacing', 'template')
+        :param essential_strategies: strategies that are never dropped
+        :param recognize_templates: recognize templates among the objects of the slide in the full plan
+        :param implicit_depth: subdivision depth of the implicit grid
+        :param limits: SnappingLimits pushed down into the search
+        """
+        assert grid in ("kmeans", "density", "implicit")
+
+        self.latency_target = latency_target
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+        self.anchor_points = anchor_points
+        self.grid = grid
+        self.strategies = list(strategies)
+        self.essential_strategies = set(essential_strategies)
+        self.recognize_templates = recognize_templates
+        self.implicit_depth = implicit_depth
+        self.limits = limits
+
+        self.plans: OrderedDict[int, SlidePlan] = OrderedDict()
+        self.templates: OrderedDict[str, ObjectTemplate] = OrderedDict()
+        # number of lines of the last built grid of each type (a guess until one is built)
+        self.num_of_lines = dict(kmeans=12, density=12, implicit=2 ** implicit_depth + 1)
+
+    def estimate(self, plan: SlidePlan) -> float:
+        num_of_objects = plan.num_of_objects
+        num_of_anchors = num_of_objects * len(plan.anchor_points)
+        num_of_lines = self.num_of_lines[plan.grid]
+
+        cost = self.cost_model.grid_cost(plan.grid, num_of_objects, num_of_anchors)
+        cost += sum(self.cost_model.strategy_cost(s, num_of_objects, num_of_anchors, num_of_lines)
+                    for s in plan.strategies)
+        if plan.recognize_templates:
+            cost += self.cost_model.template_cost(num_of_objects)
+        return cost
+
+    def _degrade(self, plan: SlidePlan, step: str) -> bool:
+        """Apply a degradation step, return False if it does not change the plan."""
+        if step == "density_grid" and plan.grid == "kmeans":
+            plan.grid = "density"
+        elif step == "skip_templates" and plan.recognize_templates:
+            plan.recognize_templates = False
+        elif step == "fewer_anchors" and len(plan.anchor_points) > 2:
+            plan.anchor_points = [AnchorPoint.TOP_LEFT, AnchorPoint.CENTER]
+        elif step == "center_anchor" and len(plan.anchor_points) > 1:
+            plan.anchor_points = [AnchorPoint.CENTER]
+        elif step == "implicit_grid" and plan.grid != "implicit":
+            plan.grid = "implicit"
+        elif step == "drop_optional_strategies" and set(plan.strategies) - self.essential_strategies:
+            plan.strategies = [s for s in plan.strategies if s in self.essential_strategies]
+        else:
+            return False
+        return True
+
+    def plan(self, slide: Slide) -> SlidePlan:
+        """Choose and record the plan of a slide."""
+        anchor_points = self.anchor_points if self.anchor_points else SnappableObject.default_active_anchor_points
+        plan = SlidePlan(slide.slide_index, len(slide.snappable_objects), list(anchor_points), self.grid,
+                         list(self.strategies), self.recognize_templates)
+        plan.estimated_cost = self.estimate(plan)
+
+        for step in self.degradations:
+            if plan.estimated_cost <= self.latency_target:
+                break
+            if self._degrade(plan, step):
+                plan.estimated_cost = self.estimate(plan)
+                plan.notes.append(step)
+
+        if plan.estimated_cost > self.latency_target:
+            plan.notes.append("over_target")
+
+        self.plans[slide.slide_index] = plan
+        return plan
+
+    @staticmethod
+    def count_grid_lines(grid: Grid) -> int:
+        """Number of lines of the denser axis of a grid (implicit lattices included)."""
+        x_lines, y_lines = len(grid.x_grid_lines), len(grid.y_grid_lines)
+        if isinstance(grid, ImplicitGrid):
+            x_lines += grid.x_axis.num_of_lines if grid.x_axis is not None else 0
+            y_lines += grid.y_axis.num_of_lines if grid.y_axis is not None else 0
+        return max(x_lines, y_lines)
+
+    def build_grid(self, plan: SlidePlan, slide: Slide) -> Grid:
+        if plan.grid == "kmeans":
+            grid = KMeansGrid(slide)
+            grid.calculate_kmeans_grid(anchor_point=plan.anchor_points[0], axis='x')
+            grid.calculate_kmeans_grid(anchor_point=plan.anchor_points[0], axis='y')
+            return grid.to_grid()
+        if plan.grid == "density":
+            grid = DensityGrid(slide)
+            grid.calculate_density_grid(anchor_point=plan.anchor_points[0])
+            return grid.to_grid()
+        return ImplicitGrid.from_depth(slide.slide_width, slide.slide_height, self.implicit_depth, self.implicit_depth)
+
+    def execute(self, slide: Slide, plan: Optional[SlidePlan] = None) -> SlidePlan:
+        """Plan the slide (if no plan is given) and calculate its candidates accordingly."""
+        plan = plan if plan is not None else self.plan(slide)
+        if plan.num_of_objects == 0:
+            return plan
+
+        for obj in slide.snappable_objects:
+            obj.active_anchor_points = plan.anchor_points
+        num_of_objects = plan.num_of_objects
+        num_of_anchors = num_of_objects * len(plan.anchor_points)
+
+        if plan.recognize_templates:
+            start = time.perf_counter()
+            ObjectTemplates.recognize_templates(slide.snappable_objects, ObjectRecognizer.get_size_recognizer(0.9),
+                                                registry=self.templates)
+            self.cost_model.calibrate("templates", num_of_objects ** 2, time.perf_counter() - start)
+
+        search = SnappingSearch(limits=self.limits)
+        if set(plan.strategies) & {"x", "y", "joint"}:
+            start = time.perf_counter()
+            grid = self.build_grid(plan, slide)
+            seconds = time.perf_counter() - start - self.cost_model.grid_fixed_cost(plan.grid)
+            name, units = self.cost_model.grid_units(plan.grid, num_of_objects, num_of_anchors)
+            self.cost_model.calibrate(name, units, max(seconds, 0.0))
+
+            self.num_of_lines[plan.grid] = self.count_grid_lines(grid)
+            search.set_joint_grid(grid)
+        if "edge" in plan.strategies:
+            search.set_edge_snapping()
+        if "spacing" in plan.strategies:
+            search.set_spacing_snapping()
+        if "template" in plan.strategies:
+            search.set_templates(self.templates.values())
+
+        for strategy in plan.strategies:
+            start = time.perf_counter()
+            search.calculate_candidates_for_all_obj(slide, strategy, grid_type=plan.grid)
+            name, units = self.cost_model.strategy_units(strategy, num_of_objects, num_of_anchors,
+                                                         self.num_of_lines[plan.grid])
+            self.cost_model.calibrate(name, units, time.perf_counter() - start)
+
+        return plan
+
+    def report(self) -> list[dict]:
+        return [plan.to_dict() for plan in self.plans.values()]
@@ -20,6 +20,7 @@ class Slide:
             # Add only visible snappable objects (exclude connectors, invisible shapes, etc.)
             # if not shape.has_text_frame and not shape.is_placeholder:
             snappable_objects.append(SnappableObject(shape = shape, slide_index = self.slide_index, shape_index=shape_index))
+        SnappableObject.update_bounding_boxes(snappable_objects)
         return snappable_objects
     
     def __str__(self) -> str:
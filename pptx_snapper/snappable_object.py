@@ -15,6 +15,25 @@ from pptx.shapes.group import GroupShape
 from .utils import AnchorPoint, classproperty
 
 
+def bounding_box_margins(widths, heights, rotations) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized margins between the frames of rotated shapes and their visual axis-aligned bounding boxes.
+    Shapes rotate around their center, so the bounding box is the frame grown by the margin on both sides.
+    :param widths: frame widths
+    :param heights: frame heights
+    :param rotations: clockwise rotations in degrees
+    :return: x and y margins (EMU, rounded to integers)
+    """
+    widths = np.asarray(widths, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    theta = np.deg2rad(np.asarray(rotations, dtype=np.float64))
+    cos, sin = np.abs(np.cos(theta)), np.abs(np.sin(theta))
+
+    x_margins = np.rint((widths * cos + heights * sin - widths) / 2).astype(np.int64)
+    y_margins = np.rint((widths * sin + heights * cos - heights) / 2).astype(np.int64)
+    return x_margins, y_margins
+
+
 class SnappableObject:
 
     _default_active_anchor_points = [AnchorPoint.TOP_LEFT,
@@ -56,6 +75,10 @@ class SnappableObject:
         self._width = shape.width
         self._height= shape.height
 
+        self.rotation = float(getattr(shape, "rotation", 0.0) or 0.0)
+        self._bbox_margins = None  # set in batch by update_bounding_boxes or lazily on first use
+        self._bbox_geometry = None  # (width, height, rotation) the margins were calculated for
+
         self._template_snap_id = None  # Initially None, will be set later
 
         self._active_anchor_points = None
@@ -70,9 +93,60 @@ class SnappableObject:
     def full_id(self) -> str:
         return f"{self.shape_id}#{self.shape_index}@{self.slide_index}"
 
+    @classmethod
+    def update_bounding_boxes(cls, objects: list['SnappableObject']) -> None:
+        """Calculate the visual bounding boxes of the (possibly rotated) objects in one vectorized pass."""
+        if len(objects) == 0:
+            return
+        geometry = np.array([[o.width, o.height, o.rotation] for o in objects], dtype=np.float64).reshape(-1, 3)
+        x_margins, y_margins = bounding_box_margins(geometry[:, 0], geometry[:, 1], geometry[:, 2])
+        for obj, dims, x_margin, y_margin in zip(objects, geometry.tolist(), x_margins.tolist(), y_margins.tolist()):
+            obj._bbox_margins = (x_margin, y_margin)
+            obj._bbox_geometry = tuple(dims)
+
+    @staticmethod
+    def bounding_box_array(objects: list['SnappableObject']) -> np.ndarray:
+        """(n x 4) int64 array of the [left, top, right, bottom] visual bounding boxes of the objects"""
+        return np.array([[o.bbox_left, o.bbox_top, o.bbox_right, o.bbox_bottom] for o in objects],
+                        dtype=np.int64).reshape(-1, 4)
+
+    @property
+    def bbox_margins(self) -> tuple[int, int]:
+        """
+        Margins between the frame and the visual bounding box (non-zero for rotated objects),
+        recalculated when the size or the rotation of the object changes
+        """
+        if self._bbox_margins is None or self._bbox_geometry != (self.width, self.height, self.rotation):
+            self.__class__.update_bounding_boxes([self])
+        return self._bbox_margins
+
+    @property
+    def bbox_left(self) -> Length:
+        return Length(self.left - self.bbox_margins[0])
+
+    @property
+    def bbox_top(self) -> Length:
+        return Length(self.top - self.bbox_margins[1])
+
+    @property
+    def bbox_width(self) -> Length:
+        return Length(self.width + 2 * self.bbox_margins[0])
+
+    @property
+    def bbox_height(self) -> Length:
+        return Length(self.height + 2 * self.bbox_margins[1])
+
+    @property
+    def bbox_right(self) -> Length:
+        return Length(self.left + self.width + self.bbox_margins[0])
+
+    @property
+    def bbox_bottom(self) -> Length:
+        return Length(self.top + self.height + self.bbox_margins[1])
+
     @property
     def sizes(self) -> np.ndarray:
-        return np.array([Length(max(self.width,1)), Length(max(self.height,1))])
+        return np.array([Length(max(self.bbox_width,1)), Length(max(self.bbox_height,1))])
 
     @property
     def center(self)->tuple[Length,...]:
@@ -88,12 +162,14 @@ class SnappableObject:
 
     @property
     def corners(self)-> list[tuple[Length,...]]:
-        """Calculate the corner points of the object."""
+        """Calculate the corner points of the visual bounding box of the object."""
+        left, top = self.bbox_left, self.bbox_top
+        right, bottom = self.bbox_right, self.bbox_bottom
         return [
-            (self.left, self.top),  # Top-left
-            (self.right, self.top),  # Top-right
-            (self.left, self.bottom),  # Bottom-left
-            (self.right, self.bottom),  # Bottom-right
+            (left, top),  # Top-left
+            (right, top),  # Top-right
+            (left, bottom),  # Bottom-left
+            (right, bottom),  # Bottom-right
         ]
 
     @property
@@ -157,7 +233,7 @@ class SnappableObject:
 
     @property
     def area(self) -> int:
-        return int(self.width * self.height)
+        return int(self.bbox_width * self.bbox_height)
     
     @property
     def orig_top(self) -> Length:
@@ -204,10 +280,10 @@ class SnappableObject:
         self._template_snap_id = value
 
     def intersection_area(self, other:'SnappableObject') -> float:
-        x_left = max(self.left, other.left)
-        y_top = max(self.top, other.top)
-        x_right = min(self.right, other.right)
-        y_bottom = min(self.bottom, other.bottom)
+        x_left = max(self.bbox_left, other.bbox_left)
+        y_top = max(self.bbox_top, other.bbox_top)
+        x_right = min(self.bbox_right, other.bbox_right)
+        y_bottom = min(self.bbox_bottom, other.bbox_bottom)
 
         overlap_width = max(0, x_right - x_left)
         overlap_height = max(0, y_bottom - y_top)
@@ -1,6 +1,9 @@
+import heapq
+import logging
+import math
 import os.path
 from abc import abstractmethod
-from typing import Optional, Any
+from typing import Optional, Any, Iterable
 import numpy as np
 
 from pptx.util import Length, Cm, Mm
@@ -9,8 +12,16 @@ from .pptx_reader import PPTXReader
 from .grid import Grid
 from .snappable_object import SnappableObject
 from .slide import Slide
-from .templates import ObjectTemplates
+from .templates import ObjectTemplates, ObjectTemplate
 from .utils import AnchorPoint
+from .instrumentation import Instrumentation, get_instrumentation
+from .change_set import Change, ChangeSet
+from .edge_index import EdgeIndex
+from .spacing import SpacingDetector
+from .package_writer import save_presentation
+
+logger = logging.getLogger(__name__)
+
 
 class SnapCandidate:
     """
@@ -18,7 +29,8 @@ class SnapCandidate:
     A SnapCandidate is a virtual, grid-sanpped position of an objects anchor point
     """
 
-    def __init__(self, snappable_object: SnappableObject, anchor_point: AnchorPoint, snap_type:str, grid_type:str, snap_x_position: Optional[int] = None, snap_y_position: Optional[int] = None):
+    def __init__(self, snappable_object: SnappableObject, anchor_point: AnchorPoint, snap_type:str, grid_type:str, snap_x_position: Optional[int] = None, snap_y_position: Optional[int] = None,
+                 snap_size: Optional[tuple[int,...]] = None):
         self.snappable_object = snappable_object
         self.anchor_point = anchor_point      # Name of the anchor point (e.g., "top-left")
         self.snap_type = snap_type
@@ -30,10 +42,14 @@ class SnapCandidate:
         y = snap_y_position if not isinstance(snap_y_position,type(None)) else self.anchor_position[1]
         
         self.snap_position = (x,y)    # New snapped position (x, y)
+        self.snap_size = snap_size    # New (width, height) or None if the size is kept
 
     def __str__(self) -> str:
-        return (f"{self.anchor_point.value} anchor at {self.anchor_position} "
+        text = (f"{self.anchor_point.value} anchor at {self.anchor_position} "
                 f"snapped to {self.snap_position}")
+        if self.snap_size is not None:
+            text += f" resized to [{self.snap_size[0]} x {self.snap_size[1]}]"
+        return text
         
     @property
     def displacement_vector(self)-> np.ndarray:
@@ -45,8 +61,148 @@ class SnapCandidate:
 
     @property
     def displacement(self)-> float:
-        return float(np.linalg.norm(self.displacement_vector))
+        """Length of the change: the anchor displacement together with the size change (if resized)"""
+        return float(np.linalg.norm(np.concatenate([self.displacement_vector, self.size_delta])))
+
+    @property
+    def size_delta(self) -> np.ndarray:
+        if self.snap_size is None:
+            return np.zeros(2, dtype=int)
+        return np.array(self.snap_size) - np.array([self.snappable_object.width, self.snappable_object.height])
+
+    @property
+    def relative_size_delta(self) -> np.ndarray:
+        return np.abs(self.size_delta) / np.array(self.snappable_object.sizes)
+
+
+
+class SnappingLimits:
+    """
+    Absolute (EMU) and relative (fraction of the object size) limits of the displacement on the X and Y axes.
+    A None limit is not applied.
+    """
+
+    def __init__(self,
+                 x_limit: Optional[Length] = None,
+                 y_limit: Optional[Length] = None,
+                 x_relative_limit: Optional[float] = None,
+                 y_relative_limit: Optional[float] = None) -> None:
+        self.fix_limit = np.array([np.nan if l is None else float(l) for l in [x_limit, y_limit]])
+        self.rel_limit = np.array([np.nan if l is None else float(l) for l in [x_relative_limit, y_relative_limit]])
 
+    @property
+    def is_limited(self) -> bool:
+        return not (np.all(np.isnan(self.fix_limit)) and np.all(np.isnan(self.rel_limit)))
+
+    def validate_displacement(self, displacement_vectors: np.ndarray) -> np.ndarray:
+        """Check the absolute limits for one (shape 2) or several (shape n x 2) displacement vectors."""
+        valid_indices = ~np.isnan(self.fix_limit)
+        return np.all(np.abs(displacement_vectors)[..., valid_indices] <= self.fix_limit[valid_indices], axis=-1)
+
+    def validate_relative_displacement(self, rel_displacement_vectors: np.ndarray) -> np.ndarray:
+        """Check the relative limits for one (shape 2) or several (shape n x 2) relative displacement vectors."""
+        valid_indices = ~np.isnan(self.rel_limit)
+        return np.all(np.abs(rel_displacement_vectors)[..., valid_indices] <= self.rel_limit[valid_indices], axis=-1)
+
+    def validate(self, displacement_vectors: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Check both limits for several displacement vectors of objects with the given (n x 2) sizes."""
+        return (self.validate_displacement(displacement_vectors) &
+                self.validate_relative_displacement(np.abs(displacement_vectors) / sizes))
+
+    def __str__(self) -> str:
+        return f"SnappingLimits with absolute limits {self.fix_limit} and relative limits {self.rel_limit}"
+
+
+class CandidateHeap:
+    """
+    Bounded, list-like container of SnapCandidates keeping only the k best (smallest displacement) candidates
+    that pass the limits. It replaces SnappableObject.snapping_candidates, so memory stays O(k) per object
+    regardless of the number of stacked grids and strategies.
+    Among candidates with equal displacement the earlier one is kept (as with a stable sort of a full list).
+    The limits must be the limits of the SnappingManager: a candidate it rejects must not displace a valid one.
+    """
+
+    def __init__(self, k: int, limits: Optional[SnappingLimits] = None, candidates: Iterable['SnapCandidate'] = ()):
+        assert k > 0
+        self.k = k
+        self.limits = limits if limits is not None and limits.is_limited else None
+        # plain float limits per axis (None if not applied): append is called for every candidate
+        self._fix_limits = [None if np.isnan(l) else l for l in limits.fix_limit.tolist()] if self.limits else None
+        self._rel_limits = [None if np.isnan(l) else l for l in limits.rel_limit.tolist()] if self.limits else None
+        self._heap = []  # min-heap on (-displacement, -sequence): the root is the worst retained candidate
+        self._sequence = 0
+        self.offered = 0  # number of candidates appended so far, retained or not
+        for candidate in candidates:
+            self.append(candidate)
+
+    def _within_limits(self, displacement: tuple[float, float], obj: SnappableObject) -> bool:
+        sizes = (max(obj.bbox_width, 1), max(obj.bbox_height, 1))
+        for d, fix_limit, rel_limit, size in zip(displacement, self._fix_limits, self._rel_limits, sizes):
+            if fix_limit is not None and abs(d) > fix_limit:
+                return False
+            if rel_limit is not None and abs(d) / size > rel_limit:
+                return False
+        return True
+
+    def append(self, candidate: 'SnapCandidate') -> None:
+        self.offered += 1
+        dx = candidate.snap_position[0] - candidate.anchor_position[0]
+        dy = candidate.snap_position[1] - candidate.anchor_position[1]
+        dw, dh = candidate.size_delta.tolist() if candidate.snap_size is not None else (0, 0)
+        if self.limits is not None and not (self._within_limits((dx, dy), candidate.snappable_object) and
+                                            self._within_limits((dw, dh), candidate.snappable_object)):
+            return
+
+        self._sequence += 1
+        entry = (-math.hypot(dx, dy, dw, dh), -self._sequence, candidate)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, candidates: Iterable['SnapCandidate']) -> None:
+        for candidate in candidates:
+            self.append(candidate)
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+    def __iter__(self):
+        """Iterate from the best to the worst candidate."""
+        return (entry[2] for entry in sorted(self._heap, reverse=True))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __str__(self) -> str:
+        return f"CandidateHeap with {len(self._heap)} of max {self.k} candidates"
+
+
+AnchorPositions = tuple[list[SnappableObject], list[AnchorPoint], np.ndarray, np.ndarray]
+
+
+def collect_anchor_positions(objs: Iterable[SnappableObject]) -> AnchorPositions:
+    """
+    Flatten the active anchor points of the objects.
+    The result can be collected once per slide and passed to several strategies (see Snapping.snap_batch).
+    :return: owner objects, anchor points, (n x 2) anchor positions and (n x 2) owner sizes
+    """
+    owners = []
+    anchor_points = []
+    positions = []
+    sizes = []
+    for obj in objs:
+        obj_anchor_points = obj.anchor_points
+        obj_sizes = obj.sizes
+        for anchor_point in obj.active_anchor_points:
+            owners.append(obj)
+            anchor_points.append(anchor_point)
+            positions.append(obj_anchor_points.get(anchor_point, (None, None)))
+            sizes.append(obj_sizes)
+
+    return (owners, anchor_points,
+            np.array(positions, dtype=np.int64).reshape(-1, 2),
+            np.array(sizes, dtype=np.int64).reshape(-1, 2))
 
 
 class Snapping:
@@ -54,87 +210,342 @@ class Snapping:
     Base class to calculate SnapCandidates
     """
 
-    def __init__(self, grid: Grid) -> None:
+    def __init__(self, grid: Grid, limits: Optional[SnappingLimits] = None) -> None:
         self.grid = grid
+        self.limits = limits
+        self.snap_type = ""
+        self.instrumentation = get_instrumentation()
         
     @abstractmethod
     def snap(self,obj:SnappableObject, grid_type:str) -> None:
         pass
 
+    def snap_batch(self, objs: Iterable[SnappableObject], grid_type:str,
+                   anchors: Optional[AnchorPositions] = None) -> None:
+        """
+        Calculate the SnapCandidates for several objects. Strategies that can work in a batch override this.
+        :param anchors: collect_anchor_positions of the objects if already collected, used by the anchor based strategies
+        """
+        for obj in objs:
+            self.snap(obj, grid_type=grid_type)
+
+    def _within_limits(self, displacement_vectors: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Search window of the anchors: candidates outside the limits would be rejected by the SnappingManager anyway."""
+        if self.limits is None or not self.limits.is_limited:
+            return np.ones(len(displacement_vectors), dtype=bool)
+
+        within_absolute = self.limits.validate_displacement(displacement_vectors)
+        within_relative = self.limits.validate_relative_displacement(np.abs(displacement_vectors) / sizes)
 
-class XSnapping(Snapping):
+        # the skipped anchors are reported under the same counters as the rejections of the SnappingManager
+        self.instrumentation.count("rejected_absolute_limit", int(np.count_nonzero(~within_absolute)),
+                                   strategy=self.snap_type)
+        self.instrumentation.count("rejected_relative_limit",
+                                   int(np.count_nonzero(within_absolute & ~within_relative)), strategy=self.snap_type)
+        return within_absolute & within_relative
+
+
+class GridSnapping(Snapping):
     """
-    Class to calculate SnapCandidates on X axis
+    Base class of the grid line snapping strategies.
+    The nearest grid lines of all anchors are found with a range query on the sorted grid lines,
+    and anchors without a grid line inside their limit window are skipped.
     """
 
-    def __init__(self, grid: Grid):
-        super().__init__(grid)
-        self.snap_type = "x"
+    snap_x = False
+    snap_y = False
 
-    def snap(self, obj: SnappableObject, grid_type:str):
-        """Apply x-axis snapping to the object."""
-        for anchor_point in obj.active_anchor_points:
-            if len(self.grid.x_grid_lines)==0:
-                break
-            closest_x = min(self.grid.x_grid_lines, key=lambda gx: abs(gx - obj.get_anchor_point(anchor_point)[0]))
-            obj.snapping_candidates.append(SnapCandidate(obj, anchor_point = anchor_point, snap_x_position=closest_x,
-                                                         snap_type = self.snap_type,
+    def snap(self, obj: SnappableObject, grid_type:str) -> None:
+        self.snap_batch([obj], grid_type=grid_type)
+
+    def snap_batch(self, objs: Iterable[SnappableObject], grid_type:str,
+                   anchors: Optional[AnchorPositions] = None) -> None:
+        snap_x = self.snap_x and self.grid.has_x_lines()
+        snap_y = self.snap_y and self.grid.has_y_lines()
+
+        # single axis strategies without grid lines do not produce candidates at all
+        if not (snap_x or snap_y or (self.snap_x and self.snap_y)):
+            return
+
+        owners, anchor_points, positions, sizes = anchors if anchors is not None else collect_anchor_positions(objs)
+        if len(owners) == 0:
+            return
+
+        snap_positions = positions.copy()
+        if snap_x:
+            snap_positions[:, 0] = self.grid.nearest_x(positions[:, 0])
+        if snap_y:
+            snap_positions[:, 1] = self.grid.nearest_y(positions[:, 1])
+
+        within = self._within_limits(snap_positions - positions, sizes)
+
+        for i in np.flatnonzero(within).tolist():
+            obj = owners[i]
+            obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=anchor_points[i],
+                                                         snap_x_position=int(snap_positions[i, 0]) if snap_x else None,
+                                                         snap_y_position=int(snap_positions[i, 1]) if snap_y else None,
+                                                         snap_type=self.snap_type,
                                                          grid_type=grid_type))
 
 
-class YSnapping(Snapping):
+class XSnapping(GridSnapping):
+    """
+    Class to calculate SnapCandidates on X axis
+    """
+
+    snap_x = True
+
+    def __init__(self, grid: Grid, limits: Optional[SnappingLimits] = None):
+        super().__init__(grid, limits)
+        self.snap_type = "x"
+
+
+class YSnapping(GridSnapping):
     """
     Class to calculate SnapCandidates on Y axis
     """
 
-    def __init__(self, grid: Grid) -> None:
-        super().__init__(grid)
-        self.snap_type = "y"
+    snap_y = True
 
-    def snap(self, obj: SnappableObject, grid_type:str) -> None:
-        """Apply y-axis snapping to the object."""
-        for anchor_point in obj.active_anchor_points:
-            if len(self.grid.y_grid_lines)==0:
-                break
-            closest_y = min(self.grid.y_grid_lines, key=lambda gy: abs(gy - obj.get_anchor_point(anchor_point)[1]))
-            obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=anchor_point, snap_y_position=closest_y,
-                                                         snap_type = self.snap_type,
-                                                         grid_type=grid_type))
+    def __init__(self, grid: Grid, limits: Optional[SnappingLimits] = None) -> None:
+        super().__init__(grid, limits)
+        self.snap_type = "y"
 
 
-class JointSnapping(Snapping):
+class JointSnapping(GridSnapping):
     """
     Class to calculate SnapCandidates on X and Y axes
     """
 
-    def __init__(self, grid: Grid) -> None:
-        super().__init__(grid)
+    snap_x = True
+    snap_y = True
+
+    def __init__(self, grid: Grid, limits: Optional[SnappingLimits] = None) -> None:
+        super().__init__(grid, limits)
         self.snap_type = "joint"
 
+
+class EdgeSnapping(Snapping):
+    """
+    Class to calculate SnapCandidates aligning the anchors of an object to the nearest edge
+    (left, right, center / top, bottom, middle) of another object on the same slide
+    """
+
+    def __init__(self, axis: str = 'both', limits: Optional[SnappingLimits] = None) -> None:
+        """
+        :param axis: 'x', 'y', or 'both'. Determines the axis along which the edges are aligned.
+        :param limits: SnappingLimits of the displacement
+        """
+        super().__init__(grid=None, limits=limits)
+        self.snap_type = "edge"
+        self.axis = axis
+        self.edge_index = None
+        self._indexed_slides = set()
+
+    def build_index(self, objs: Iterable[SnappableObject]) -> EdgeIndex:
+        """Build the sorted edge index of the target objects (typically all objects of a slide)."""
+        self.edge_index = EdgeIndex(objs)
+        self._indexed_slides = {o.slide_index for o in self.edge_index.objects}
+        return self.edge_index
+
     def snap(self, obj: SnappableObject, grid_type:str) -> None:
-        """Apply simultaneous x and y snapping to the object."""
-        for anchor_point in obj.active_anchor_points:
-            if len(self.grid.x_grid_lines) != 0:
-                closest_x = min(self.grid.x_grid_lines, key=lambda gx: abs(gx - obj.get_anchor_point(anchor_point)[0]))
-            else:
-                closest_x = obj.get_anchor_point(anchor_point)[0]
+        """Align the object to the edges of the last built index (which must hold the objects of its slide)."""
+        if self.edge_index is None:
+            raise ValueError("EdgeSnapping.snap needs an edge index: call build_index with the objects of the slide "
+                             "(or use snap_batch)")
+        if self._indexed_slides and self._indexed_slides != {obj.slide_index}:
+            raise ValueError(f"The edge index holds the objects of slides {sorted(self._indexed_slides)}, "
+                             f"not of the slide of the object ({obj.slide_index})")
+        self._snap_to_index([obj], grid_type=grid_type)
+
+    def snap_batch(self, objs: Iterable[SnappableObject], grid_type:str,
+                   anchors: Optional[AnchorPositions] = None) -> None:
+        """Index the edges of the given objects and align each of them to the others."""
+        objs = list(objs)
+        self.build_index(objs)
+        self._snap_to_index(objs, grid_type=grid_type, anchors=anchors)
+
+    def _snap_to_index(self, objs: list[SnappableObject], grid_type:str,
+                       anchors: Optional[AnchorPositions] = None) -> None:
+        owners, anchor_points, positions, sizes = anchors if anchors is not None else collect_anchor_positions(objs)
+        if len(owners) == 0:
+            return
+
+        owner_index = self.edge_index.owner_index(owners)
+
+        for axis, column in (('x', 0), ('y', 1)):
+            if self.axis not in (axis, 'both'):
+                continue
+
+            # anchors sharing the same coordinate on this axis (e.g. top-left and bottom-left x) are snapped once
+            _, unique_rows = np.unique(np.stack([owner_index, positions[:, column]], axis=1), axis=0, return_index=True)
+            unique_rows = np.sort(unique_rows)
+
+            values = positions[unique_rows, column]
+            query_owners = owner_index[unique_rows]
+            find_nearest = self.edge_index.nearest_x if axis == 'x' else self.edge_index.nearest_y
+            nearest, distance, target_owners = find_nearest(values, query_owners, return_owners=True)
+
+            displacement_vectors = np.zeros((len(unique_rows), 2))
+            displacement_vectors[:, column] = nearest - values
+            within = np.isfinite(distance) & self._within_limits(displacement_vectors, sizes[unique_rows])
+
+            # two nearly aligned edges are each other's nearest: only the non-canonical object moves,
+            # otherwise both would snap to the other's edge and swap instead of aligning
+            found = target_owners >= 0
+            back, _, back_owners = find_nearest(nearest, target_owners, return_owners=True)
+            mutual = found & (back == values) & (back_owners == query_owners)
+            target_moves = mutual & self._target_within_limits(displacement_vectors, target_owners)
+            within &= ~(target_moves & (self.edge_index.ranks[np.maximum(query_owners, 0)] <
+                                        self.edge_index.ranks[np.maximum(target_owners, 0)]) & (query_owners >= 0))
+
+            for i in np.flatnonzero(within).tolist():
+                row = unique_rows[i]
+                obj = owners[row]
+                obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=anchor_points[row],
+                                                             snap_x_position=int(nearest[i]) if axis == 'x' else None,
+                                                             snap_y_position=int(nearest[i]) if axis == 'y' else None,
+                                                             snap_type=f"{self.snap_type}_{axis}",
+                                                             grid_type=grid_type))
+
+    def _target_within_limits(self, displacement_vectors: np.ndarray, target_owners: np.ndarray) -> np.ndarray:
+        """Whether the target objects could make the opposite move (not reported as rejections)."""
+        if self.limits is None or not self.limits.is_limited:
+            return np.ones(len(displacement_vectors), dtype=bool)
+        return self.limits.validate(displacement_vectors, self.edge_index.sizes[np.maximum(target_owners, 0)])
+
+
+class SpacingSnapping(Snapping):
+    """
+    Class to calculate SnapCandidates making the gaps of nearly evenly spaced rows / columns of similar objects exactly uniform
+    """
 
-            if len(self.grid.y_grid_lines) != 0:
-                closest_y = min(self.grid.y_grid_lines, key=lambda gy: abs(gy - obj.get_anchor_point(anchor_point)[1]))
-            else:
-                closest_y = obj.get_anchor_point(anchor_point)[1]
+    def __init__(self, detector: Optional[SpacingDetector] = None, axis: str = 'both',
+                 limits: Optional[SnappingLimits] = None) -> None:
+        """
+        :param detector: SpacingDetector finding the runs. If None, a default SpacingDetector is used.
+        :param axis: 'x' (rows), 'y' (columns), or 'both'
+        :param limits: SnappingLimits of the displacement
+        """
+        super().__init__(grid=None, limits=limits)
+        self.snap_type = "spacing"
+        self.detector = detector if detector is not None else SpacingDetector()
+        self.axis = axis
+
+    def snap(self, obj: SnappableObject, grid_type:str) -> None:
+        """A single object can not form a run, spacing needs the whole slide (see snap_batch)."""
+        pass
+
+    def snap_batch(self, objs: Iterable[SnappableObject], grid_type:str,
+                   anchors: Optional[AnchorPositions] = None) -> None:
+        """Detect the runs among the objects and move the inner objects of each run to the uniform positions."""
+        objs = list(objs)
+        for axis, column in (('x', 0), ('y', 1)):
+            if self.axis not in (axis, 'both'):
+                continue
+
+            for run in self.detector.detect(objs, axis):
+                displacements = run.displacements
+                displacement_vectors = np.zeros((len(run.objects), 2))
+                displacement_vectors[:, column] = displacements
+                sizes = np.array([o.sizes for o in run.objects]).reshape(-1, 2)
+
+                moved = (displacements != 0) & self._within_limits(displacement_vectors, sizes)
+
+                for i in np.flatnonzero(moved).tolist():
+                    obj = run.objects[i]
+                    target = int(run.target_starts[i])
+                    obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=AnchorPoint.TOP_LEFT,
+                                                                 snap_x_position=target if axis == 'x' else None,
+                                                                 snap_y_position=target if axis == 'y' else None,
+                                                                 snap_type=f"{self.snap_type}_{axis}",
+                                                                 grid_type=grid_type))
+
+
+class TemplateSnapping(Snapping):
+    """
+    Class to calculate SnapCandidates aligning template instances to the canonical position and size of their template
+    """
 
-            obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=anchor_point, snap_x_position=closest_x, snap_y_position=closest_y,
-                                                         snap_type = self.snap_type,
+    def __init__(self, templates: Iterable[ObjectTemplate], snap_size: bool = True, position_tolerance: float = 0.5,
+                 limits: Optional[SnappingLimits] = None) -> None:
+        """
+        :param templates: ObjectTemplates with an already created template geometry (see ObjectTemplate.create_mean_object)
+        :param snap_size: resize the instances to the canonical size of the template or not
+        :param position_tolerance: instances farther from the template position than this fraction of their size
+                                   (on any axis) are only resized, not moved
+        :param limits: SnappingLimits of the displacement
+        """
+        super().__init__(grid=None, limits=limits)
+        self.snap_type = "template"
+        self.snap_size = snap_size
+        self.position_tolerance = position_tolerance
+
+        geometries = [t.template_object for t in templates if t.template_object is not None]
+        self.template_index = {g.template_id: i for i, g in enumerate(geometries)}
+        self.template_geometry = np.array([[g.left, g.top, g.width, g.height] for g in geometries],
+                                          dtype=np.int64).reshape(-1, 4)
+
+    def snap(self, obj: SnappableObject, grid_type:str) -> None:
+        """Align a template instance to its template."""
+        self.snap_batch([obj], grid_type=grid_type)
+
+    def snap_batch(self, objs: Iterable[SnappableObject], grid_type:str,
+                   anchors: Optional[AnchorPositions] = None) -> None:
+        """Align every template instance to its template in one vectorized pass."""
+        members = [o for o in objs if o.template_snap_id in self.template_index]
+        if len(members) == 0:
+            return
+
+        targets = self.template_geometry[[self.template_index[o.template_snap_id] for o in members]]
+        current = np.array([[o.left, o.top, o.width, o.height] for o in members], dtype=np.int64)
+
+        sizes = np.maximum(current[:, 2:], 1)
+        is_near = np.all(np.abs(targets[:, :2] - current[:, :2]) <= self.position_tolerance * sizes, axis=1)
+        # the relative limits are checked against the visual bounding box sizes, as in SnappingManager
+        bbox_sizes = np.array([o.sizes for o in members], dtype=np.int64).reshape(-1, 2)
+        is_near &= self._within_limits(targets[:, :2] - current[:, :2], bbox_sizes)
+        # a size change is limited like a displacement
+        resize = self._within_limits(targets[:, 2:] - current[:, 2:], bbox_sizes) if self.snap_size \
+            else np.zeros(len(members), dtype=bool)
+        # instances of the canonical size are not resized: a no-op candidate would win over every real snap
+        resize &= np.any(targets[:, 2:] != current[:, 2:], axis=1)
+
+        # the template position is a frame position, the TOP_LEFT anchor is the corner of the visual bounding box
+        margins = np.array([o.bbox_margins for o in members], dtype=np.int64).reshape(-1, 2)
+        anchor_targets = targets[:, :2] - margins
+
+        for obj, target, anchor_target, near, resized in zip(members, targets.tolist(), anchor_targets.tolist(),
+                                                             is_near.tolist(), resize.tolist()):
+            if not near and not resized:
+                continue
+            obj.snapping_candidates.append(SnapCandidate(obj, anchor_point=AnchorPoint.TOP_LEFT,
+                                                         snap_x_position=anchor_target[0] if near else None,
+                                                         snap_y_position=anchor_target[1] if near else None,
+                                                         snap_size=(target[2], target[3]) if resized else None,
+                                                         snap_type=self.snap_type,
                                                          grid_type=grid_type))
-        
-        
+
+
 class SnappingSearch:
     """
     Class implement methods to calculate various SnappingCandidates for SnappableObjects
     """
 
-    def __init__(self, allow_x_snap = True, allow_y_snap = True):  
+    def __init__(self, allow_x_snap = True, allow_y_snap = True, instrumentation: Optional[Instrumentation] = None,
+                 limits: Optional[SnappingLimits] = None, top_k: Optional[int] = None):
+        """
+        :param limits: SnappingLimits of the SnappingManager, pushed down into the strategies (see set_limits)
+        :param top_k: if set, only the k best candidates (passing the limits) are kept per object (see CandidateHeap).
+                      Needs the limits (SnappingLimits() if the manager is not limited), otherwise the kept
+                      candidates could all be rejected by the manager.
+        """
+        if top_k is not None and limits is None:
+            raise ValueError("top_k needs the limits of the SnappingManager (SnappingLimits() if it is not limited)")
+
+        self.instrumentation = instrumentation if instrumentation is not None else get_instrumentation()
+        self.limits = limits
+        self.top_k = top_k
 
         self.allow_x_snap = allow_x_snap
         self.allow_y_snap = allow_y_snap
@@ -142,18 +553,29 @@ class SnappingSearch:
         self.x_grid = None
         self.y_grid = None
         self.joint_grid = None
-        
-        self.snapping_strategies = {}
+        self.templates = None
+        self.edge_axis = None
+        self.spacing_detector = None
+        self.spacing_axis = None
 
+        # the strategies are (re)built lazily on first use after a set_* / extend_* call
+        self._snapping_strategies = {}
+        self._strategies_outdated = False
+
+    @property
+    def snapping_strategies(self) -> dict[str, 'Snapping']:
+        if self._strategies_outdated:
+            self._update_strategies()
+        return self._snapping_strategies
 
-        
     def _update_strategies(self)-> None:
-        self.snapping_strategies = {}
+        self._strategies_outdated = False
+        self._snapping_strategies = {}
         if isinstance(self.x_grid,Grid) and self.allow_x_snap:
-            self.snapping_strategies["x"] = XSnapping(self.x_grid)
+            self._snapping_strategies["x"] = XSnapping(self.x_grid, self.limits)
             
         if isinstance(self.y_grid,Grid) and self.allow_y_snap:
-            self.snapping_strategies["y"] = XSnapping(self.y_grid)
+            self._snapping_strategies["y"] = YSnapping(self.y_grid, self.limits)
             
         if isinstance(self.x_grid,Grid) and isinstance(self.y_grid,Grid) and self.allow_x_snap and self.allow_y_snap:
             x_grid = self.x_grid.get_x_grid()
@@ -161,45 +583,137 @@ class SnappingSearch:
             
             self.joint_grid = Grid.merge_grids(x_grid, y_grid)
             
-            self.snapping_strategies["joint"] = JointSnapping(self.joint_grid)
+            self._snapping_strategies["joint"] = JointSnapping(self.joint_grid, self.limits)
+
+        if self.templates is not None:
+            self._snapping_strategies["template"] = TemplateSnapping(self.templates, limits=self.limits)
+
+        if self.edge_axis is not None:
+            self._snapping_strategies["edge"] = EdgeSnapping(self.edge_axis, limits=self.limits)
+
+        if self.spacing_axis is not None:
+            self._snapping_strategies["spacing"] = SpacingSnapping(self.spacing_detector, self.spacing_axis,
+                                                                  limits=self.limits)
+
+        for strategy in self._snapping_strategies.values():
+            strategy.instrumentation = self.instrumentation
+
+    def set_instrumentation(self, instrumentation: Instrumentation) -> None:
+        """Report to another Instrumentation (e.g. of the current run), the strategies are kept."""
+        self.instrumentation = instrumentation
+        for strategy in self._snapping_strategies.values():
+            strategy.instrumentation = instrumentation
+
+    def set_limits(self, limits: Optional[SnappingLimits]) -> None:
+        """
+        Push the displacement limits (e.g. SnappingManager.limits) down into the search:
+        anchors without a candidate inside their limit window are skipped.
+        """
+        if limits is self.limits:
+            return
+        if self.top_k is not None and limits is None:
+            raise ValueError("top_k needs the limits of the SnappingManager (SnappingLimits() if it is not limited)")
+        self.limits = limits
+        self._strategies_outdated = True
     
     
     def set_joint_grid(self,grid:Grid) -> None:
         assert isinstance(grid,Grid)
         self.x_grid = grid.get_x_grid()
         self.y_grid = grid.get_y_grid()
-        self._update_strategies()
+        self._strategies_outdated = True
             
     def set_x_grid(self,grid:Grid) -> None:
         assert isinstance(grid,Grid)
         self.x_grid = grid
-        self._update_strategies()
+        self._strategies_outdated = True
     
         
     def set_y_grid(self, grid:Grid)-> None:
         assert isinstance(grid,Grid)
         self.y_grid = grid
-        self._update_strategies()
+        self._strategies_outdated = True
     
         
+    def set_templates(self, templates: Optional[Iterable[ObjectTemplate]] = None) -> None:
+        """Enable the 'template' strategy. If templates is None, all recognized ObjectTemplates will be used."""
+        if templates is None:
+            templates = ObjectTemplates.templates.values()
+        self.templates = list(templates)
+        self._strategies_outdated = True
+
+    def _allowed_axis(self, axis: Optional[str]) -> Optional[str]:
+        snap_x = axis in ('x', 'both') and self.allow_x_snap
+        snap_y = axis in ('y', 'both') and self.allow_y_snap
+
+        if snap_x and snap_y:
+            return 'both'
+        if snap_x or snap_y:
+            return 'x' if snap_x else 'y'
+        return None
+
+    def set_edge_snapping(self, axis: Optional[str] = 'both') -> None:
+        """Enable the object-to-object 'edge' strategy along the given axis ('x', 'y' or 'both'), or disable it with None."""
+        self.edge_axis = self._allowed_axis(axis)
+        self._strategies_outdated = True
+
+    def set_spacing_snapping(self, detector: Optional[SpacingDetector] = None, axis: Optional[str] = 'both') -> None:
+        """Enable the equal-spacing 'spacing' strategy along the given axis ('x', 'y' or 'both'), or disable it with None."""
+        self.spacing_detector = detector
+        self.spacing_axis = self._allowed_axis(axis)
+        self._strategies_outdated = True
+
     def extend_x_grid(self, grid:Grid)-> None:
         assert isinstance(grid,Grid)
-        self.x_grid.extend(grid)
-        self._update_strategies()
+        # merged, as an explicit grid can not keep the lattices of an implicit one
+        self.x_grid = Grid.merge_grids(self.x_grid, grid)
+        self._strategies_outdated = True
     
     
     def extend_y_grid(self, grid:Grid)-> None:
         assert isinstance(grid,Grid)
-        self.y_grid.extend(grid)
-        self._update_strategies()
+        # merged, as an explicit grid can not keep the lattices of an implicit one
+        self.y_grid = Grid.merge_grids(self.y_grid, grid)
+        self._strategies_outdated = True
     
     
-    def calculate_candidates_for_all_obj(self, slide:Slide, strategy_type: str, flush = False, grid_type:str = "unknown"):
-        """Apply the given snapping strategy (x, y, or joint) for all SnappableObject on a given Slide"""
+    def _bound_candidates(self, obj: SnappableObject) -> None:
+        """Replace the candidate list of the object with a CandidateHeap if top_k is set."""
+        if self.top_k is not None and not isinstance(obj.snapping_candidates, CandidateHeap):
+            obj.snapping_candidates = CandidateHeap(self.top_k, self.limits, obj.snapping_candidates)
+
+    @staticmethod
+    def _num_of_offered_candidates(obj: SnappableObject) -> int:
+        """Number of candidates offered to the object so far (a CandidateHeap retains only some of them)"""
+        candidates = obj.snapping_candidates
+        return candidates.offered if isinstance(candidates, CandidateHeap) else len(candidates)
+
+    def calculate_candidates_for_all_obj(self, slide:Slide, strategy_type: str, flush = False, grid_type:str = "unknown",
+                                         anchors: Optional[AnchorPositions] = None):
+        """
+        Apply the given snapping strategy (x, y, or joint) for all SnappableObject on a given Slide
+        :param anchors: collect_anchor_positions of the objects of the slide, collected by the strategy if None
+        """
         assert isinstance(slide,Slide)
-        
-        for so in slide.snappable_objects:
-            self.calculate_candidates(so,strategy_type=strategy_type,flush=flush, grid_type= grid_type)
+
+        strategy = self.snapping_strategies.get(strategy_type)
+        if isinstance(strategy,Snapping):
+            for so in slide.snappable_objects:
+                if flush:
+                    so.snapping_candidates.clear()
+                self._bound_candidates(so)
+
+            if not self.instrumentation.enabled:
+                strategy.snap_batch(slide.snappable_objects, grid_type=grid_type, anchors=anchors)
+                return
+
+            num_of_candidates = sum(self._num_of_offered_candidates(so) for so in slide.snappable_objects)
+            with self.instrumentation.timer("candidates", slide=slide.slide_index, strategy=strategy_type, grid=grid_type):
+                strategy.snap_batch(slide.snappable_objects, grid_type=grid_type, anchors=anchors)
+            num_of_candidates = sum(self._num_of_offered_candidates(so) for so in slide.snappable_objects) - \
+                num_of_candidates
+            self.instrumentation.count("candidates_generated", num_of_candidates,
+                                       slide=slide.slide_index, strategy=strategy_type, grid=grid_type)
             
     
     def calculate_candidates(self, obj: SnappableObject, strategy_type: str, flush = False, grid_type:str = "unknown"):
@@ -211,8 +725,13 @@ class SnappingSearch:
             if isinstance(strategy,Snapping):
                 if flush:
                     obj.snapping_candidates.clear()
-                    
+                self._bound_candidates(obj)
+
+                num_of_candidates = self._num_of_offered_candidates(obj)
                 strategy.snap(obj,grid_type=grid_type)
+                self.instrumentation.count("candidates_generated",
+                                           self._num_of_offered_candidates(obj) - num_of_candidates,
+                                           slide=obj.slide_index, strategy=strategy_type, grid=grid_type)
     
 
 class SnappingManager:
@@ -225,57 +744,135 @@ class SnappingManager:
                  x_limit:Optional[Length] = None,
                  y_limit:Optional[Length] = None,
                  x_relative_limit: Optional[float] = None,
-                 y_relative_limit: Optional[float] = None)->None:
+                 y_relative_limit: Optional[float] = None,
+                 instrumentation: Optional[Instrumentation] = None)->None:
 
         self.reader = reader
-        self.fix_limit = np.array([l.emu if isinstance(l,Length) else l for l in [x_limit,y_limit] ])
-        self.rel_limit = np.array([x_relative_limit,y_relative_limit])
+        self.instrumentation = instrumentation if instrumentation is not None else get_instrumentation()
+        self.limits = SnappingLimits(x_limit, y_limit, x_relative_limit, y_relative_limit)
+
+    @property
+    def fix_limit(self) -> np.ndarray:
+        return self.limits.fix_limit
+
+    @property
+    def rel_limit(self) -> np.ndarray:
+        return self.limits.rel_limit
 
+    def push_limits(self, *searches: 'SnappingSearch') -> None:
+        """
+        Share the limits of the manager with the searches, so their windowed candidate search prunes exactly
+        the candidates the manager would reject.
+        """
+        for search in searches:
+            search.set_limits(self.limits)
 
     def _validate_displacement(self, displacement_vector:np.ndarray) -> bool:
-        if np.all(self.fix_limit == None): return True
-
-        invalid_indices = np.isnan(self.fix_limit)
-        return np.all(np.less_equal(displacement_vector[~invalid_indices],self.fix_limit[~invalid_indices]))
+        return bool(self.limits.validate_displacement(displacement_vector))
 
     def _validate_relative_displacement(self, rel_displacement_vector:np.ndarray) -> bool:
-        if np.all(self.rel_limit == None): return True
+        return bool(self.limits.validate_relative_displacement(rel_displacement_vector))
+
+    def compute_snaps(self) -> ChangeSet:
+        """Select the best valid SnapCandidate of every object without touching the presentation (dry run)."""
+        change_set = ChangeSet()
+        with self.instrumentation.timer("compute_snaps"):
+            for slide_index, slide in enumerate(self.reader.slides):
+                with self.instrumentation.timer("compute_snaps_slide", slide=slide_index):
+                    change_set.extend(self.select_slide_snaps(slide))
+        return change_set
+
+    def apply_snaps(self, dry_run: bool = False) -> ChangeSet:
+        """
+        Select the best valid SnapCandidate of every object and apply them on the presentation.
+        :param dry_run: only compute the ChangeSet, do not modify the presentation
+        :return: the ChangeSet of the selected snaps
+        """
+        change_set = self.compute_snaps()
+        if not dry_run:
+            self.apply_change_set(change_set)
+        return change_set
+
+    def apply_change_set(self, change_set: ChangeSet) -> int:
+        """Apply a (possibly previously computed and stored) ChangeSet on the presentation."""
+        with self.instrumentation.timer("apply_change_set"):
+            applied = change_set.apply_to(self.reader.presentation)
+        self.instrumentation.count("applied", applied)
+        return applied
+
+    def select_slide_snaps(self, slide: Slide) -> list[Change]:
+        """Select the best valid SnapCandidate of every object on a slide as Changes."""
+        changes = []
+        rejected_absolute = 0
+        rejected_relative = 0
 
-        invalid_indices = np.isnan(self.rel_limit)
-        return np.all(np.less_equal(rel_displacement_vector[~invalid_indices],self.rel_limit[~invalid_indices]))
+        for so in slide.snappable_objects:
+            valid_candidates = []
+            for sc in so.snapping_candidates:
+                if not isinstance(sc,SnapCandidate):
+                    continue
 
-    def apply_snaps(self):
-        for slide_index, slide in enumerate(self.reader.slides):
-            for so in slide.snappable_objects:
-                valid_candidates = []
-                for sc in so.snapping_candidates:
-                    if not isinstance(sc,SnapCandidate):
-                        continue
+                # a size change is limited like a displacement
+                if not (self._validate_displacement(sc.displacement_vector) and
+                        self._validate_displacement(sc.size_delta)):
+                    rejected_absolute += 1
+                    continue
 
-                    if not self._validate_displacement(sc.displacement_vector):
-                        continue
+                if not (self._validate_relative_displacement(sc.relative_displacement_vector) and
+                        self._validate_relative_displacement(sc.relative_size_delta)):
+                    rejected_relative += 1
+                    continue
 
-                    if not self._validate_relative_displacement(sc.relative_displacement_vector):
-                        continue
+                valid_candidates.append(sc)
 
-                    valid_candidates.append(sc)
+            valid_candidates.sort(key=lambda x: x.displacement)
 
-                valid_candidates.sort(key=lambda x: x.displacement)
+            if len(valid_candidates)==0:
+                continue
 
-                if len(valid_candidates)==0:
-                    continue
+            best_candidate = valid_candidates[0]
 
-                best_candidate = valid_candidates[0]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: %s", so.full_id, best_candidate)
 
-                print(best_candidate)
+            dx, dy = np.rint(best_candidate.displacement_vector).astype(int)
+            dw, dh = best_candidate.size_delta
+            if dx == 0 and dy == 0 and dw == 0 and dh == 0:
+                continue  # already in place, not an edit
 
-                self.reader.presentation.slides[so.slide_index].shapes[so.shape_index].left +=best_candidate.displacement_vector[0]
-                self.reader.presentation.slides[so.slide_index].shapes[so.shape_index].top +=best_candidate.displacement_vector[1]
+            changes.append(Change(slide_index=so.slide_index, shape_id=so.shape_id, dx=dx, dy=dy, dw=dw, dh=dh,
+                                  anchor_point=best_candidate.anchor_point.value,
+                                  grid_type=best_candidate.grid_type,
+                                  snap_type=best_candidate.snap_type))
 
+        self.instrumentation.count("rejected_absolute_limit", rejected_absolute, slide=slide.slide_index)
+        self.instrumentation.count("rejected_relative_limit", rejected_relative, slide=slide.slide_index)
+        self.instrumentation.count("selected", len(changes), slide=slide.slide_index)
+        return changes
 
 
-    def save_at(self, out_path):
-        if not os.path.exists(os.path.basename(out_path)):
-            os.mkdir(os.path.basename(out_path))
 
-        self.reader.presentation.save(out_path)
\ No newline at end of file
+    def save_at(self, out_path, compression_level: Optional[int] = None, store_only: bool = False,
+                workers: Optional[int] = None, parallel: bool = False):
+        """
+        Save the presentation with python-pptx, or compressing the package members in parallel threads
+        (see ParallelPackageWriter) if parallel is set. The parallel writer is opt-in: on a single CPU it is slower
+        than python-pptx.
+        :param compression_level: zlib level (0-9), the zlib default if None (parallel writer only)
+        :param store_only: store the members without compression, e.g. for intermediate artifacts (parallel writer only)
+        :param workers: number of compression threads, the ThreadPoolExecutor default if None (parallel writer only)
+        :param parallel: save with the ParallelPackageWriter
+        """
+        if not parallel and (compression_level is not None or store_only or workers is not None):
+            raise ValueError("compression_level, store_only and workers are options of the parallel writer "
+                             "(parallel=True)")
+
+        out_dir = os.path.dirname(out_path)
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+
+        with self.instrumentation.timer("save"):
+            if parallel:
+                save_presentation(self.reader.presentation, out_path, compression_level, store_only, workers)
+            else:
+                self.reader.presentation.save(out_path)
\ No newline at end of file
@@ -0,0 +1,197 @@
+from collections import deque
+from typing import Iterable, Optional
+
+import numpy as np
+
+from pptx.util import Mm
+
+from .snappable_object import SnappableObject
+from .object_recognizer import ObjectRecognizer
+
+
+class SpacingRun:
+    """
+    A row (axis 'x') or column (axis 'y') of similar objects with near-equal gaps,
+    together with the positions that make the spacing exactly uniform (first and last objects stay in place)
+    """
+
+    def __init__(self, axis: str, objects: list[SnappableObject], starts: np.ndarray, ends: np.ndarray):
+        self.axis = axis
+        self.objects = objects
+        self.starts = starts
+        self.ends = ends
+
+    @property
+    def gaps(self) -> np.ndarray:
+        return self.starts[1:] - self.ends[:-1]
+
+    @property
+    def uniform_gap(self) -> float:
+        lengths = self.ends - self.starts
+        return (self.ends[-1] - self.starts[0] - lengths.sum()) / (len(self.objects) - 1)
+
+    @property
+    def target_starts(self) -> np.ndarray:
+        """Start positions (left or top) resulting in exactly uniform gaps."""
+        lengths = self.ends - self.starts
+        offsets = np.concatenate([[0], np.cumsum(lengths[:-1] + self.uniform_gap)])
+        targets = np.rint(self.starts[0] + offsets).astype(np.int64)
+        targets[-1] = self.starts[-1]
+        return targets
+
+    @property
+    def displacements(self) -> np.ndarray:
+        return self.target_starts - self.starts
+
+    def __str__(self) -> str:
+        return (f"SpacingRun of {len(self.objects)} objects along axis '{self.axis}' "
+                f"with gaps {self.gaps.tolist()} -> {self.uniform_gap:.1f}")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class SpacingDetector:
+    """
+    Class to detect runs of similar objects with near-equal gaps along an axis.
+    Works by sorting the objects into lines and sweeping each line, never by testing all pairs or triples of a slide,
+    so it takes O(n log n) per slide.
+    """
+
+    def __init__(self,
+                 object_recognizer: Optional[ObjectRecognizer] = None,
+                 gap_tolerance: float = 0.2,
+                 min_gap_tolerance: int = Mm(1),
+                 alignment_tolerance: float = 0.25,
+                 min_run_length: int = 3):
+        """
+        :param object_recognizer: ObjectRecognizer deciding which objects belong together.
+                                  If None, a size recognizer (with 0.9 threshold) is used.
+        :param gap_tolerance: allowed deviation of the gaps from the middle of their range, relative to the largest gap
+                              (below 0.5)
+        :param min_gap_tolerance: allowed deviation of a gap (EMU) when the relative tolerance would be smaller
+        :param alignment_tolerance: allowed offset of the objects on the cross axis, relative to their cross size
+        :param min_run_length: minimal number of objects in a run
+        """
+        self.object_recognizer = object_recognizer if object_recognizer is not None \
+            else ObjectRecognizer.get_size_recognizer(0.9)
+        self.gap_tolerance = gap_tolerance
+        self.min_gap_tolerance = min_gap_tolerance
+        self.alignment_tolerance = alignment_tolerance
+        self.min_run_length = max(min_run_length, 3)
+
+    def group_similar_objects(self, objs: Iterable[SnappableObject]) -> list[list[SnappableObject]]:
+        """
+        Group the objects by sorting them on (type, width, height) and sweeping:
+        an object joins the first open group of its type whose representative (first member) the recognizer
+        validates it against, so an object of another size sorted in between does not split a group.
+        """
+        groups = []
+        open_groups = []
+        shape_type = None
+        for obj in sorted(objs, key=lambda o: (o.shape_type, o.width, o.height)):
+            if obj.shape_type != shape_type:
+                shape_type = obj.shape_type
+                open_groups = []
+
+            group = next((g for g in open_groups if all(self.object_recognizer.validate(g[0], obj))), None)
+            if group is None:
+                group = []
+                open_groups.append(group)
+                groups.append(group)
+            group.append(obj)
+        return [g for g in groups if len(g) >= self.min_run_length]
+
+    def _split_lines(self, objs: list[SnappableObject], axis: str) -> list[list[SnappableObject]]:
+        """Split a group into rows (axis 'x') or columns (axis 'y') by sweeping along the cross axis."""
+        if axis == 'x':
+            cross = np.array([[o.center[1], o.bbox_height] for o in objs], dtype=np.float64)
+        else:
+            cross = np.array([[o.center[0], o.bbox_width] for o in objs], dtype=np.float64)
+
+        order = np.argsort(cross[:, 0], kind="stable")
+        lines = []
+        previous = None
+        for i in order.tolist():
+            if previous is None or \
+                    cross[i, 0] - cross[previous, 0] > self.alignment_tolerance * min(cross[i, 1], cross[previous, 1]):
+                lines.append([])
+            lines[-1].append(objs[i])
+            previous = i
+        return [line for line in lines if len(line) >= self.min_run_length]
+
+    def _gap_tolerance(self, max_gap: float) -> float:
+        return max(self.gap_tolerance * abs(max_gap), self.min_gap_tolerance)
+
+    def _find_runs(self, line: list[SnappableObject], axis: str) -> list[SpacingRun]:
+        """
+        Sweep the sorted objects of a line and cut it into maximal runs of near-equal, non-negative gaps.
+        A run is judged by its overall gap spread: the largest and smallest gap differ by at most twice the tolerance
+        of the largest gap. Growing a run can only break this and shrinking it can only restore it
+        (for a relative tolerance below 0.5), so a two-pointer sweep keeping the running minimum and maximum gap
+        in monotonic deques finds the runs in O(n).
+        """
+        if axis == 'x':
+            extents = np.array([[o.bbox_left, o.bbox_right] for o in line], dtype=np.int64)
+        else:
+            extents = np.array([[o.bbox_top, o.bbox_bottom] for o in line], dtype=np.int64)
+
+        order = np.argsort(extents[:, 0], kind="stable")
+        extents = extents[order]
+        line = [line[i] for i in order.tolist()]
+        gaps = (extents[1:, 0] - extents[:-1, 1]).tolist()
+
+        runs = []
+
+        def close_run(run_start: int, run_end: int) -> bool:
+            # the run covers gaps [run_start, run_end) that is objects [run_start, run_end]
+            if run_end - run_start + 1 < self.min_run_length:
+                return False
+            runs.append(SpacingRun(axis, line[run_start:run_end + 1],
+                                   extents[run_start:run_end + 1, 0], extents[run_start:run_end + 1, 1]))
+            return True
+
+        run_start = 0
+        min_gaps, max_gaps = deque(), deque()  # gap indices with increasing / decreasing gaps
+        for run_end, gap in enumerate(gaps):
+            if gap < 0:
+                close_run(run_start, run_end)
+                run_start = run_end + 1
+                min_gaps.clear()
+                max_gaps.clear()
+                continue
+
+            while min_gaps and gaps[min_gaps[-1]] >= gap:
+                min_gaps.pop()
+            min_gaps.append(run_end)
+            while max_gaps and gaps[max_gaps[-1]] <= gap:
+                max_gaps.pop()
+            max_gaps.append(run_end)
+
+            while gaps[max_gaps[0]] - gaps[min_gaps[0]] > 2 * self._gap_tolerance(gaps[max_gaps[0]]):
+                if close_run(run_start, run_end):
+                    # the next run starts after the last object of this one, runs do not share objects
+                    run_start = run_end + 1
+                    min_gaps.clear()
+                    max_gaps.clear()
+                    break
+                run_start += 1
+                if min_gaps[0] < run_start:
+                    min_gaps.popleft()
+                if max_gaps[0] < run_start:
+                    max_gaps.popleft()
+
+        close_run(run_start, len(gaps))
+        return runs
+
+    def detect(self, objs: Iterable[SnappableObject], axis: str = 'x') -> list[SpacingRun]:
+        """
+        Detect the runs of similar objects with near-equal gaps along the given axis ('x' or 'y').
+        """
+        assert axis in ('x', 'y')
+
+        runs = []
+        for group in self.group_similar_objects(objs):
+            for line in self._split_lines(group, axis):
+                runs.extend(self._find_runs(line, axis))
+        return runs
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+
+from pptx.util import Mm
+
+from .snappable_object import SnappableObject
+from .templates import ObjectTemplate
+
+
+class LibraryEntry:
+    """
+    A component of the TemplateLibrary: signature, canonical (mean) size and usage statistics
+    """
+
+    def __init__(self, signature: str, shape_type: str, count: int = 0, width_sum: int = 0, height_sum: int = 0,
+                 decks: Iterable[str] = (), example_name: str = ""):
+        self.signature = signature
+        self.shape_type = shape_type
+        self.count = count
+        self.width_sum = width_sum
+        self.height_sum = height_sum
+        self.decks = set(decks)
+        self.example_name = example_name
+
+    @property
+    def num_of_decks(self) -> int:
+        return len(self.decks)
+
+    @property
+    def width(self) -> int:
+        return int(round(self.width_sum / self.count)) if self.count else 0
+
+    @property
+    def height(self) -> int:
+        return int(round(self.height_sum / self.count)) if self.count else 0
+
+    def add(self, obj: SnappableObject, deck_id: Optional[str] = None) -> None:
+        self.count += 1
+        self.width_sum += int(obj.width)
+        self.height_sum += int(obj.height)
+        if not self.example_name:
+            self.example_name = obj.name
+        if deck_id is not None:
+            self.decks.add(deck_id)
+
+    def to_dict(self) -> dict:
+        return OrderedDict(signature=self.signature, shape_type=self.shape_type, count=self.count,
+                           width_sum=self.width_sum, height_sum=self.height_sum, decks=sorted(self.decks),
+                           example_name=self.example_name)
+
+    def __str__(self):
+        return (f"LibraryEntry '{self.signature}' of type '{self.shape_type}' with size of [{self.width} x {self.height}] "
+                f"seen {self.count} times in {self.num_of_decks} decks")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class TemplateLibrary:
+    """
+    Persistent, incrementally updated library of recurring components keyed by compact signatures
+    (shape type + quantized width and height, optionally text length and name).
+    Objects of new decks are matched by a hash lookup in O(1) instead of pairwise recognition.
+    As a size near the border of two quantization buckets may round either way, the neighbouring buckets are probed too.
+    """
+
+    def __init__(self, size_quantum: int = Mm(1), use_text_length: bool = False, use_name: bool = False):
+        """
+        :param size_quantum: width and height are quantized to multiples of this (EMU)
+        :param use_text_length: add the (log2 bucketed) text length of text objects to the signature
+        :param use_name: add the name of the shape without the trailing number (e.g. 'Rectangle 12' -> 'rectangle')
+        """
+        self.size_quantum = max(int(size_quantum), 1)
+        self.use_text_length = use_text_length
+        self.use_name = use_name
+
+        self.entries: OrderedDict[str, LibraryEntry] = OrderedDict()
+
+    def _buckets(self, obj: SnappableObject) -> tuple[int, int]:
+        return int(round(obj.width / self.size_quantum)), int(round(obj.height / self.size_quantum))
+
+    def signature(self, obj: SnappableObject, buckets: Optional[tuple[int, int]] = None) -> str:
+        """Signature of the object (in the given width and height buckets instead of its own, if set)."""
+        width_bucket, height_bucket = buckets if buckets is not None else self._buckets(obj)
+        parts = [obj.shape_type, str(width_bucket), str(height_bucket)]
+
+        if self.use_text_length:
+            text_length = len(obj.text) if obj.is_text else 0
+            parts.append(f"t{int(np.log2(text_length + 1))}")
+
+        if self.use_name:
+            parts.append(re.sub(r"[\s_\-]*\d+$", "", obj.name).strip().lower())
+
+        return "|".join(parts)
+
+    def update(self, objects: Iterable[SnappableObject], deck_id: Optional[str] = None) -> None:
+        """
+        Add the objects of a (new) deck to the library.
+        :param deck_id: id of the deck (e.g. a hash of the file), each deck is counted once per entry
+        """
+        for obj in objects:
+            entry = self.match(obj)
+            if entry is None:
+                key = self.signature(obj)
+                entry = LibraryEntry(key, obj.shape_type)
+                self.entries[key] = entry
+            entry.add(obj, deck_id)
+
+    def match(self, obj: SnappableObject) -> Optional[LibraryEntry]:
+        """
+        Find the library entry of an object by its signature, probing the neighbouring size buckets too.
+        Of the entries whose canonical size is within one quantum of the object, the nearest one is returned.
+        """
+        width_bucket, height_bucket = self._buckets(obj)
+        best, best_distance = None, None
+        for dw in (0, -1, 1):
+            for dh in (0, -1, 1):
+                entry = self.entries.get(self.signature(obj, (width_bucket + dw, height_bucket + dh)))
+                if entry is None:
+                    continue
+                width_distance, height_distance = abs(entry.width - obj.width), abs(entry.height - obj.height)
+                if max(width_distance, height_distance) > self.size_quantum:
+                    continue
+                if best is None or width_distance + height_distance < best_distance:
+                    best, best_distance = entry, width_distance + height_distance
+        return best
+
+    def assign_templates(self, objects: Iterable[SnappableObject], min_count: int = 2,
+                         registry: Optional[OrderedDict] = None) -> list[ObjectTemplate]:
+        """
+        Create an ObjectTemplate for every library entry (seen at least min_count times) matching the objects.
+        The template geometry gets the canonical size of the library entry.
+        :param registry: dict receiving the templates by id (e.g. the template registry of a run), if set.
+                         The global ObjectTemplates.templates is never modified.
+        """
+        members = OrderedDict()
+        for obj in objects:
+            entry = self.match(obj)
+            if entry is None or entry.count < min_count:
+                continue
+            members.setdefault(entry.signature, []).append(obj)
+
+        templates = []
+        for signature, instances in members.items():
+            entry = self.entries[signature]
+            template = ObjectTemplate(shape_type=entry.shape_type, template_id=f"library_{signature}")
+            for instance in instances:
+                template.add_instance(instance)
+            template.create_mean_object()
+            template.template_object.width = entry.width
+            template.template_object.height = entry.height
+
+            if registry is not None:
+                registry[template.template_id] = template
+            templates.append(template)
+
+        return templates
+
+    def to_dict(self) -> dict:
+        return OrderedDict(size_quantum=self.size_quantum,
+                           use_text_length=self.use_text_length,
+                           use_name=self.use_name,
+                           entries=[e.to_dict() for e in self.entries.values()])
+
+    @staticmethod
+    def from_dict(data: dict) -> 'TemplateLibrary':
+        library = TemplateLibrary(size_quantum=data["size_quantum"],
+                                  use_text_length=data["use_text_length"],
+                                  use_name=data["use_name"])
+        for entry_data in data["entries"]:
+            entry = LibraryEntry(**entry_data)
+            library.entries[entry.signature] = entry
+        return library
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> 'TemplateLibrary':
+        with open(path) as f:
+            return TemplateLibrary.from_dict(json.load(f))
+
+    @staticmethod
+    def open(path: str, **kwargs) -> 'TemplateLibrary':
+        """
+        Load the library if the file exists, otherwise create an empty one with the given settings.
+        The settings of an existing library can not be changed (its signatures depend on them), so settings
+        differing from the stored ones raise a ValueError.
+        """
+        if not os.path.exists(path):
+            return TemplateLibrary(**kwargs)
+
+        library = TemplateLibrary.load(path)
+        expected = TemplateLibrary(**kwargs)
+        stored_settings = {k: getattr(library, k) for k in kwargs}
+        requested_settings = {k: getattr(expected, k) for k in kwargs}
+        if stored_settings != requested_settings:
+            raise ValueError(f"The template library at {path} was created with {stored_settings}, "
+                             f"not {requested_settings}")
+        return library
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return f"TemplateLibrary with {len(self.entries)} entries"
@@ -1,12 +1,41 @@
+import itertools
 from collections import OrderedDict
-from copy import deepcopy
-from typing import Iterable
+from typing import Iterable, Optional
 
 import pandas as pd
 import numpy as np
 
 from .snappable_object import SnappableObject
 from .object_recognizer import ObjectRecognizer
+from .instrumentation import Instrumentation, get_instrumentation
+
+
+class TemplateGeometry:
+    """
+    Plain geometry record of a template: mean position, canonical size and the ids of the member objects
+    """
+
+    def __init__(self, template_id: str, shape_type: str, left: int, top: int, width: int, height: int,
+                 member_ids: list[str]):
+        self.template_id = template_id
+        self.shape_type = shape_type
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.member_ids = member_ids
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.array([self.width, self.height])
+
+    def __str__(self):
+        return (f"TemplateGeometry '{self.template_id}' of type '{self.shape_type}' @ [{self.left};{self.top}] "
+                f"with size of [{self.width} x {self.height}] and {len(self.member_ids)} members")
+
+    def __repr__(self):
+        return self.__str__()
+
 
 class ObjectTemplate():
     def __init__(self, shape_type:str,  template_id:str):
@@ -19,11 +48,11 @@ class ObjectTemplate():
         self.validate_functions = [self.validate_shape_type]
 
     @property
-    def template_object(self):
+    def template_object(self) -> TemplateGeometry:
         return self._template_object
 
     @template_object.setter
-    def template_object(self, value:SnappableObject):
+    def template_object(self, value:TemplateGeometry):
         self._template_object = value
 
     def validate_shape_type(self,obj: SnappableObject) -> bool:
@@ -36,7 +65,7 @@ class ObjectTemplate():
         if not isinstance(obj,SnappableObject):
             return False
 
-        if not all([lambda v:v(obj) for v in self.validate_functions if callable(v)]):
+        if not all([v(obj) for v in self.validate_functions if callable(v)]):
             return False
 
         self.instances.append(obj)
@@ -45,21 +74,19 @@ class ObjectTemplate():
 
     def create_mean_object(self) -> None:
         """
-        Returns a template a 'dummy' SnappableObject
+        Creates the TemplateGeometry of the template: mean position and canonical (median) size of the instances
         """
         if len(self.instances) == 0:
             return
 
-        sample_shape = deepcopy(self.instances[0].shape)
+        geometry = np.array([[i.left, i.top, i.width, i.height] for i in self.instances], dtype=np.float64)
 
-        x = np.mean([i.top for i in self.instances]).astype(int)
-        y = np.mean([i.left for i in self.instances]).astype(int)
+        left, top = np.rint(geometry[:, :2].mean(axis=0)).astype(int)
+        width, height = np.rint(np.median(geometry[:, 2:], axis=0)).astype(int)
 
-        template_object = SnappableObject(shape = sample_shape, slide_index = -1,shape_index =-1, is_template=True)
-        template_object.left = x
-        template_object.top = y
-
-        self.template_object = template_object
+        self.template_object = TemplateGeometry(template_id=self.template_id, shape_type=self.shape_type,
+                                                left=int(left), top=int(top), width=int(width), height=int(height),
+                                                member_ids=[i.full_id for i in self.instances])
 
     def __str__(self):
         return f"ObjectTemplate with {len(self.instances)} objects of type '{self.shape_type}'"
@@ -69,24 +96,58 @@ class ObjectTemplate():
 
 class ObjectTemplates:
     templates = OrderedDict()
+    # template ids are unique across all registries (global and per run), as instances refer to them
+    _template_ids = itertools.count()
 
     @staticmethod
-    def add_new_template(shape_type:str):
-        template = ObjectTemplate(shape_type=shape_type, template_id=f"template_{len(ObjectTemplates.templates)}")
-        ObjectTemplates.templates[template.template_id] = template
+    def add_new_template(shape_type:str, registry: Optional[OrderedDict] = None):
+        """Create a new template in the registry (ObjectTemplates.templates if None)."""
+        if registry is None:
+            registry = ObjectTemplates.templates
+        template = ObjectTemplate(shape_type=shape_type,
+                                  template_id=f"template_{next(ObjectTemplates._template_ids)}")
+        registry[template.template_id] = template
         return template
 
     @staticmethod
     def recognize_templates(list_of_objects: Iterable[SnappableObject] | None,
                             object_recognizer: ObjectRecognizer,
-                            min_num_of_re_occurrences:int = 2):
+                            min_num_of_re_occurrences:int = 2,
+                            instrumentation: Optional[Instrumentation] = None,
+                            registry: Optional[OrderedDict] = None):
         """
         Method to automatically recognize repeated object (with the same type, and some criteria)
         :param list_of_objects: List of SnappableObjects or None. If None, all initialized SanppableObjects will be used.
         :param object_recognizer: ObjectRecognizer that validates object similarity
         :param min_num_of_re_occurrences: Minimal number of re-occurrence.
+        :param instrumentation: Instrumentation receiving the timing and the number of found templates.
+                                If None, the default Instrumentation will be used.
+        :param registry: dict receiving the new templates by id (e.g. for a single deck).
+                         If None, the templates are added to ObjectTemplates.templates.
         :return:
         """
+        if instrumentation is None:
+            instrumentation = get_instrumentation()
+
+        with instrumentation.timer("recognize_templates"):
+            template_candidates = ObjectTemplates._search_template_candidates(list_of_objects, object_recognizer,
+                                                                              min_num_of_re_occurrences)
+
+            for template_candidate_index, template_candidate in enumerate(template_candidates):
+                shape_type = template_candidate[0].shape_type
+                template = ObjectTemplates.add_new_template(shape_type, registry)
+                for instance_index, instance in enumerate(template_candidate):
+                    template.add_instance(instance)
+                    instance.template_snap_id = template.template_id
+                template.create_mean_object()
+
+        instrumentation.count("templates_found", len(template_candidates))
+        return True
+
+    @staticmethod
+    def _search_template_candidates(list_of_objects: Iterable[SnappableObject] | None,
+                                    object_recognizer: ObjectRecognizer,
+                                    min_num_of_re_occurrences:int) -> list[list[SnappableObject]]:
 
         if not list_of_objects:
             list_of_objects = SnappableObject.catalog
@@ -151,11 +212,4 @@ class ObjectTemplates:
                     break
                 pivot_index = untouched_indices[is_untouched.index(True)]
 
-        for template_candidate_index, template_candidate in enumerate(template_candidates):
-            shape_type = template_candidate[0].shape_type
-            template = ObjectTemplates.add_new_template(shape_type)
-            for instance_index, instance in enumerate(template_candidate):
-                template.add_instance(instance)
-                instance.template_snap_id = template.template_id
-            template.create_mean_object()
-        return True
\ No newline at end of file
+        return template_candidates
\ No newline at end of file
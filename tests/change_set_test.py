@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper.change_set import Change, ChangeSet
+from pptx_snapper.grid import Grid
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnappingSearch, SnappingManager
+from pptx_snapper.utils import AnchorPoint
+
+
+def _create_presentation():
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(1), Cm(1), Cm(4), Cm(2))
+    slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(6), Cm(1), Cm(4), Cm(2))
+    return presentation
+
+
+def test_round_trip(tmp_path):
+    change_set = ChangeSet([Change(0, 2, 100, -50, "top-left", "basic", "joint"),
+                            Change(0, 3, 0, 25, "center", "kmeans", "y", dw=10, dh=-10)])
+
+    for file_name in ["changes.json", "changes.npy"]:
+        path = str(tmp_path / file_name)
+        change_set.save(path)
+        loaded = ChangeSet.load(path)
+        assert [c.to_dict() for c in loaded] == [c.to_dict() for c in change_set]
+
+
+def test_apply_to():
+    presentation = _create_presentation()
+    shapes = presentation.slides[0].shapes
+    first, second = shapes[0], shapes[1]
+
+    change_set = ChangeSet([Change(0, second.shape_id, 100, -50, "top-left", "basic", dw=10),
+                            Change(0, 9999, 100, 100, "top-left", "basic")])
+
+    assert change_set.apply_to(presentation) == 1
+    assert (first.left, first.top) == (Cm(1), Cm(1))
+    assert (second.left, second.top, second.width) == (Cm(6) + 100, Cm(1) - 50, Cm(4) + 10)
+
+
+def test_no_op_changes_are_skipped(tmp_path):
+    path = str(tmp_path / "deck.pptx")
+    presentation = _create_presentation()
+    presentation.slides[0].shapes[1].left = Cm(6) + 100
+    presentation.save(path)
+
+    reader = PPTXReader(path)
+    slide = reader.slides[0]
+    for obj in slide.snappable_objects:
+        obj.active_anchor_points = [AnchorPoint.TOP_LEFT]
+
+    grid = Grid(slide.slide_width, slide.slide_height, -1, -1)
+    grid.x_grid_lines = [Cm(1), Cm(6)]
+    grid.y_grid_lines = [Cm(1)]
+
+    search = SnappingSearch()
+    search.set_joint_grid(grid)
+    search.calculate_candidates_for_all_obj(slide, "joint")
+
+    # the first shape is already on the grid: only the second one is changed
+    changes = SnappingManager(reader).compute_snaps().changes
+    assert [(c.shape_id, c.dx, c.dy) for c in changes] == [(slide.snappable_objects[1].shape_id, -100, 0)]
@@ -0,0 +1,107 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import OrderedDict
+
+import numpy as np
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.config import compile_config
+from pptx_snapper.instrumentation import Instrumentation, MetricsSink
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.templates import ObjectTemplates
+
+
+def _config(strategies):
+    return dict(grids=dict(deck=dict(type="deck", n_clusters=4), layout=dict(type="layout", columns=4, rows=4)),
+                anchors=["top-left", "center"],
+                strategies=strategies,
+                limits=dict(x_relative_limit=.2, y_relative_limit=.2),
+                recognizers=dict(templates=dict(type="size", size_threshold=.9, min_num_of_re_occurrences=2)))
+
+
+def _create_deck(path, num_of_slides=2, seed=0):
+    rng = np.random.default_rng(seed)
+    presentation = Presentation()
+    for _ in range(num_of_slides):
+        pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        for i in range(4):
+            # repeated cards (templates) in a slightly uneven row
+            left, top = Cm(1 + 5 * i) + int(rng.integers(-Mm(2), Mm(2))), Cm(4) + int(rng.integers(-Mm(2), Mm(2)))
+            pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, Cm(4) + int(rng.integers(0, Mm(1))), Cm(6))
+    presentation.save(path)
+    return str(path)
+
+
+def _changes(plan, path):
+    return [c.to_dict() for c in plan.run(PPTXReader(path), apply=False)]
+
+
+def test_cached_plan_on_two_decks(tmp_path):
+    first = _create_deck(tmp_path / "first.pptx", seed=0)
+    second = _create_deck(tmp_path / "second.pptx", seed=1)
+    strategies = [dict(type="joint", grid="deck"), dict(type="edge"), dict(type="spacing"), dict(type="template")]
+    num_of_templates = len(ObjectTemplates.templates)
+
+    plan = compile_config(_config(strategies))
+    changes = _changes(plan, first)
+    _changes(plan, second)
+
+    assert compile_config(_config(strategies)) is plan
+    # the templates of the decks are not accumulated by the plan
+    assert len(ObjectTemplates.templates) == num_of_templates
+    assert _changes(plan, first) == changes
+    assert any(c["snap_type"] == "template" for c in changes)
+
+
+def test_empty_deck(tmp_path):
+    path = str(tmp_path / "empty.pptx")
+    Presentation().save(path)
+    assert _changes(compile_config(_config([dict(type="joint", grid="deck")])), path) == []
+
+
+def test_edge_strategies_keep_their_axis(tmp_path):
+    reader = PPTXReader(_create_deck(tmp_path / "deck.pptx"))
+    plan = compile_config(_config([dict(type="edge", axis="x"), dict(type="edge", axis="y")]))
+    pipeline = plan.pipeline(reader)
+    slide = reader.slides[0]
+    pipeline.process_slide(slide)
+
+    snap_types = {c.snap_type for o in slide.snappable_objects for c in o.snapping_candidates}
+    assert snap_types == {"edge_x", "edge_y"}
+
+
+class _CountingSink(MetricsSink):
+    def __init__(self):
+        self.counters = {}
+
+    def emit(self, event: dict) -> None:
+        if event["kind"] == "counter":
+            self.counters[event["name"]] = self.counters.get(event["name"], 0) + event["value"]
+
+
+def test_cached_searches_report_to_the_current_run(tmp_path):
+    path = _create_deck(tmp_path / "deck.pptx")
+    plan = compile_config(_config([dict(type="joint", grid="layout")]))
+
+    first_sink, second_sink = _CountingSink(), _CountingSink()
+    plan.run(PPTXReader(path), apply=False, instrumentation=Instrumentation([first_sink]))
+    plan.run(PPTXReader(path), apply=False, instrumentation=Instrumentation([second_sink]))
+
+    assert second_sink.counters["candidates_generated"] == first_sink.counters["candidates_generated"] > 0
+
+
+def test_template_ids_are_unique_across_registries(tmp_path):
+    objects = [o for slide in PPTXReader(_create_deck(tmp_path / "deck.pptx")).slides for o in slide.snappable_objects]
+    recognizer = compile_config(_config([])).config.create_recognizer("templates")
+    registry = OrderedDict()
+    ObjectTemplates.recognize_templates(objects, recognizer, registry=registry)
+    ObjectTemplates.recognize_templates(objects, recognizer)
+
+    assert len(registry) > 0
+    assert not set(registry) & set(ObjectTemplates.templates)
@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.deck_grid import DeckGrid
+from pptx_snapper.slide import Slide
+from pptx_snapper.utils import AnchorPoint
+
+
+def _create_slides(num_of_slides=4):
+    presentation = Presentation()
+    slides = []
+    for slide_index in range(num_of_slides):
+        pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        # two columns (left at 2 cm and 12 cm) and two rows (top at 3 cm and 10 cm) with sub-mm jitter
+        for i, (left, top) in enumerate([(Cm(2), Cm(3)), (Cm(12), Cm(3)), (Cm(2), Cm(10)), (Cm(12), Cm(10))]):
+            jitter = (slide_index * 3 + i) % 5 * Mm(0.1)
+            pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left + jitter, top + jitter, Cm(4), Cm(2))
+        slides.append(Slide(pptx_slide, slide_index, presentation.slide_width, presentation.slide_height))
+    return slides
+
+
+def test_deck_grid_lines():
+    slides = _create_slides()
+    grid = DeckGrid.from_slides(slides, anchor_points=[AnchorPoint.TOP_LEFT])
+    assert grid.num_of_positions == (16, 16)
+
+    grid.calculate_deck_grid(n_clusters=2)
+    assert len(grid.x_grid_lines) == 2 and len(grid.y_grid_lines) == 2
+    for line, expected in zip(grid.x_grid_lines + grid.y_grid_lines, [Cm(2), Cm(12), Cm(3), Cm(10)]):
+        assert abs(line - expected) <= Mm(1)
+
+
+def test_deck_grid_streaming_equals_single_pass():
+    slides = _create_slides()
+    single_pass = DeckGrid.from_slides(slides)
+
+    streamed = DeckGrid(slides[0].slide_width, slides[0].slide_height)
+    for slide in slides:
+        streamed.add_slide(slide)
+
+    assert (single_pass.x_counts == streamed.x_counts).all()
+    assert (single_pass.y_sums == streamed.y_sums).all()
+
+
+def test_empty_deck():
+    with pytest.raises(ValueError):
+        DeckGrid.from_slides([])
+
+    grid = DeckGrid.from_slides([], slide_width=Cm(25), slide_height=Cm(19))
+    grid.calculate_deck_grid()
+    assert grid.num_of_positions == (0, 0)
+    assert grid.to_grid().x_grid_lines == [] and grid.to_grid().y_grid_lines == []
+
+
+def test_out_of_slide_anchors_are_dropped():
+    grid = DeckGrid(Cm(20), Cm(10))
+    grid.add_anchor_positions(x_positions=[-Cm(5), Cm(4), Cm(25)], y_positions=[Cm(3), Cm(11), -1])
+    assert grid.num_of_positions == (1, 1)
+    assert grid.x_counts[0] == 0 and grid.x_counts[-1] == 0
@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.density_grid import DensityGrid
+from pptx_snapper.slide import Slide
+from pptx_snapper.utils import AnchorPoint
+
+signal_module = pytest.importorskip("scipy.signal")
+
+SIGNALS = [
+    np.array([0, 1, 3, 1, 0, 2, 2, 2, 0, 5, 5, 1, 4, 4, 4, 4, 0], dtype=np.float64),  # plateaus (odd and even)
+    np.array([1, 3, 1, 3, 1, 3, 1], dtype=np.float64),  # equal peaks (ties of the bases)
+    np.array([3, 3, 1, 2, 1, 3, 3], dtype=np.float64),  # plateaus on the ends are not peaks
+    np.array([0, 2, 1, 2, 0, 4, 3, 4, 0], dtype=np.float64),
+]
+
+
+def _reference(signal, min_prominence):
+    peaks, _ = signal_module.find_peaks(signal)
+    prominences = signal_module.peak_prominences(signal, peaks)[0]
+    return peaks[prominences >= min_prominence]
+
+
+@pytest.mark.parametrize("signal", SIGNALS + [np.random.default_rng(seed).integers(0, 6, size=200).astype(np.float64)
+                                              for seed in range(5)])
+def test_find_peaks_matches_scipy(signal):
+    for min_prominence in [0, 0.5, 1, 2, 3, 4]:
+        assert DensityGrid.find_peaks(signal, min_prominence).tolist() == _reference(signal, min_prominence).tolist()
+
+
+def test_density_lines():
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for i in range(6):
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(2) + i * Mm(0.3), Cm(2 + 3 * i), Cm(3), Cm(2))
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(12) - i * Mm(0.3), Cm(2 + 3 * i), Cm(3), Cm(2))
+    slide = Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height)
+
+    grid = DensityGrid(slide)
+    grid.calculate_density_grid(anchor_point=AnchorPoint.TOP_LEFT, axis='x')
+    assert len(grid.x_grid_lines) == 2
+    for line, expected in zip(grid.x_grid_lines, [Cm(2) + Mm(0.75), Cm(12) - Mm(0.75)]):
+        assert abs(line - expected) <= Mm(1)
@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper.geometry_store import GeometryStore
+
+
+def _create_deck(path, lefts_cm):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for left in lefts_cm:
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(left), Cm(1), Cm(2), Cm(2))
+    presentation.save(path)
+    return str(path)
+
+
+def test_append_reopen_and_replace(tmp_path):
+    first = _create_deck(tmp_path / "first.pptx", [1, 4, 7])
+    second = _create_deck(tmp_path / "second.pptx", [2, 5])
+
+    store = GeometryStore(str(tmp_path / "store"))
+    assert store.append_deck(first) == 3
+    assert store.append_deck(second) == 2
+    # an unchanged deck is not appended again
+    assert store.append_deck(first) == 0
+
+    reopened = GeometryStore(str(tmp_path / "store"))
+    assert len(reopened) == 5
+    assert isinstance(reopened.column("left"), np.memmap)
+    assert sorted(reopened.column("left").tolist()) == sorted(Cm(x) for x in [1, 4, 7, 2, 5])
+
+    # a modified deck replaces its rows
+    _create_deck(tmp_path / "first.pptx", [10, 12, 14, 16])
+    os.utime(first, ns=(0, 10 ** 9))
+    assert reopened.append_deck(first) == 4
+
+    reopened = GeometryStore(str(tmp_path / "store"))
+    assert len(reopened) == 6
+    columns = reopened.columns(["deck_index", "left"])
+    rows = sorted(zip(columns["deck_index"].tolist(), columns["left"].tolist()))
+    assert rows == [(0, Cm(x)) for x in [10, 12, 14, 16]] + [(1, Cm(x)) for x in [2, 5]]
+
+
+def test_uncommitted_rows_are_truncated(tmp_path):
+    store = GeometryStore(str(tmp_path / "store"))
+    store.append_deck(_create_deck(tmp_path / "first.pptx", [1, 4, 7]))
+
+    # an interrupted append: rows written to some columns, not committed
+    with open(store._column_path("left"), "ab") as f:
+        f.write(np.arange(5, dtype="<i8").tobytes())
+
+    reopened = GeometryStore(str(tmp_path / "store"))
+    assert len(reopened) == 3
+    reopened.append_deck(_create_deck(tmp_path / "second.pptx", [2, 5]))
+
+    for name, dtype in GeometryStore.column_dtypes.items():
+        assert os.path.getsize(reopened._column_path(name)) == 5 * np.dtype(dtype).itemsize
+    assert reopened.column("left").tolist() == [Cm(x) for x in [1, 4, 7, 2, 5]]
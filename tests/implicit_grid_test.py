@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from pptx_snapper.grid import Grid
+from pptx_snapper.implicit_grid import ImplicitGrid
+from pptx_snapper.snapping import SnappingSearch
+
+WIDTH, HEIGHT = 12192000, 6858000
+
+
+def _nearest_materialized(lines, values):
+    lines = np.array(sorted(lines))
+    distance = np.abs(values[:, None] - lines[None, :])
+    return lines[np.argmin(distance, axis=1)]  # the first (lower) line wins a tie
+
+
+@pytest.mark.parametrize("grid", [
+    ImplicitGrid.from_depth(WIDTH, HEIGHT, 5, 3),
+    ImplicitGrid.from_layout(WIDTH, HEIGHT, columns=12, rows=5, margins=(300000, 200000, 300000, 250000),
+                             column_gutter=180000, row_gutter=120000),
+    Grid.merge_grids(ImplicitGrid.from_depth(WIDTH, HEIGHT, 2, 2), Grid(WIDTH, HEIGHT, 3, 1)),
+])
+def test_nearest_matches_materialized_lines(grid):
+    rng = np.random.default_rng(0)
+    x = rng.integers(-100000, WIDTH + 100000, 2000)
+    y = rng.integers(-100000, HEIGHT + 100000, 2000)
+    lines = grid.all_x_grid_lines()
+    # exact midpoints between lines exercise the ties
+    x = np.concatenate([x, (np.array(lines[:-1]) + np.array(lines[1:])) // 2])
+
+    assert np.array_equal(grid.nearest_x(x), _nearest_materialized(grid.all_x_grid_lines(), x))
+    assert np.array_equal(grid.nearest_y(y), _nearest_materialized(grid.all_y_grid_lines(), y))
+
+
+def test_merge_and_extend_keep_lattices():
+    implicit = ImplicitGrid.from_depth(WIDTH, HEIGHT, 6, 6)
+    explicit = Grid(WIDTH, HEIGHT, 1, 1)
+    expected_x = sorted(set(implicit.all_x_grid_lines()).union(explicit.x_grid_lines))
+
+    for merged in [Grid.merge_grids(explicit, implicit), Grid.merge_grids(implicit, explicit)]:
+        assert merged.is_implicit
+        assert merged.all_x_grid_lines() == expected_x
+
+    extended = ImplicitGrid.from_depth(WIDTH, HEIGHT, 1, 1)
+    extended.extend(implicit)
+    assert extended.all_x_grid_lines() == implicit.all_x_grid_lines()
+
+    with pytest.raises(ValueError):
+        explicit.copy().extend(implicit)
+
+    search = SnappingSearch()
+    search.set_x_grid(explicit.get_x_grid())
+    search.extend_x_grid(implicit.get_x_grid())
+    assert search.x_grid.is_implicit
+    assert search.x_grid.all_x_grid_lines() == expected_x
@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import logging
+
+from pptx_snapper.instrumentation import Instrumentation, JSONLinesSink, LoggingSink, MetricsSink, PrometheusSink
+
+
+class _ListSink(MetricsSink):
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event: dict) -> None:
+        self.events.append(event)
+
+
+def _record(instrumentation):
+    instrumentation.count("selected", 3, slide=0, strategy="x")
+    instrumentation.count("selected", 2, slide=1, strategy="x")
+    with instrumentation.timer("candidates", slide=0, strategy="x"):
+        pass
+    instrumentation.flush()
+
+
+def test_disabled_instrumentation_is_a_no_op():
+    instrumentation = Instrumentation()
+    assert not instrumentation.enabled
+
+    def fail(*args):
+        raise AssertionError("no event is created without sinks")
+    instrumentation._emit = fail
+
+    _record(instrumentation)
+
+
+def test_metrics_sink_events():
+    sink = _ListSink()
+    _record(Instrumentation([sink]))
+
+    assert [(e["kind"], e["name"], e["labels"]) for e in sink.events] == [
+        ("counter", "selected", dict(slide=0, strategy="x")),
+        ("counter", "selected", dict(slide=1, strategy="x")),
+        ("timer", "candidates", dict(slide=0, strategy="x"))]
+    assert [e["value"] for e in sink.events[:2]] == [3, 2]
+    assert sink.events[2]["value"] >= 0
+
+
+def test_logging_sink(caplog):
+    with caplog.at_level(logging.INFO, logger="pptx_snapper.metrics"):
+        _record(Instrumentation([LoggingSink()]))
+    assert caplog.messages[0] == "counter selected=3 slide=0 strategy=x"
+    assert caplog.messages[2].startswith("timer candidates=")
+
+
+def test_json_lines_sink(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    instrumentation = Instrumentation([JSONLinesSink(path)])
+    _record(instrumentation)
+    _record(instrumentation)
+    instrumentation.close()
+
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert len(events) == 6
+    assert events[0]["name"] == "selected" and events[0]["value"] == 3 and events[0]["labels"]["slide"] == 0
+
+
+def test_prometheus_sink(tmp_path):
+    path = str(tmp_path / "metrics.prom")
+    _record(Instrumentation([PrometheusSink(path)]))
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    # the slide label is excluded, so the counters of the slides are summed
+    assert lines[:2] == ["# TYPE pptx_snapper_selected_total counter", 'pptx_snapper_selected_total{strategy="x"} 5']
+    assert lines[2] == "# TYPE pptx_snapper_candidates_seconds summary"
+    assert lines[3].startswith('pptx_snapper_candidates_seconds_sum{strategy="x"} ')
+    assert lines[4] == 'pptx_snapper_candidates_seconds_count{strategy="x"} 1'
+    assert not os.path.exists(path + ".tmp")
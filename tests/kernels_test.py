@@ -0,0 +1,97 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+
+from pptx_snapper import kernels
+from pptx_snapper.object_recognizer import ObjectRecognizer
+from pptx_snapper.slide import Slide
+
+requires_numba = pytest.mark.skipif(not kernels.HAS_NUMBA, reason="numba is not installed")
+
+
+def _create_slide(num_of_shapes=40, seed=0):
+    rng = np.random.default_rng(seed)
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for _ in range(num_of_shapes):
+        # few distinct positions and sizes, so there are exact duplicates and touching boxes too
+        left, top = (rng.integers(0, 8, size=2) * 500000).tolist()
+        width, height = (rng.integers(1, 5, size=2) * 500000).tolist()
+        shape = pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+        shape.rotation = float(rng.choice([0, 0, 30, 90]))
+    return Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height)
+
+
+def _reference_nearest(lines, values):
+    lines = np.asarray(lines)
+    return np.array([lines[np.argmin(np.abs(lines - v))] for v in np.ravel(values)]).reshape(np.shape(values))
+
+
+@pytest.mark.parametrize("backend", kernels.BACKENDS)
+def test_nearest_lines(backend):
+    rng = np.random.default_rng(1)
+    for num_of_lines in [1, 2, 7, 100]:
+        lines = np.unique(rng.integers(0, 10000, size=num_of_lines))
+        values = np.concatenate([rng.integers(-1000, 11000, size=500), lines, lines[:-1] + np.diff(lines) // 2])
+        assert np.array_equal(kernels.nearest_lines(lines, values, backend), _reference_nearest(lines, values))
+
+        values_2d = values[:400].reshape(-1, 2)
+        assert np.array_equal(kernels.nearest_lines(lines, values_2d, backend), _reference_nearest(lines, values_2d))
+
+
+@pytest.mark.parametrize("backend", kernels.BACKENDS)
+def test_nearest_lines_dtype(backend):
+    lines = np.array([0, 10, 20], dtype=np.int64)
+    for line_dtype in [np.int64, np.int32, np.float64]:
+        for values in [np.array([3, 16]), np.array([3.5, 16.2]), np.array([[3.5], [16.2]])]:
+            nearest = kernels.nearest_lines(lines.astype(line_dtype), values, backend)
+            assert nearest.dtype == line_dtype
+            assert nearest.shape == values.shape
+            assert np.array_equal(nearest.ravel(), [0, 20])
+
+
+@pytest.mark.parametrize("backend", kernels.BACKENDS)
+def test_overlap(backend):
+    objects = _create_slide().snappable_objects
+    boxes = objects[0].bounding_box_array(objects)
+
+    intersection = kernels.intersection_areas(boxes, boxes, backend)
+    dice = kernels.dice_coefficients(boxes, boxes, backend)
+    for i, obj in enumerate(objects):
+        for j, other in enumerate(objects):
+            assert intersection[i, j] == obj.intersection_area(other)
+            assert dice[i, j] == obj.dice_coefficient(other)
+
+
+@requires_numba
+def test_numba_matches_numpy():
+    rng = np.random.default_rng(2)
+    lines = np.unique(rng.integers(0, 10000, size=50))
+    values = rng.integers(-1000, 11000, size=1000)
+    assert np.array_equal(kernels.nearest_lines(lines, values, "numba"), kernels.nearest_lines(lines, values, "numpy"))
+    assert np.array_equal(kernels.nearest_lines(lines.astype(float), values + 0.5, "numba"),
+                          kernels.nearest_lines(lines.astype(float), values + 0.5, "numpy"))
+
+    x = np.sort(rng.integers(0, 1000, size=(60, 2)), axis=1)
+    y = np.sort(rng.integers(0, 1000, size=(60, 2)), axis=1)
+    boxes = np.stack([x[:, 0], y[:, 0], x[:, 1], y[:, 1]], axis=1)
+    assert np.array_equal(kernels.intersection_areas(boxes, boxes[:20], "numba"),
+                          kernels.intersection_areas(boxes, boxes[:20], "numpy"))
+    assert np.array_equal(kernels.dice_coefficients(boxes, boxes[:20], "numba"),
+                          kernels.dice_coefficients(boxes, boxes[:20], "numpy"))
+
+
+def test_batch_recognizer():
+    objects = _create_slide().snappable_objects
+    for recognizer in [ObjectRecognizer.get_dice_recognizer(0.5), ObjectRecognizer.get_exact_recognizer(),
+                       ObjectRecognizer.get_size_with_dice_recognizer(0.8, 0.3)]:
+        for ref in objects:
+            expected = [o for o in objects if all(recognizer.validate(ref, o))]
+            assert recognizer.search_similar_objects(ref, objects) == expected
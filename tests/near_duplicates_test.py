@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper.near_duplicates import NearDuplicateFinder
+from pptx_snapper.object_recognizer import ObjectRecognizer
+from pptx_snapper.slide import Slide
+
+
+def _create_objects(sizes):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for width, height in sizes:
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, 0, 0, int(width), int(height))
+    return Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height).snappable_objects
+
+
+def _exact_groups(recognizer, objs):
+    groups = []
+    remaining = list(objs)
+    while remaining:
+        group = recognizer.search_similar_objects(remaining[0], remaining)
+        groups.append(group)
+        remaining = [o for o in remaining if all(o is not member for member in group)]
+    return groups
+
+
+def _as_sets(groups):
+    return {frozenset(id(o) for o in group) for group in groups}
+
+
+def test_matches_exact_grouping():
+    # components with sizes 20% apart, their instances within 2%
+    rng = np.random.default_rng(0)
+    components = Cm(1) * 1.2 ** np.arange(12)
+    sizes = [(components[i] * rng.uniform(0.99, 1.01), components[j] * rng.uniform(0.99, 1.01))
+             for i, j in rng.integers(0, len(components), size=(300, 2))]
+    objs = _create_objects(sizes)
+
+    recognizer = ObjectRecognizer.get_relative_size_recognizer(0.05)
+    groups = NearDuplicateFinder(recognizer).find_groups(objs, min_group_size=1)
+
+    assert _as_sets(groups) == _as_sets(_exact_groups(recognizer, objs))
+
+
+def test_similar_pairs_do_not_chain():
+    # 4% steps: neighbours are similar, the ends (8% apart) are not
+    objs = _create_objects([(Cm(10), Cm(2)), (Cm(10.4), Cm(2)), (Cm(10.8), Cm(2))])
+    recognizer = ObjectRecognizer.get_relative_size_recognizer(0.05)
+    groups = NearDuplicateFinder(recognizer, resolutions=(0.2,), num_of_shifts=3).find_groups(objs, min_group_size=1)
+
+    for group in groups:
+        assert all(all(recognizer.validate(a, b)) for a in group for b in group)
+    assert sorted(len(group) for group in groups) == [1, 2]
@@ -0,0 +1,102 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import zipfile
+
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper import package_writer, snapping
+from pptx_snapper.package_writer import save_presentation
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnappingManager
+
+
+def _create_presentation(num_of_slides=3):
+    presentation = Presentation()
+    for i in range(num_of_slides):
+        pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        pptx_slide.shapes.title.text = f"Slide {i}"
+        for j in range(5):
+            shape = pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(1 + 4 * j), Cm(8), Cm(3), Cm(2))
+            shape.text = "ünïcode" * j
+    return presentation
+
+
+def _members(file) -> dict:
+    with zipfile.ZipFile(file) as zf:
+        assert zf.testzip() is None
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def _member_names(file) -> list:
+    with zipfile.ZipFile(file) as zf:
+        return zf.namelist()
+
+
+@pytest.mark.parametrize("kwargs", [dict(), dict(store_only=True), dict(compression_level=1, workers=1)])
+def test_round_trip(tmp_path, kwargs):
+    presentation = _create_presentation()
+    reference, saved = str(tmp_path / "reference.pptx"), str(tmp_path / "saved.pptx")
+    presentation.save(reference)
+    save_presentation(presentation, saved, **kwargs)
+
+    assert _member_names(saved) == _member_names(reference)
+    assert _members(saved) == _members(reference)
+
+    reloaded = Presentation(saved)
+    assert [s.shapes.title.text for s in reloaded.slides] == [s.shapes.title.text for s in presentation.slides]
+
+
+def test_file_object(tmp_path):
+    presentation = _create_presentation()
+    buffer = io.BytesIO()
+    save_presentation(presentation, buffer)
+
+    reference = io.BytesIO()
+    presentation.save(reference)
+    assert _members(buffer) == _members(reference)
+
+
+def test_zip64_fallback(tmp_path, monkeypatch, caplog):
+    # pretend that the package does not fit in a plain zip file: it is saved with python-pptx instead
+    monkeypatch.setattr(package_writer, "_ZIP64_LIMIT", 4096)
+    presentation = _create_presentation()
+    reference = io.BytesIO()
+    presentation.save(reference)
+
+    buffer = io.BytesIO()
+    buffer.write(b"prefix")
+    save_presentation(presentation, buffer)
+    assert "saving with python-pptx" in caplog.text
+    assert buffer.getvalue().startswith(b"prefix")
+    assert _members(io.BytesIO(buffer.getvalue()[len(b"prefix"):])) == _members(reference)
+
+    path = str(tmp_path / "saved.pptx")
+    save_presentation(presentation, path)
+    assert _members(path) == _members(reference)
+    assert len(Presentation(path).slides) == 3
+
+
+def test_manager_saves_with_python_pptx_by_default(tmp_path, monkeypatch):
+    path = str(tmp_path / "deck.pptx")
+    _create_presentation().save(path)
+    manager = SnappingManager(PPTXReader(path))
+
+    calls = []
+    monkeypatch.setattr(snapping, "save_presentation", lambda *args: calls.append(args))
+    manager.save_at(str(tmp_path / "default.pptx"))
+    assert calls == []
+    assert sorted(_member_names(str(tmp_path / "default.pptx"))) == sorted(_member_names(path))
+
+    manager.save_at(str(tmp_path / "parallel.pptx"), store_only=True, parallel=True)
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError):
+        manager.save_at(str(tmp_path / "stored.pptx"), store_only=True)
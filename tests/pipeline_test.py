@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.implicit_grid import ImplicitGrid
+from pptx_snapper.pipeline import SlidePipeline
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnappingLimits, SnappingManager, SnappingSearch
+
+
+def _create_reader(path):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for i in range(5):
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(1 + 4 * i) + Mm(1), Cm(3) + Mm(1), Cm(3), Cm(2))
+    presentation.save(path)
+    return PPTXReader(str(path))
+
+
+def _create_pipeline(reader, over_budget):
+    search = SnappingSearch()
+    search.set_joint_grid(ImplicitGrid.from_depth(reader.slide_width, reader.slide_height, 4, 4))
+
+    pipeline = SlidePipeline(reader, slide_budget=1.0, over_budget=over_budget)
+    pipeline.add_search(search, "joint", grid_type="implicit", essential=True)
+    pipeline.add_stage("slow", lambda slide: None, estimate=lambda slide: 60.0)
+    pipeline.add_stage("fast", lambda slide: None)
+    return pipeline
+
+
+def test_degraded_slide(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    result = _create_pipeline(reader, "degrade").process_slide(reader.slides[0])
+
+    # the slow stage would exceed the budget, so it is not even started
+    assert result.status == "degraded"
+    assert result.completed_stages == ["implicit:joint"]
+    assert result.skipped_stages == ["slow", "fast"]
+    assert len(result.changes) > 0
+
+
+def test_skipped_slide(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    slide = reader.slides[0]
+    result = _create_pipeline(reader, "skip").process_slide(slide)
+
+    assert result.status == "skipped"
+    assert result.completed_stages == ["implicit:joint"]
+    assert result.changes == []
+    # the candidates of the completed stage are dropped too
+    assert all(len(obj.snapping_candidates) == 0 for obj in slide.snappable_objects)
+
+
+def test_within_budget(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    pipeline = _create_pipeline(reader, "skip")
+    pipeline.slide_budget = 120.0
+    result = pipeline.process_slide(reader.slides[0])
+
+    assert result.status == "done"
+    assert result.skipped_stages == []
+
+
+def test_manager_limits_are_pushed_to_the_search(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    manager = SnappingManager(reader, x_limit=Mm(2), y_limit=Mm(2))
+    search = SnappingSearch(limits=SnappingLimits(x_limit=Cm(5), y_limit=Cm(5)))
+
+    pipeline = SlidePipeline(reader, manager)
+    pipeline.add_search(search, "joint", grid_type="implicit")
+    assert search.limits is manager.limits
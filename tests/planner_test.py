@@ -0,0 +1,70 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper.planner import CostModel, StrategyPlanner
+from pptx_snapper.slide import Slide
+from pptx_snapper.templates import ObjectTemplates
+from pptx_snapper.utils import AnchorPoint
+
+
+def _create_slide(num_of_objects=20, seed=0):
+    rng = np.random.default_rng(seed)
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for _ in range(num_of_objects):
+        left, top = rng.integers(0, Cm(20), size=2).tolist()
+        size = int(rng.choice([Cm(2), Cm(3)]))
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, size, size)
+    return Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height)
+
+
+def test_degradation_order_under_tight_budget():
+    planner = StrategyPlanner(latency_target=1e-9, grid="kmeans", strategies=["joint", "edge", "spacing"],
+                              recognize_templates=True)
+    plan = planner.plan(_create_slide())
+
+    assert plan.notes == StrategyPlanner.degradations + ["over_target"]
+    assert plan.grid == "implicit"
+    assert plan.anchor_points == [AnchorPoint.CENTER]
+    assert plan.strategies == ["joint"]
+    assert not plan.recognize_templates
+
+    # the degraded plan is cheaper than the full one
+    loose = StrategyPlanner(latency_target=1e9, grid="kmeans", strategies=["joint", "edge", "spacing"],
+                            recognize_templates=True).plan(_create_slide())
+    assert loose.notes == []
+    assert loose.estimated_cost > plan.estimated_cost
+
+
+def test_estimates_use_grid_lines_and_calibration():
+    coefficients = {name: 1.0 for name in CostModel.default_coefficients}
+    planner = StrategyPlanner(latency_target=1e9, cost_model=CostModel(coefficients), grid="implicit",
+                              anchor_points=[AnchorPoint.CENTER], strategies=["joint", "edge"], implicit_depth=2)
+    slide = _create_slide()
+    plan = planner.plan(slide)
+
+    # 20 objects with one anchor each, 2^2 + 1 lines of the implicit grid
+    expected = 20 + 20 * np.log2(5 + 2) + 20 * np.log2(20 + 2)
+    assert np.isclose(plan.estimated_cost, expected)
+
+    global_templates = list(ObjectTemplates.templates)
+    planner.recognize_templates = True
+    plan = planner.execute(slide)
+
+    # both axes of the implicit grid have 5 lines
+    assert planner.num_of_lines["implicit"] == 5
+    # the measured timings (far below 1 s per unit) pulled the coefficients down
+    for name in ["implicit", "candidates", "edge", "templates"]:
+        assert planner.cost_model.coefficients[name] < 1.0
+    assert planner.cost_model.coefficients["spacing"] == 1.0
+    # the templates are kept in the registry of the planner
+    assert len(planner.templates) > 0
+    assert list(ObjectTemplates.templates) == global_templates
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnappingLimits, SnappingManager, TemplateSnapping
+from pptx_snapper.templates import ObjectTemplate, TemplateGeometry
+
+
+def _create_reader(path, rotation, width=Cm(4), height=Cm(1)):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    shape = pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(5), Cm(5), width, height)
+    shape.rotation = rotation
+    presentation.save(path)
+    return PPTXReader(str(path))
+
+
+def test_rotated_bounding_box(tmp_path):
+    obj = _create_reader(tmp_path / "deck.pptx", 30).slides[0].snappable_objects[0]
+
+    # the frame is unchanged by the rotation
+    assert obj.right - obj.left == obj.width
+    assert obj.bottom - obj.top == obj.height
+
+    assert obj.bbox_right - obj.bbox_left == obj.bbox_width
+    assert obj.bbox_bottom - obj.bbox_top == obj.bbox_height
+    # the wide frame gets slightly narrower and much taller
+    assert obj.bbox_left > obj.left and obj.bbox_right < obj.right
+    assert obj.bbox_top < obj.top and obj.bbox_bottom > obj.bottom
+    assert abs(obj.bbox_width - (Cm(4) * 0.866 + Cm(1) * 0.5)) < Mm(0.1)
+    assert abs(obj.bbox_height - (Cm(4) * 0.5 + Cm(1) * 0.866)) < Mm(0.1)
+
+
+def test_bounding_box_follows_changes(tmp_path):
+    obj = _create_reader(tmp_path / "deck.pptx", 0).slides[0].snappable_objects[0]
+    assert (obj.bbox_width, obj.bbox_height) == (obj.width, obj.height)
+
+    obj.rotation = 90.0
+    assert abs(obj.bbox_width - Cm(1)) <= 1 and abs(obj.bbox_height - Cm(4)) <= 1
+
+    obj.width = Cm(2)
+    assert abs(obj.bbox_width - Cm(1)) <= 1 and abs(obj.bbox_height - Cm(2)) <= 1
+
+
+def test_template_limits_use_bounding_box(tmp_path):
+    # a thin, tall shape lying on its side: 0.5 cm wide frame, 4 cm wide bounding box
+    reader = _create_reader(tmp_path / "deck.pptx", 90, width=Cm(0.5), height=Cm(4))
+    obj = reader.slides[0].snappable_objects[0]
+
+    template = ObjectTemplate(obj.shape_type, "rotated")
+    template.add_instance(obj)
+    template.template_object = TemplateGeometry("rotated", obj.shape_type, obj.left + Mm(3), obj.top,
+                                                obj.width, obj.height, [obj.full_id])
+
+    # 3 mm is 60% of the frame width but below 10% of the bounding box width
+    limits = SnappingLimits(x_relative_limit=.1)
+    TemplateSnapping([template], snap_size=False, position_tolerance=1.0, limits=limits).snap_batch(
+        [obj], grid_type="objects")
+
+    changes = SnappingManager(reader, x_relative_limit=.1).select_slide_snaps(reader.slides[0])
+    assert [(c.dx, c.dy) for c in changes] == [(Mm(3), 0)]
@@ -0,0 +1,123 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.implicit_grid import ImplicitGrid
+from pptx_snapper.instrumentation import Instrumentation, MetricsSink
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnappingSearch, SnappingManager, SnappingLimits, EdgeSnapping
+
+LIMITS = dict(x_limit=Mm(5), y_relative_limit=.1)
+
+
+class _CountingSink(MetricsSink):
+    def __init__(self):
+        self.counters = {}
+
+    def emit(self, event: dict) -> None:
+        if event["kind"] == "counter":
+            self.counters[event["name"]] = self.counters.get(event["name"], 0) + event["value"]
+
+
+def _create_deck(path, num_of_slides=3, shapes_per_slide=30, seed=0):
+    rng = np.random.default_rng(seed)
+    presentation = Presentation()
+    for _ in range(num_of_slides):
+        pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        for _ in range(shapes_per_slide):
+            left, top = rng.integers(0, Cm(20), size=2).tolist()
+            width, height = rng.integers(Cm(1), Cm(5), size=2).tolist()
+            pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+    presentation.save(path)
+    return path
+
+
+def _select_changes(path, search_limits, instrumentation=None, top_k=None):
+    reader = PPTXReader(path)
+    for slide in reader.slides:
+        search = SnappingSearch(limits=search_limits, instrumentation=instrumentation, top_k=top_k)
+        search.set_joint_grid(ImplicitGrid.from_depth(slide.slide_width, slide.slide_height, 4, 4))
+        search.set_edge_snapping()
+        for strategy in ["x", "y", "joint", "edge"]:
+            search.calculate_candidates_for_all_obj(slide, strategy)
+    return [c.to_dict() for c in SnappingManager(reader, **LIMITS).compute_snaps()]
+
+
+def test_windowed_search_equals_linear_scan(tmp_path):
+    path = _create_deck(str(tmp_path / "deck.pptx"))
+    sink = _CountingSink()
+
+    unwindowed = _select_changes(path, None)
+    windowed = _select_changes(path, SnappingLimits(**LIMITS), Instrumentation([sink]))
+
+    assert len(unwindowed) > 0
+    assert windowed == unwindowed
+    # the anchors skipped by the window are reported
+    assert sink.counters["rejected_absolute_limit"] > 0
+    assert sink.counters["rejected_relative_limit"] > 0
+
+
+def test_top_k_equals_full_selection(tmp_path):
+    path = _create_deck(str(tmp_path / "deck.pptx"))
+    full_sink, top_k_sink = _CountingSink(), _CountingSink()
+
+    full = _select_changes(path, SnappingLimits(**LIMITS), Instrumentation([full_sink]))
+    for k in [1, 3]:
+        assert _select_changes(path, SnappingLimits(**LIMITS), Instrumentation([top_k_sink]), top_k=k) == full
+
+    # the offered candidates are counted, not the retained ones
+    assert top_k_sink.counters["candidates_generated"] == 2 * full_sink.counters["candidates_generated"]
+
+    with pytest.raises(ValueError):
+        SnappingSearch(top_k=3)
+
+
+def test_edge_snap_requires_index_of_the_slide(tmp_path):
+    reader = PPTXReader(_create_deck(str(tmp_path / "deck.pptx"), num_of_slides=2))
+    first, second = reader.slides
+    strategy = EdgeSnapping()
+
+    with pytest.raises(ValueError):
+        strategy.snap(first.snappable_objects[0], grid_type="objects")
+
+    strategy.build_index(first.snappable_objects)
+    with pytest.raises(ValueError):
+        strategy.snap(second.snappable_objects[0], grid_type="objects")
+
+    # snapping one object on the indexed slide gives the same candidates as the batch
+    obj = first.snappable_objects[0]
+    strategy.snap(obj, grid_type="objects")
+    single = [str(c) for c in obj.snapping_candidates]
+    obj.snapping_candidates.clear()
+    strategy.snap_batch(first.snappable_objects, grid_type="objects")
+    assert single == [str(c) for c in obj.snapping_candidates]
+
+
+def test_nearly_aligned_objects_do_not_swap(tmp_path):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, 720000, Cm(2), Cm(3), Cm(2))
+    pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, 723000, Cm(6), Cm(3), Cm(2))
+    path = str(tmp_path / "deck.pptx")
+    presentation.save(path)
+
+    reader = PPTXReader(path)
+    search = SnappingSearch()
+    search.set_edge_snapping(axis='x')
+    search.calculate_candidates_for_all_obj(reader.slides[0], "edge")
+    manager = SnappingManager(reader, **LIMITS)
+    manager.apply_snaps()
+
+    first, second = [o.shape for o in reader.slides[0].snappable_objects]
+    # the later of the two equally large objects is aligned to the earlier one
+    assert first.left == 720000
+    assert second.left == first.left
+    assert second.left + second.width == first.left + first.width
@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm
+
+from pptx_snapper.object_recognizer import ObjectRecognizer
+from pptx_snapper.slide import Slide
+from pptx_snapper.spacing import SpacingDetector
+
+
+def _create_row(lefts_cm, width_cm=2):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for left in lefts_cm:
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(left), Cm(5), Cm(width_cm), Cm(2))
+    return Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height).snappable_objects
+
+
+def test_uneven_prefix_does_not_cut_run():
+    # gaps 1.1, 0.8, 1.15, 0.95 cm: all within 20% of their mean (1 cm)
+    objs = _create_row([1, 4.1, 6.9, 10.05, 13.0])
+    runs = SpacingDetector().detect(objs, 'x')
+
+    assert len(runs) == 1
+    assert len(runs[0].objects) == 5
+    assert abs(runs[0].uniform_gap - Cm(1)) < Cm(0.01)
+
+
+def test_uneven_row():
+    # gaps 1, 3, 0.5, 2 cm
+    objs = _create_row([1, 4, 9, 11.5, 15.5])
+    assert SpacingDetector().detect(objs, 'x') == []
+
+
+def test_runs_do_not_share_objects():
+    # gaps 1, 1, 3, 3, 3 cm: the object at 6 cm could end the first run or start the second one
+    objs = _create_row([0, 3, 6, 11, 16, 21])
+    runs = SpacingDetector().detect(objs, 'x')
+
+    assert [[o.shape.left for o in run.objects] for run in runs] == [[Cm(0), Cm(3), Cm(6)],
+                                                                    [Cm(11), Cm(16), Cm(21)]]
+
+
+def test_interleaved_sizes_do_not_split_a_group():
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    # widths 2, 2.01, 2.02 cm in a row with a 2.005 cm wide but much taller object sorted in between
+    for left, width in [(1, 2), (5, 2.01), (9, 2.02)]:
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(left), Cm(5), Cm(width), Cm(2))
+    pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(1), Cm(10), Cm(2.005), Cm(8))
+    objs = Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height).snappable_objects
+
+    detector = SpacingDetector(ObjectRecognizer.get_relative_size_recognizer(0.05))
+    groups = detector.group_similar_objects(objs)
+    assert len(groups) == 1
+    assert sorted(o.shape.left for o in groups[0]) == [Cm(1), Cm(5), Cm(9)]
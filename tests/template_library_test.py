@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import OrderedDict
+
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.slide import Slide
+from pptx_snapper.template_library import TemplateLibrary
+from pptx_snapper.templates import ObjectTemplates
+
+
+def _create_objects(sizes):
+    presentation = Presentation()
+    pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    for i, (width, height) in enumerate(sizes):
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Cm(i), Cm(i), width, height)
+    return Slide(pptx_slide, 0, presentation.slide_width, presentation.slide_height).snappable_objects
+
+
+def test_save_and_reopen(tmp_path):
+    path = str(tmp_path / "library.json")
+    library = TemplateLibrary.open(path, size_quantum=Mm(2))
+    library.update(_create_objects([(Cm(3), Cm(2))] * 3 + [(Cm(5), Cm(1))]), deck_id="a")
+    library.save(path)
+
+    reopened = TemplateLibrary.open(path, size_quantum=Mm(2))
+    assert reopened.to_dict() == library.to_dict()
+    assert TemplateLibrary.open(path).to_dict() == library.to_dict()
+    with pytest.raises(ValueError):
+        TemplateLibrary.open(path, size_quantum=Mm(1))
+
+
+def test_incremental_update():
+    library = TemplateLibrary()
+    card = [(Cm(3), Cm(2))] * 2
+    for deck_id in ["a", "b", "a"]:
+        library.update(_create_objects(card), deck_id=deck_id)
+
+    assert len(library) == 1
+    entry = library.match(_create_objects(card)[0])
+    assert entry.count == 6
+    assert entry.num_of_decks == 2
+
+    registry = OrderedDict()
+    global_templates = list(ObjectTemplates.templates)
+    templates = library.assign_templates(_create_objects(card), registry=registry)
+    assert list(registry.values()) == templates
+    assert list(ObjectTemplates.templates) == global_templates
+
+
+def test_boundary_size_lookup():
+    # 2.49 mm and 2.51 mm round to different 1 mm buckets
+    library = TemplateLibrary(size_quantum=Mm(1))
+    library.update(_create_objects([(Cm(3) + Mm(2.49), Cm(2))]))
+
+    entry = library.match(_create_objects([(Cm(3) + Mm(2.51), Cm(2))])[0])
+    assert entry is not None
+    assert library.match(_create_objects([(Cm(3) + Mm(4), Cm(2))])[0]) is None
+
+    library.update(_create_objects([(Cm(3) + Mm(2.51), Cm(2))]))
+    assert len(library) == 1
@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add the root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import OrderedDict
+
+import numpy as np
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Cm, Mm
+
+from pptx_snapper.grid import Grid
+from pptx_snapper.object_recognizer import ObjectRecognizer
+from pptx_snapper.pptx_reader import PPTXReader
+from pptx_snapper.snapping import SnapCandidate, SnappingLimits, SnappingManager, TemplateSnapping
+from pptx_snapper.templates import ObjectTemplates
+from pptx_snapper.utils import AnchorPoint
+
+# (left, top, width) of the instances, one per slide; the last one is far from the others
+INSTANCES = [(Cm(2) + i % 3 * Mm(1), Cm(3) - i % 2 * Mm(1), Cm(3) + i % 2 * Mm(1)) for i in range(7)] + \
+    [(Cm(12), Cm(3), Cm(3) + Mm(1))]
+
+
+def _create_reader(path):
+    presentation = Presentation()
+    for left, top, width in INSTANCES:
+        pptx_slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        pptx_slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, Cm(2))
+    presentation.save(path)
+    return PPTXReader(str(path))
+
+
+def _recognize(reader):
+    templates = OrderedDict()
+    ObjectTemplates.recognize_templates([o for s in reader.slides for o in s.snappable_objects],
+                                        ObjectRecognizer.get_size_recognizer(0.9), 2, registry=templates)
+    assert len(templates) == 1
+    return templates
+
+
+def _objects(reader):
+    return [slide.snappable_objects[0] for slide in reader.slides]
+
+
+def test_mean_position_and_resize_only(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    templates = _recognize(reader)
+    geometry = next(iter(templates.values())).template_object
+    lefts, tops, widths = np.array(INSTANCES).T
+    assert (geometry.left, geometry.top) == (round(lefts.mean()), round(tops.mean()))
+    assert (geometry.width, geometry.height) == (round(np.median(widths)), Cm(2))
+
+    objs = _objects(reader)
+    TemplateSnapping(templates.values()).snap_batch(objs, grid_type="objects")
+
+    for obj in objs[:-1]:
+        candidate, = obj.snapping_candidates
+        assert candidate.snap_position == (geometry.left, geometry.top)
+        assert candidate.snap_size == (geometry.width, geometry.height)
+
+    # the far instance is only resized
+    candidate, = objs[-1].snapping_candidates
+    assert candidate.snap_position == candidate.anchor_position
+    assert candidate.snap_size == (geometry.width, geometry.height)
+
+
+def test_size_change_is_limited(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    templates = _recognize(reader)
+    objs = _objects(reader)
+
+    # the width changes by 0.5 mm (~1.7%), the height does not change
+    limits = dict(x_limit=Cm(2), y_relative_limit=.01)
+    TemplateSnapping(templates.values(), limits=SnappingLimits(**limits)).snap_batch(objs, grid_type="objects")
+    assert all(c.snap_size is not None for o in objs for c in o.snapping_candidates)
+
+    limits = dict(x_limit=Cm(2), x_relative_limit=.01)
+    for obj in objs:
+        obj.snapping_candidates.clear()
+    TemplateSnapping(templates.values(), limits=SnappingLimits(**limits)).snap_batch(objs, grid_type="objects")
+    assert all(c.snap_size is None for o in objs for c in o.snapping_candidates)
+
+    # a resize over the limits is rejected by the manager too
+    obj = objs[3]
+    obj.snapping_candidates = [SnapCandidate(obj, AnchorPoint.TOP_LEFT, "template", "objects",
+                                             snap_size=(Cm(3), Cm(2)))]
+    assert SnappingManager(reader, **limits).select_slide_snaps(reader.slides[3]) == []
+
+
+def test_resize_only_candidate_does_not_win_over_closer_snap(tmp_path):
+    reader = _create_reader(tmp_path / "deck.pptx")
+    obj = _objects(reader)[3]
+    grid = Grid(reader.slide_width, reader.slide_height)
+    grid.x_grid_lines = [obj.left + Mm(0.5)]
+
+    obj.snapping_candidates = [SnapCandidate(obj, AnchorPoint.TOP_LEFT, "template", "objects",
+                                             snap_size=(obj.width - Mm(1), obj.height)),
+                               SnapCandidate(obj, AnchorPoint.TOP_LEFT, "x", "grid",
+                                             snap_x_position=grid.x_grid_lines[0])]
+    change, = SnappingManager(reader).select_slide_snaps(reader.slides[3])
+    assert (change.dx, change.dw, change.snap_type) == (Mm(0.5), 0, "x")